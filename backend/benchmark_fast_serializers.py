@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+Benchmark fast list serializers against the DRF serializers they mirror
+
+Creates temporary bookings and notifications (rolled back at the end),
+serializes them with both implementations, checks the output is identical
+and prints the timings.
+
+Run: python benchmark_fast_serializers.py [rows]
+"""
+import os
+import sys
+import time
+import django
+
+# Setup Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+django.setup()
+
+from datetime import timedelta, time as dt_time
+from django.db import transaction
+from django.utils import timezone
+from accounts.models import User
+from venue_management.models import Venue
+from booking_system.models import Booking, Notification
+from booking_system.serializers import BookingListSerializer, NotificationSerializer
+from booking_system.fast_serializers import BookingListFastSerializer, NotificationFastSerializer
+from venue_management.serializers import VenueListSerializer
+from venue_management.fast_serializers import VenueListFastSerializer
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def compare(name, queryset, serializer_class, fast_class):
+    drf, drf_seconds = timed(lambda: list(serializer_class(queryset.all(), many=True).data))
+    fast, fast_seconds = timed(lambda: fast_class().serialize(queryset.all()))
+    assert fast == drf, f"{name}: fast serializer output differs from {serializer_class.__name__}"
+    print(f"{name:<14} {len(fast):>7} rows   DRF {drf_seconds * 1000:>8.1f} ms   "
+          f"fast {fast_seconds * 1000:>8.1f} ms   {drf_seconds / fast_seconds:>5.1f}x")
+
+
+print(f"\n=== Fast serializer benchmark ({ROWS} rows) ===\n")
+
+with transaction.atomic():
+    user = User.objects.create_user(
+        email='benchmark-serializers@pccoe.edu', password='benchmark',
+        first_name='Bench', last_name='Mark', role='hod', department='Computer'
+    )
+    venues = [
+        Venue.objects.create(
+            name=f'Benchmark Hall {i}', location='Benchmark', building='Main',
+            floor=str(i), capacity=100, facilities=['Projector', 'AC']
+        )
+        for i in range(20)
+    ]
+    today = timezone.now().date()
+    # One hour-long slot per venue and hour, so no two bookings overlap
+    slots = ((venues[i % len(venues)], i // len(venues)) for i in range(ROWS))
+    Booking.objects.bulk_create([
+        Booking(
+            user=user, venue=venue, event_name=f'Benchmark event {i}',
+            event_description='Benchmark', date=today + timedelta(days=1 + slot // 10),
+            start_time=dt_time(8 + slot % 10), end_time=dt_time(9 + slot % 10),
+            expected_attendees=50, contact_number='9999999999'
+        )
+        for i, (venue, slot) in enumerate(slots)
+    ], batch_size=1000)
+    Notification.objects.bulk_create([
+        Notification(
+            user=user, notification_type='booking_confirmed', title=f'Benchmark {i}',
+            message='Benchmark notification', is_read=i % 2 == 0
+        )
+        for i in range(ROWS)
+    ], batch_size=1000)
+
+    # Same joins as the list views, so DRF is not timed with N+1 queries
+    bookings = Booking.objects.filter(user=user).select_related('user', 'venue').order_by('id')
+    notifications = Notification.objects.filter(user=user).select_related('user').order_by('id')
+    compare('bookings', bookings,
+            BookingListSerializer, BookingListFastSerializer)
+    compare('notifications', notifications,
+            NotificationSerializer, NotificationFastSerializer)
+    compare('venues', Venue.objects.order_by('id'),
+            VenueListSerializer, VenueListFastSerializer)
+
+    transaction.set_rollback(True)
+
+print("\nBenchmark data rolled back.")
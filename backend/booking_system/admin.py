@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Booking, VenueAdmin as VenueAdminModel, Notification, Waitlist
+from .models import Booking, BookingSeries, VenueAdmin as VenueAdminModel, VenueDayOccupancy, VenueDailyUtilization, Notification, NotificationArchive, Waitlist
+from utils.notification_utils import invalidate_unread_counts
 
 
 @admin.register(Booking)
@@ -44,6 +45,30 @@ class BookingAdmin(admin.ModelAdmin):
         return self.readonly_fields
 
 
+@admin.register(BookingSeries)
+class BookingSeriesAdmin(admin.ModelAdmin):
+    """Admin interface for BookingSeries model"""
+    
+    list_display = ('event_name', 'venue', 'user', 'start_date', 'start_time', 'end_time', 'recurrence', 'created_at')
+    list_filter = ('venue', 'created_at')
+    search_fields = ('event_name', 'user__email', 'venue__name')
+    ordering = ('-created_at',)
+    
+    fieldsets = (
+        ('Series Details', {
+            'fields': ('venue', 'user', 'event_name', 'event_description')
+        }),
+        ('Recurrence', {
+            'fields': ('start_date', 'start_time', 'end_time', 'recurrence')
+        }),
+        ('Attendees & Contact', {
+            'fields': ('expected_attendees', 'contact_number', 'special_requirements')
+        }),
+    )
+    
+    readonly_fields = ('created_at', 'updated_at')
+
+
 @admin.register(VenueAdminModel)
 class VenueAdminAdmin(admin.ModelAdmin):
     """Admin interface for VenueAdmin model"""
@@ -98,15 +123,32 @@ class NotificationAdmin(admin.ModelAdmin):
     def mark_as_read(self, request, queryset):
         """Mark selected notifications as read"""
         from django.utils import timezone
+        user_ids = list(queryset.values_list('user_id', flat=True).distinct())
         updated = queryset.update(is_read=True, read_at=timezone.now())
+        invalidate_unread_counts(user_ids)
         self.message_user(request, f'{updated} notification(s) marked as read.')
     mark_as_read.short_description = 'Mark selected as read'
     
     def mark_as_unread(self, request, queryset):
         """Mark selected notifications as unread"""
+        user_ids = list(queryset.values_list('user_id', flat=True).distinct())
         updated = queryset.update(is_read=False, read_at=None)
+        invalidate_unread_counts(user_ids)
         self.message_user(request, f'{updated} notification(s) marked as unread.')
     mark_as_unread.short_description = 'Mark selected as unread'
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_unread_counts([obj.user_id])
+    
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_unread_counts([obj.user_id])
+    
+    def delete_queryset(self, request, queryset):
+        user_ids = list(queryset.values_list('user_id', flat=True).distinct())
+        super().delete_queryset(request, queryset)
+        invalidate_unread_counts(user_ids)
 
 
 @admin.register(Waitlist)
@@ -146,3 +188,38 @@ class WaitlistAdmin(admin.ModelAdmin):
         updated = queryset.update(expired=True)
         self.message_user(request, f'{updated} waitlist entr(y/ies) marked as expired.')
     mark_as_expired.short_description = 'Mark as expired'
+
+
+@admin.register(VenueDayOccupancy)
+class VenueDayOccupancyAdmin(admin.ModelAdmin):
+    """Admin interface for VenueDayOccupancy model (maintained automatically)"""
+    
+    list_display = ('venue', 'date', 'mask', 'updated_at')
+    list_filter = ('venue',)
+    ordering = ('-date',)
+    date_hierarchy = 'date'
+    readonly_fields = ('venue', 'date', 'mask', 'updated_at')
+
+
+@admin.register(VenueDailyUtilization)
+class VenueDailyUtilizationAdmin(admin.ModelAdmin):
+    """Admin interface for VenueDailyUtilization model (maintained automatically)"""
+    
+    list_display = ('venue', 'date', 'booked_minutes', 'booking_count', 'cancelled_count', 'auto_cancelled_count', 'attendees')
+    list_filter = ('venue',)
+    ordering = ('-date',)
+    date_hierarchy = 'date'
+    readonly_fields = ('venue', 'date', 'booked_minutes', 'booking_count', 'cancelled_count',
+                       'auto_cancelled_count', 'attendees', 'updated_at')
+
+
+@admin.register(NotificationArchive)
+class NotificationArchiveAdmin(admin.ModelAdmin):
+    """Admin interface for NotificationArchive model (filled by the retention task)"""
+    
+    list_display = ('user', 'title', 'notification_type', 'is_read', 'created_at', 'archived_at')
+    list_filter = ('notification_type', 'is_read')
+    search_fields = ('user__email', 'title')
+    ordering = ('-created_at',)
+    readonly_fields = ('id', 'user', 'notification_type', 'title', 'message', 'is_read', 'created_at',
+                       'related_booking_id', 'related_venue_id', 'archived_at')
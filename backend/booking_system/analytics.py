@@ -0,0 +1,117 @@
+"""
+Vectorized booking analytics.
+
+Bookings are loaded as plain integer rows (weekday and minutes since
+midnight are extracted by the database) into NumPy arrays, and the minutes
+each booking overlaps every hour of the day are computed for all rows at
+once instead of looping over model instances.
+"""
+from itertools import islice
+
+import numpy as np
+
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay, ExtractMinute
+
+from venue_management.models import Venue
+from .models import Booking
+
+USED_STATUSES = ('confirmed', 'completed')
+
+# Rows processed per vectorized step (bounds the N x 24 overlap matrix)
+CHUNK_ROWS = 100_000
+
+_HOUR_STARTS = np.arange(24, dtype=np.int64) * 60
+_HOUR_ENDS = _HOUR_STARTS + 60
+
+
+def hourly_overlap(start_minutes, end_minutes):
+    """
+    Minutes each interval overlaps each hour of the day.
+
+    Args:
+        start_minutes (ndarray): Interval starts, minutes since midnight
+        end_minutes (ndarray): Interval ends, minutes since midnight
+
+    Returns:
+        ndarray: Shape (len(start_minutes), 24)
+    """
+    starts = np.maximum(start_minutes[:, None], _HOUR_STARTS[None, :])
+    ends = np.minimum(end_minutes[:, None], _HOUR_ENDS[None, :])
+    return np.clip(ends - starts, 0, 60)
+
+
+def weekday_counts(start_date, end_date):
+    """Number of Mondays..Sundays in [start_date, end_date]"""
+    days = np.arange(np.datetime64(start_date), np.datetime64(end_date) + 1, dtype='datetime64[D]')
+    # 1970-01-01 was a Thursday (Monday = 0)
+    weekdays = (days.astype(np.int64) + 3) % 7
+    return np.bincount(weekdays, minlength=7)
+
+
+def occupancy_heatmap(start_date, end_date, group_by='venue', venue_ids=None):
+    """
+    Weekday x hour occupancy of venues or buildings over a date range.
+
+    Args:
+        start_date (date): First day
+        end_date (date): Last day (inclusive)
+        group_by (str): 'venue' or 'building'
+        venue_ids (list, optional): Limit to these venues
+
+    Returns:
+        list: One dict per venue/building with 'minutes' (booked minutes)
+              and 'occupancy' (share of available venue-hours) as 7 x 24
+              lists, Monday first
+    """
+    venues = Venue.objects.order_by('name')
+    if venue_ids:
+        venues = venues.filter(id__in=venue_ids)
+    venues = list(venues.values_list('id', 'name', 'building'))
+    if not venues:
+        return []
+
+    # Map venue IDs to output groups through a lookup array
+    if group_by == 'building':
+        labels = sorted({building for _, _, building in venues})
+        groups = [{'building': label} for label in labels]
+        group_of = {venue_id: labels.index(building) for venue_id, _, building in venues}
+    else:
+        groups = [{'id': venue_id, 'name': name, 'building': building} for venue_id, name, building in venues]
+        group_of = {venue_id: index for index, (venue_id, _, _) in enumerate(venues)}
+    lookup = np.full(max(group_of) + 1, -1, dtype=np.int64)
+    lookup[list(group_of)] = list(group_of.values())
+    venues_per_group = np.bincount(list(group_of.values()), minlength=len(groups))
+
+    rows = Booking.objects.filter(
+        venue_id__in=list(group_of),
+        date__gte=start_date,
+        date__lte=end_date,
+        status__in=USED_STATUSES
+    ).annotate(
+        iso_weekday=ExtractIsoWeekDay('date'),
+        start_minute=ExtractHour('start_time') * 60 + ExtractMinute('start_time'),
+        end_minute=ExtractHour('end_time') * 60 + ExtractMinute('end_time')
+    ).values_list('venue_id', 'iso_weekday', 'start_minute', 'end_minute')
+
+    minutes = np.zeros((len(groups), 7, 24), dtype=np.int64)
+    iterator = rows.iterator(chunk_size=CHUNK_ROWS)
+    while True:
+        chunk = np.array(list(islice(iterator, CHUNK_ROWS)), dtype=np.int64).reshape(-1, 4)
+        if not len(chunk):
+            break
+        overlap = hourly_overlap(chunk[:, 2], chunk[:, 3])
+        np.add.at(minutes, (lookup[chunk[:, 0]], chunk[:, 1] - 1), overlap)
+
+    # Available minutes per cell: 60 per venue per occurrence of the weekday
+    available = venues_per_group[:, None, None] * weekday_counts(start_date, end_date)[None, :, None] * 60
+    occupancy = np.divide(minutes, available, out=np.zeros(minutes.shape), where=available > 0)
+
+    return [
+        {
+            **group,
+            'venue_count': int(venues_per_group[index]),
+            'minutes': minutes[index].tolist(),
+            'occupancy': np.round(occupancy[index], 4).tolist(),
+        }
+        for index, group in enumerate(groups)
+    ]
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class BookingSystemConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'booking_system'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .overlap_guard import recreate_overlap_guard
+        post_migrate.connect(recreate_overlap_guard, sender=self)
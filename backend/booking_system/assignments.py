@@ -0,0 +1,69 @@
+"""
+Cached hall admin venue assignments.
+
+Permission and scoping checks ask which venues a hall admin manages on
+almost every request. The answer is kept in the cache as a frozenset of
+venue IDs per user and dropped by the VenueAdmin signals in
+``booking_system.signals`` whenever an assignment is saved or deleted.
+
+The answer gates authorization, so it is only cached when the cache is
+shared by all processes (a per-process cache would keep a revoked
+assignment alive in the others) and only for VENUE_ADMIN_CACHE_TIMEOUT
+seconds, which bounds staleness after writes that skip the signals
+(queryset update/delete, other services).
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from utils.cache_utils import cache_is_shared
+from .models import VenueAdmin
+
+
+def _key(user_id):
+    return f'venue_admin:assignments:{user_id}'
+
+
+def _timeout():
+    return getattr(settings, 'VENUE_ADMIN_CACHE_TIMEOUT', 60)
+
+
+def get_assigned_venue_ids(user):
+    """
+    Get the IDs of the venues a hall admin is assigned to.
+
+    Args:
+        user: User object or user ID
+
+    Returns:
+        frozenset: Venue IDs (empty for users without assignments)
+    """
+    user_id = getattr(user, 'pk', user)
+    if not cache_is_shared():
+        return _load(user_id)
+    venue_ids = cache.get(_key(user_id))
+    if venue_ids is None:
+        venue_ids = _load(user_id)
+        cache.set(_key(user_id), venue_ids, _timeout())
+    return venue_ids
+
+
+def _load(user_id):
+    return frozenset(
+        VenueAdmin.objects.filter(user_id=user_id).values_list('venue_id', flat=True)
+    )
+
+
+def is_assigned(user, venue):
+    """
+    Check whether a user is hall admin of a venue.
+
+    Args:
+        user: User object or user ID
+        venue: Venue object or venue ID
+    """
+    return getattr(venue, 'pk', venue) in get_assigned_venue_ids(user)
+
+
+def invalidate_assignments(user_id):
+    """Drop the cached assignments of a user"""
+    cache.delete(_key(user_id))
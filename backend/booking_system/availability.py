@@ -0,0 +1,153 @@
+"""
+Availability helpers for the booking system.
+Builds free/busy views from confirmed booking intervals.
+"""
+from collections import defaultdict
+from datetime import time, timedelta
+
+from .models import Booking
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def time_to_seconds(value):
+    """Convert a time object to seconds since midnight"""
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def date_range(start_date, end_date):
+    """Yield every date from start_date to end_date (inclusive)"""
+    current = start_date
+    while current <= end_date:
+        yield current
+        current += timedelta(days=1)
+
+
+def confirmed_intervals(venue_ids, start_date, end_date):
+    """
+    Load confirmed booking intervals for several venues in one query.
+
+    Args:
+        venue_ids (iterable): Venue IDs to include
+        start_date (date): First day of the range
+        end_date (date): Last day of the range (inclusive)
+
+    Returns:
+        dict: {(venue_id, date): [(start_time, end_time), ...]}
+    """
+    rows = Booking.objects.filter(
+        venue_id__in=list(venue_ids),
+        date__gte=start_date,
+        date__lte=end_date,
+        status='confirmed'
+    ).values_list('venue_id', 'date', 'start_time', 'end_time')
+
+    intervals = defaultdict(list)
+    for venue_id, booking_date, start_time, end_time in rows:
+        intervals[(venue_id, booking_date)].append((start_time, end_time))
+    return intervals
+
+
+def busy_bitmap(intervals, slot_minutes):
+    """
+    Build a free/busy bitmap for one day.
+
+    Args:
+        intervals (list): (start_time, end_time) tuples of confirmed bookings
+        slot_minutes (int): Slot granularity, must divide a day evenly
+
+    Returns:
+        str: One character per slot, '1' if any booking overlaps it, else '0'
+    """
+    slot_seconds = slot_minutes * 60
+    cells = bytearray(b'0' * (SECONDS_PER_DAY // slot_seconds))
+    for start_time, end_time in intervals:
+        first = time_to_seconds(start_time) // slot_seconds
+        last = (time_to_seconds(end_time) - 1) // slot_seconds
+        if last >= first:
+            cells[first:last + 1] = b'1' * (last - first + 1)
+    return cells.decode('ascii')
+
+
+def seconds_to_time(value):
+    """Convert seconds since midnight back to a time object"""
+    return time(value // 3600, (value % 3600) // 60, value % 60)
+
+
+def free_intervals(busy, window_start, window_end):
+    """
+    Complement of busy intervals within a window.
+
+    Args:
+        busy (list): (start_time, end_time) tuples, in any order, may overlap
+        window_start (int): Window start in seconds since midnight
+        window_end (int): Window end in seconds since midnight
+
+    Returns:
+        list: (start_seconds, end_seconds) tuples of free gaps, in order
+    """
+    gaps = []
+    cursor = window_start
+    for start_time, end_time in sorted(busy):
+        start = time_to_seconds(start_time)
+        end = time_to_seconds(end_time)
+        if end <= cursor:
+            continue
+        if start >= window_end:
+            break
+        if start > cursor:
+            gaps.append((cursor, start))
+        cursor = max(cursor, end)
+    if cursor < window_end:
+        gaps.append((cursor, window_end))
+    return gaps
+
+
+def find_free_slots(venues, start_date, end_date, duration_minutes,
+                    day_start, day_end, limit, now=None):
+    """
+    Find the earliest free intervals long enough for an event.
+
+    Works from the complement of confirmed bookings, so each venue/day costs
+    a walk over its bookings rather than a probe per candidate slot.
+
+    Args:
+        venues (list): Candidate Venue objects
+        start_date (date): First day to search
+        end_date (date): Last day to search (inclusive)
+        duration_minutes (int): Required event length
+        day_start (time): Earliest start time on any day
+        day_end (time): Latest end time on any day
+        limit (int): Maximum number of results
+        now (datetime, optional): Local current time; earlier slots today are skipped
+
+    Returns:
+        list: (date, free_from_seconds, free_until_seconds, venue) tuples,
+              earliest first
+    """
+    duration = duration_minutes * 60
+    window_start = time_to_seconds(day_start)
+    window_end = time_to_seconds(day_end)
+    intervals = confirmed_intervals([venue.id for venue in venues], start_date, end_date)
+
+    results = []
+    for day in date_range(start_date, end_date):
+        day_window_start = window_start
+        if now is not None and day == now.date():
+            # Round the current time up to the next whole minute
+            current = time_to_seconds(now.time()) + 59
+            day_window_start = max(window_start, current - current % 60)
+
+        day_results = []
+        for venue in venues:
+            busy = intervals.get((venue.id, day), [])
+            for gap_start, gap_end in free_intervals(busy, day_window_start, window_end):
+                if gap_end - gap_start >= duration:
+                    day_results.append((day, gap_start, gap_end, venue))
+
+        day_results.sort(key=lambda result: (result[1], result[3].name))
+        results.extend(day_results)
+        if len(results) >= limit:
+            break
+
+    return results[:limit]
@@ -0,0 +1,156 @@
+"""
+Versioned cache of day-level availability.
+
+Each entry holds the confirmed bookings of one venue on one day and is keyed
+by venue, date and the venue's current version number. Signals bump the
+version whenever a booking of the venue changes (or the venue itself is
+saved), which makes every cached day of that venue unreachable at once
+without having to find and delete the individual keys.
+
+Version bumps only reach other processes through a shared cache, so with a
+process-local cache (see utils.cache_utils) every day is read from the
+database.
+"""
+import time as time_module
+
+from django.conf import settings
+from django.core.cache import cache
+
+from utils.cache_utils import cache_is_shared
+from .models import Booking
+
+
+def _version_key(venue_id):
+    return f'availability:venue:{venue_id}:version'
+
+
+def _day_key(venue_id, booking_date, version):
+    return f'availability:day:{venue_id}:{booking_date.isoformat()}:v{version}'
+
+
+def _timeout():
+    return getattr(settings, 'AVAILABILITY_CACHE_TIMEOUT', 60 * 60)
+
+
+def _initial_version():
+    # Never restart from 1 after an eviction: entries written under an
+    # earlier version could still be alive and would be served as current.
+    return int(time_module.time() * 1000)
+
+
+def get_venue_versions(venue_ids):
+    """
+    Get the current version of several venues.
+
+    Args:
+        venue_ids (iterable): Venue IDs
+
+    Returns:
+        dict: {venue_id: version}
+    """
+    venue_ids = list(venue_ids)
+    found = cache.get_many([_version_key(venue_id) for venue_id in venue_ids])
+    versions = {}
+    for venue_id in venue_ids:
+        key = _version_key(venue_id)
+        if key in found:
+            versions[venue_id] = found[key]
+        else:
+            cache.add(key, _initial_version(), None)
+            versions[venue_id] = cache.get(key)
+    return versions
+
+
+def get_venue_version(venue_id):
+    """Get the current version of one venue"""
+    return get_venue_versions([venue_id])[venue_id]
+
+
+def bump_venue_version(venue_id):
+    """
+    Invalidate every cached day of a venue.
+
+    Returns:
+        int: The new version
+    """
+    key = _version_key(venue_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _initial_version()
+        cache.set(key, version, None)
+        return version
+
+
+def get_days(venue_ids, dates):
+    """
+    Get the confirmed bookings for several venues and days.
+
+    Cached days are served from the cache; all missing days are loaded with
+    a single query and written back. Without a shared cache every day is
+    loaded from the database.
+
+    Args:
+        venue_ids (iterable): Venue IDs
+        dates (iterable): Dates
+
+    Returns:
+        dict: {(venue_id, date): [(booking_id, start_time, end_time,
+               event_name, department), ...]} sorted by start time
+    """
+    venue_ids = list(venue_ids)
+    dates = list(dates)
+    if not venue_ids or not dates:
+        return {}
+    if not cache_is_shared():
+        return _load_days([(venue_id, booking_date) for venue_id in venue_ids for booking_date in dates])
+
+    versions = get_venue_versions(venue_ids)
+    keys = {
+        (venue_id, booking_date): _day_key(venue_id, booking_date, versions[venue_id])
+        for venue_id in venue_ids
+        for booking_date in dates
+    }
+    found = cache.get_many(keys.values())
+
+    days = {}
+    missing = []
+    for day, key in keys.items():
+        if key in found:
+            days[day] = found[key]
+        else:
+            missing.append(day)
+
+    if missing:
+        loaded = _load_days(missing)
+        cache.set_many({keys[day]: bookings for day, bookings in loaded.items()}, _timeout())
+        days.update(loaded)
+
+    return days
+
+
+def _load_days(days):
+    """Load the confirmed bookings of (venue_id, date) pairs with a single query"""
+    loaded = {day: [] for day in days}
+    rows = Booking.objects.filter(
+        venue_id__in={venue_id for venue_id, _ in days},
+        date__in={booking_date for _, booking_date in days},
+        status='confirmed'
+    ).order_by('start_time', 'id').values_list(
+        'venue_id', 'date', 'id', 'start_time', 'end_time',
+        'event_name', 'user__department'
+    )
+    for venue_id, booking_date, *booking in rows:
+        if (venue_id, booking_date) in loaded:
+            loaded[(venue_id, booking_date)].append(tuple(booking))
+    return loaded
+
+
+def get_day(venue_id, booking_date):
+    """Get the confirmed bookings of one venue on one day"""
+    return get_days([venue_id], [booking_date])[(venue_id, booking_date)]
+
+
+def invalidate_day(venue_id, booking_date):
+    """Drop the cached entry of one venue/day at the current version"""
+    cache.delete(_day_key(venue_id, booking_date, get_venue_version(venue_id)))
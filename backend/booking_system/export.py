@@ -0,0 +1,67 @@
+"""
+Streaming booking exports.
+Rows are produced one at a time from a server-side iterator so memory use
+does not grow with the size of the export.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+EXPORT_CHUNK_SIZE = 2000
+
+# (column name, function producing the value from a booking)
+EXPORT_COLUMNS = [
+    ('id', lambda booking: booking.id),
+    ('venue_id', lambda booking: booking.venue_id),
+    ('venue_name', lambda booking: booking.venue.name),
+    ('event_name', lambda booking: booking.event_name),
+    ('date', lambda booking: booking.date),
+    ('start_time', lambda booking: booking.start_time),
+    ('end_time', lambda booking: booking.end_time),
+    ('status', lambda booking: booking.status),
+    ('requester_name', lambda booking: booking.user.get_full_name()),
+    ('requester_email', lambda booking: booking.user.email),
+    ('department', lambda booking: booking.user.department),
+    ('expected_attendees', lambda booking: booking.expected_attendees),
+    ('contact_number', lambda booking: booking.contact_number),
+    ('confirmed', lambda booking: booking.confirmed),
+    ('cancellation_reason', lambda booking: booking.cancellation_reason),
+    ('cancelled_at', lambda booking: booking.cancelled_at),
+    ('created_at', lambda booking: booking.created_at),
+]
+
+
+class _Echo:
+    """File-like object whose write() returns the data instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def _export_rows(bookings, chunk_size):
+    for booking in bookings.select_related('venue', 'user').iterator(chunk_size=chunk_size):
+        yield [value(booking) for _, value in EXPORT_COLUMNS]
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def stream_csv(bookings, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the bookings as CSV lines, header first"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in EXPORT_COLUMNS])
+    for row in _export_rows(bookings, chunk_size):
+        yield writer.writerow([_csv_value(value) for value in row])
+
+
+def stream_ndjson(bookings, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the bookings as newline-delimited JSON objects"""
+    names = [name for name, _ in EXPORT_COLUMNS]
+    for row in _export_rows(bookings, chunk_size):
+        yield json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder) + '\n'
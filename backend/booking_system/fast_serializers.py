@@ -0,0 +1,38 @@
+"""
+Fast read-only serializers for booking system list endpoints.
+Each mirrors a DRF serializer from booking_system.serializers (see utils.fast_serializers).
+"""
+from django.utils import timezone
+
+from utils.fast_serializers import FastSerializer, full_name
+from .serializers import BookingListSerializer, NotificationSerializer, format_time_ago
+
+USER_NAME = (('user__first_name', 'user__last_name'), full_name)
+
+
+class BookingListFastSerializer(FastSerializer):
+    """Fast equivalent of BookingListSerializer"""
+
+    serializer_class = BookingListSerializer
+    computed = {
+        'user_name': USER_NAME,
+        'requester_name': USER_NAME,
+    }
+
+
+class NotificationFastSerializer(FastSerializer):
+    """Fast equivalent of NotificationSerializer"""
+
+    serializer_class = NotificationSerializer
+    computed = {
+        'user_name': USER_NAME,
+        'time_ago': (('created_at',), 'get_time_ago'),
+    }
+
+    def to_representation_rows(self, rows):
+        # One reference time per response instead of one per row
+        self.now = timezone.now()
+        return super().to_representation_rows(rows)
+
+    def get_time_ago(self, created_at):
+        return format_time_ago(created_at, self.now)
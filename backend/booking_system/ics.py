@@ -0,0 +1,246 @@
+"""
+iCalendar (RFC 5545) feeds of bookings.
+
+Each booking's VEVENT block is cached under a key that includes the
+booking's and the venue's updated_at, so a feed is assembled from cached
+blocks and only changed bookings are rendered again. Feeds carry an
+ETag over the rendered body, which changes with window slides, deletions
+and reassignments too, and answer If-None-Match with 304. For clients that
+only send If-Modified-Since they also carry Last-Modified: the latest
+updated_at of the feed's bookings and venue, or the start of the window
+once it has slid past that.
+"""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+import hashlib
+import json
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.renderers import BaseRenderer
+from rest_framework.response import Response
+
+ICS_TOKEN_SALT = 'booking_system.ics.feed'
+
+# Bookings whose status is not listed are left out of feeds
+EVENT_STATUS = {
+    'confirmed': 'CONFIRMED',
+    'completed': 'CONFIRMED',
+    'cancelled': 'CANCELLED',
+}
+
+FEED_FIELDS = (
+    'id', 'event_name', 'date', 'start_time', 'end_time', 'status',
+    'created_at', 'updated_at', 'venue__name', 'venue__location',
+    'venue__updated_at', 'user__department'
+)
+
+
+class ICalendarRenderer(BaseRenderer):
+    """Render text/calendar bodies (errors are rendered as plain text)"""
+
+    media_type = 'text/calendar'
+    format = 'ics'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        if isinstance(data, dict) and 'detail' in data:
+            return str(data['detail']).encode(self.charset)
+        return json.dumps(data).encode(self.charset)
+
+
+def _feed_signer(user):
+    """
+    Signer of a user's feed tokens.
+    The salt includes the password hash, so changing the password revokes
+    every feed URL handed out before (like password reset links).
+    """
+    return signing.TimestampSigner(salt=f'{ICS_TOKEN_SALT}:{user.pk}:{user.password}')
+
+
+def make_feed_token(user):
+    """Signed, expiring token identifying a user's personal feed"""
+    return _feed_signer(user).sign(str(user.pk))
+
+
+def read_feed_token(token):
+    """
+    Resolve a feed token to its user.
+
+    Returns:
+        User: Active user the token was issued to, or None if the token is
+        malformed, expired or revoked
+    """
+    from accounts.models import User
+
+    user_id = token.split(signing.Signer().sep, 1)[0]
+    if not user_id.isdigit():
+        return None
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is None:
+        return None
+    try:
+        _feed_signer(user).unsign(token, max_age=getattr(settings, 'ICS_FEED_TOKEN_MAX_AGE', 365 * 24 * 60 * 60))
+    except signing.BadSignature:
+        return None
+    return user
+
+
+def feed_window():
+    """Date range included in feeds"""
+    today = timezone.localdate()
+    return (
+        today - timedelta(days=getattr(settings, 'ICS_FEED_PAST_DAYS', 30)),
+        today + timedelta(days=getattr(settings, 'ICS_FEED_FUTURE_DAYS', 180))
+    )
+
+
+def _escape(value):
+    return (
+        str(value).replace('\\', '\\\\').replace(';', '\\;')
+        .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _fold(line):
+    """Fold a content line to 75 octets as RFC 5545 requires"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    while len(encoded) > 75:
+        cut = 75 if not parts else 74
+        # Never split a multi-byte character
+        while cut > 0 and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+    parts.append(encoded.decode('utf-8'))
+    return '\r\n '.join(parts)
+
+
+def _utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _local_utc(booking_date, booking_time):
+    return _utc(timezone.make_aware(datetime.combine(booking_date, booking_time)))
+
+
+def _vevent_key(row):
+    return 'ics:vevent:{}:{}:{}'.format(
+        row['id'], row['updated_at'].timestamp(), row['venue__updated_at'].timestamp()
+    )
+
+
+def render_vevent(row):
+    """Render one booking (a values() row with FEED_FIELDS) as a VEVENT block"""
+    host = getattr(settings, 'ICS_UID_DOMAIN', 'bookit')
+    lines = [
+        'BEGIN:VEVENT',
+        f"UID:booking-{row['id']}@{host}",
+        f"DTSTAMP:{_utc(row['updated_at'])}",
+        f"CREATED:{_utc(row['created_at'])}",
+        f"LAST-MODIFIED:{_utc(row['updated_at'])}",
+        f"DTSTART:{_local_utc(row['date'], row['start_time'])}",
+        f"DTEND:{_local_utc(row['date'], row['end_time'])}",
+        f"SUMMARY:{_escape(row['event_name'] or 'Event')}",
+        f"LOCATION:{_escape(row['venue__name'])} ({_escape(row['venue__location'])})",
+        f"DESCRIPTION:{_escape('Department: ' + (row['user__department'] or 'N/A'))}",
+        f"STATUS:{EVENT_STATUS[row['status']]}",
+        'END:VEVENT',
+    ]
+    return '\r\n'.join(_fold(line) for line in lines)
+
+
+def render_calendar(name, bookings):
+    """
+    Build an iCalendar document from a booking queryset.
+
+    Cached VEVENT blocks are reused; only bookings changed since they were
+    cached are rendered and written back.
+    """
+    rows = list(bookings.filter(status__in=EVENT_STATUS).order_by('date', 'start_time', 'id').values(*FEED_FIELDS))
+    keys = [_vevent_key(row) for row in rows]
+    cached = cache.get_many(keys)
+
+    events = []
+    missing = {}
+    for row, key in zip(rows, keys):
+        event = cached.get(key)
+        if event is None:
+            event = missing[key] = render_vevent(row)
+        events.append(event)
+    if missing:
+        cache.set_many(missing, getattr(settings, 'ICS_EVENT_CACHE_TIMEOUT', 7 * 24 * 60 * 60))
+
+    header = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//BookIT//Venue Bookings//EN',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        _fold(f'X-WR-CALNAME:{_escape(name)}'),
+    ]
+    return '\r\n'.join(header + events + ['END:VCALENDAR']) + '\r\n'
+
+
+def calendar_etag(body):
+    """Strong ETag of a rendered calendar"""
+    return quote_etag(hashlib.md5(body.encode('utf-8')).hexdigest())
+
+
+def last_modified(bookings, *extra):
+    """
+    Latest updated_at over a booking queryset (any status), extra datetimes
+    and the start of the feed window
+    """
+    latest = bookings.aggregate(latest=Max('updated_at'))['latest']
+    window_start = timezone.make_aware(datetime.combine(feed_window()[0], time.min))
+    return max(value for value in (latest, window_start, *extra) if value is not None)
+
+
+def calendar_response(request, name, bookings, *extra_modified, private=False):
+    """
+    Conditional text/calendar response for a booking queryset.
+
+    If-None-Match is checked against the ETag; requests without it are
+    checked against Last-Modified with If-Modified-Since (RFC 7232 order).
+
+    Args:
+        request: Current request
+        name (str): Calendar name shown by clients
+        bookings: Booking queryset of the feed (any status)
+        *extra_modified: Other datetimes the feed depends on (e.g. venue.updated_at)
+        private (bool): Personal feed; not to be stored by shared caches
+    """
+    body = render_calendar(name, bookings)
+    etag = calendar_etag(body)
+    modified = last_modified(bookings, *extra_modified)
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        not_modified = etag in parse_etags(if_none_match)
+    else:
+        since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        not_modified = since is not None and int(modified.timestamp()) <= since
+    if not_modified:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(body, content_type='text/calendar; charset=utf-8')
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(modified.timestamp())
+
+    if private:
+        patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+    else:
+        patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+    return response
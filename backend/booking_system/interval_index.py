@@ -0,0 +1,225 @@
+"""
+In-memory interval index for venue/date conflict detection.
+
+Confirmed bookings of each (venue, date) pair are kept as a list of time
+intervals sorted by start time, together with a running maximum of end
+times. That lets an overlap question be answered with a single binary
+search instead of a database query.
+
+Days are loaded lazily through the versioned availability cache and kept
+current by the booking signals in ``booking_system.signals``. A day is
+reloaded when its venue's cache version moves on (a write in any process)
+or after ``BOOKING_INTERVAL_INDEX_TTL`` seconds, whichever comes first.
+Versions are only seen across processes through a shared cache; without
+one, days are loaded from the database on every lookup and not kept.
+"""
+from bisect import bisect_left
+from collections import OrderedDict
+import threading
+import time as time_module
+
+from django.conf import settings
+
+from utils.cache_utils import cache_is_shared
+
+
+class DayIntervals:
+    """Sorted confirmed intervals for a single venue on a single day"""
+
+    __slots__ = ('starts', 'ends', 'ids', 'max_ends', 'loaded_at', 'version')
+
+    def __init__(self, rows, loaded_at, version=None):
+        """
+        Args:
+            rows: Iterable of (booking_id, start_time, end_time) tuples
+            loaded_at (float): Monotonic timestamp of the load
+            version (int, optional): Availability cache version of the venue
+        """
+        rows = sorted(rows, key=lambda row: (row[1], row[2]))
+        self.ids = [row[0] for row in rows]
+        self.starts = [row[1] for row in rows]
+        self.ends = [row[2] for row in rows]
+        self.max_ends = []
+        self.loaded_at = loaded_at
+        self.version = version
+        self._rebuild_max_ends(0)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _rebuild_max_ends(self, position):
+        """Recompute the running maximum of end times from position onwards"""
+        del self.max_ends[position:]
+        current = self.max_ends[-1] if self.max_ends else None
+        for end in self.ends[position:]:
+            if current is None or end > current:
+                current = end
+            self.max_ends.append(current)
+
+    def add(self, booking_id, start_time, end_time):
+        """Insert an interval, replacing any previous entry for the booking"""
+        self.remove(booking_id)
+        position = bisect_left(self.starts, start_time)
+        self.starts.insert(position, start_time)
+        self.ends.insert(position, end_time)
+        self.ids.insert(position, booking_id)
+        self._rebuild_max_ends(position)
+
+    def remove(self, booking_id):
+        """Remove the interval of a booking. Returns True if it was present."""
+        try:
+            position = self.ids.index(booking_id)
+        except ValueError:
+            return False
+        del self.starts[position]
+        del self.ends[position]
+        del self.ids[position]
+        self._rebuild_max_ends(position)
+        return True
+
+    def overlaps(self, start_time, end_time):
+        """Check whether [start_time, end_time) overlaps any stored interval"""
+        # Every interval that starts before end_time is a candidate; the
+        # latest end among them decides whether one reaches past start_time.
+        position = bisect_left(self.starts, end_time)
+        return position > 0 and self.max_ends[position - 1] > start_time
+
+    def conflicting_ids(self, start_time, end_time):
+        """Return the booking IDs whose intervals overlap the given slot"""
+        position = bisect_left(self.starts, end_time)
+        return [
+            self.ids[i] for i in range(position)
+            if self.ends[i] > start_time
+        ]
+
+
+class BookingIntervalIndex:
+    """
+    Process-local index of confirmed booking intervals per (venue, date).
+    """
+
+    def __init__(self, ttl=None, max_days=None):
+        self._ttl = ttl
+        self._max_days = max_days
+        self._days = OrderedDict()
+        self._locations = {}
+        self._lock = threading.RLock()
+
+    @property
+    def ttl(self):
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'BOOKING_INTERVAL_INDEX_TTL', 30)
+
+    @property
+    def max_days(self):
+        if self._max_days is not None:
+            return self._max_days
+        return getattr(settings, 'BOOKING_INTERVAL_INDEX_MAX_DAYS', 2048)
+
+    def _load(self, venue_id, booking_date, version):
+        """Fetch the confirmed intervals of one venue/day via the availability cache"""
+        from . import availability_cache
+        rows = [
+            (booking_id, start_time, end_time)
+            for booking_id, start_time, end_time, *_ in availability_cache.get_day(venue_id, booking_date)
+        ]
+        return DayIntervals(rows, time_module.monotonic(), version)
+
+    def _get(self, venue_id, booking_date):
+        from . import availability_cache
+        if not cache_is_shared():
+            # Writes of other processes would go unnoticed
+            return self._load(venue_id, booking_date, None)
+
+        key = (venue_id, booking_date)
+        now = time_module.monotonic()
+        version = availability_cache.get_venue_version(venue_id)
+        with self._lock:
+            day = self._days.get(key)
+            if day is not None and day.version == version and now - day.loaded_at <= self.ttl:
+                self._days.move_to_end(key)
+                return day
+
+        day = self._load(venue_id, booking_date, version)
+
+        with self._lock:
+            self._forget_day(key)
+            self._days[key] = day
+            for booking_id in day.ids:
+                self._locations[booking_id] = key
+            while len(self._days) > self.max_days:
+                self._forget_day(next(iter(self._days)))
+        return day
+
+    def _forget_day(self, key):
+        day = self._days.pop(key, None)
+        if day is not None:
+            for booking_id in day.ids:
+                if self._locations.get(booking_id) == key:
+                    del self._locations[booking_id]
+
+    def has_conflict(self, venue_id, booking_date, start_time, end_time):
+        """Check whether a slot overlaps any confirmed booking"""
+        day = self._get(venue_id, booking_date)
+        with self._lock:
+            return day.overlaps(start_time, end_time)
+
+    def conflicting_ids(self, venue_id, booking_date, start_time, end_time):
+        """Return IDs of confirmed bookings overlapping a slot"""
+        day = self._get(venue_id, booking_date)
+        with self._lock:
+            return day.conflicting_ids(start_time, end_time)
+
+    def advance_version(self, venue_id, old_version, new_version):
+        """
+        Carry loaded days of a venue over to a new cache version.
+
+        Only valid when this process has applied every change between the
+        two versions itself (i.e. the bump came from its own write).
+        """
+        with self._lock:
+            for (day_venue_id, _), day in self._days.items():
+                if day_venue_id == venue_id and day.version == old_version:
+                    day.version = new_version
+
+    def record(self, booking):
+        """Bring the index in line with a saved booking"""
+        with self._lock:
+            self._discard(booking.id)
+            if booking.status != 'confirmed':
+                return
+            key = (booking.venue_id, booking.date)
+            day = self._days.get(key)
+            # Days that are not loaded yet will read the booking from the
+            # database on first use.
+            if day is not None:
+                day.add(booking.id, booking.start_time, booking.end_time)
+                self._locations[booking.id] = key
+
+    def discard(self, booking_id):
+        """Remove a booking from the index"""
+        with self._lock:
+            self._discard(booking_id)
+
+    def _discard(self, booking_id):
+        key = self._locations.pop(booking_id, None)
+        if key is not None and key in self._days:
+            self._days[key].remove(booking_id)
+
+    def invalidate(self, venue_id, booking_date):
+        """Drop a venue/day (here and in the availability cache) so that it is reloaded from the database"""
+        from . import availability_cache
+        with self._lock:
+            self._forget_day((venue_id, booking_date))
+        availability_cache.invalidate_day(venue_id, booking_date)
+
+    def clear(self):
+        """Drop every loaded day"""
+        with self._lock:
+            self._days.clear()
+            self._locations.clear()
+
+
+# Shared index used by serializers and views
+booking_index = BookingIntervalIndex()
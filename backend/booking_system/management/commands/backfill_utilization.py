@@ -0,0 +1,35 @@
+"""
+Rebuild the daily venue utilization rollups from booking history.
+Run this with: python manage.py backfill_utilization [--start-date YYYY-MM-DD] [--end-date YYYY-MM-DD] [--venue ID ...]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from booking_system.utilization import rebuild_utilization
+
+
+class Command(BaseCommand):
+    help = 'Rebuild VenueDailyUtilization rows from the bookings table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-date', help='First day to rebuild (default: earliest booking)')
+        parser.add_argument('--end-date', help='Last day to rebuild (default: latest booking)')
+        parser.add_argument('--venue', type=int, action='append', dest='venue_ids',
+                            help='Venue ID to rebuild (repeatable, default: all venues)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        dates = {}
+        for option in ('start_date', 'end_date'):
+            value = options[option]
+            dates[option] = parse_date(value) if value else None
+            if value and dates[option] is None:
+                raise CommandError(f"Invalid {option.replace('_', '-')}: {value} (use YYYY-MM-DD)")
+
+        written = rebuild_utilization(
+            start_date=dates['start_date'],
+            end_date=dates['end_date'],
+            venue_ids=options['venue_ids'],
+            batch_size=options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt utilization for {written} venue/day(s)'))
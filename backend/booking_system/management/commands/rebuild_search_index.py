@@ -0,0 +1,23 @@
+"""
+Rebuild the full-text booking search index from the bookings table.
+Run this with: python manage.py rebuild_search_index [--batch-size N]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from booking_system.search import rebuild_search_index, search_supported
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the booking_search full-text index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not search_supported():
+            raise CommandError('This database has no full-text booking index (SQLite or PostgreSQL required)')
+
+        with transaction.atomic():
+            indexed = rebuild_search_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} booking(s)'))
@@ -0,0 +1,94 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:01
+
+from django.db import migrations, models
+
+
+# Rejects any confirmed booking that overlaps another confirmed booking of
+# the same venue on the same day. Cancelled/completed rows are ignored.
+# Note: SQLite drops triggers when Django rebuilds the table; they are
+# recreated after every migrate by booking_system.overlap_guard.
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    """
+    ALTER TABLE bookings ADD CONSTRAINT bookings_no_overlap
+    EXCLUDE USING gist (
+        venue_id WITH =,
+        tsrange("date" + start_time, "date" + end_time) WITH &&
+    ) WHERE (status = 'confirmed')
+    """,
+]
+
+POSTGRES_REVERSE = [
+    "ALTER TABLE bookings DROP CONSTRAINT IF EXISTS bookings_no_overlap",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE TRIGGER bookings_no_overlap_insert
+    BEFORE INSERT ON bookings
+    WHEN NEW.status = 'confirmed'
+    BEGIN
+        SELECT RAISE(ABORT, 'bookings_no_overlap')
+        WHERE EXISTS (
+            SELECT 1 FROM bookings
+            WHERE venue_id = NEW.venue_id
+              AND "date" = NEW."date"
+              AND status = 'confirmed'
+              AND start_time < NEW.end_time
+              AND end_time > NEW.start_time
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER bookings_no_overlap_update
+    BEFORE UPDATE OF venue_id, "date", start_time, end_time, status ON bookings
+    WHEN NEW.status = 'confirmed'
+    BEGIN
+        SELECT RAISE(ABORT, 'bookings_no_overlap')
+        WHERE EXISTS (
+            SELECT 1 FROM bookings
+            WHERE id != NEW.id
+              AND venue_id = NEW.venue_id
+              AND "date" = NEW."date"
+              AND status = 'confirmed'
+              AND start_time < NEW.end_time
+              AND end_time > NEW.start_time
+        );
+    END
+    """,
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS bookings_no_overlap_insert",
+    "DROP TRIGGER IF EXISTS bookings_no_overlap_update",
+]
+
+
+def run_vendor_sql(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_system', '0003_waitlist_booking_auto_cancel_reason_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='booking',
+            name='unique_venue_datetime',
+        ),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'confirmed')), fields=('venue', 'date', 'start_time', 'end_time'), name='unique_venue_datetime'),
+        ),
+        migrations.RunPython(
+            run_vendor_sql({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            run_vendor_sql({'postgresql': POSTGRES_REVERSE, 'sqlite': SQLITE_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:02
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venue_management', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('booking_system', '0004_booking_no_overlap'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_name', models.CharField(help_text='Name/title of the event', max_length=200)),
+                ('event_description', models.TextField(blank=True, help_text='Purpose/details of the event', null=True)),
+                ('expected_attendees', models.IntegerField(help_text='Expected number of attendees', validators=[django.core.validators.MinValueValidator(1)])),
+                ('contact_number', models.CharField(help_text='Contact number for the event', max_length=20)),
+                ('special_requirements', models.TextField(blank=True, help_text='Any special needs/requirements', null=True)),
+                ('start_date', models.DateField(help_text='Date of the first occurrence')),
+                ('start_time', models.TimeField(help_text='Event start time')),
+                ('end_time', models.TimeField(help_text='Event end time')),
+                ('recurrence', models.CharField(help_text='RRULE recurrence (e.g. FREQ=WEEKLY;INTERVAL=1;COUNT=12)', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(help_text='User who made the booking series', on_delete=django.db.models.deletion.PROTECT, related_name='booking_series', to=settings.AUTH_USER_MODEL)),
+                ('venue', models.ForeignKey(help_text='Venue being booked', on_delete=django.db.models.deletion.PROTECT, related_name='booking_series', to='venue_management.venue')),
+            ],
+            options={
+                'verbose_name': 'Booking Series',
+                'verbose_name_plural': 'Booking Series',
+                'db_table': 'booking_series',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='series',
+            field=models.ForeignKey(blank=True, help_text='Recurring series this booking belongs to (if any)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to='booking_system.bookingseries'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+CELL_SECONDS = 15 * 60
+
+
+def backfill_occupancy(apps, schema_editor):
+    """Build occupancy masks for existing confirmed bookings"""
+    Booking = apps.get_model('booking_system', 'Booking')
+    VenueDayOccupancy = apps.get_model('booking_system', 'VenueDayOccupancy')
+    
+    masks = {}
+    rows = Booking.objects.filter(status='confirmed').values_list(
+        'venue_id', 'date', 'start_time', 'end_time'
+    )
+    for venue_id, booking_date, start_time, end_time in rows.iterator():
+        first = (start_time.hour * 3600 + start_time.minute * 60 + start_time.second) // CELL_SECONDS
+        last = (end_time.hour * 3600 + end_time.minute * 60 + end_time.second - 1) // CELL_SECONDS
+        if last >= first:
+            key = (venue_id, booking_date)
+            masks[key] = masks.get(key, 0) | (((1 << (last - first + 1)) - 1) << first)
+    
+    VenueDayOccupancy.objects.bulk_create([
+        VenueDayOccupancy(venue_id=venue_id, date=booking_date, mask=format(mask, '024x'))
+        for (venue_id, booking_date), mask in masks.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venue_management', '0001_initial'),
+        ('booking_system', '0005_booking_series'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VenueDayOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Day')),
+                ('mask', models.CharField(default='000000000000000000000000', help_text='Occupied 15-minute cells as a hex bitmask (bit 0 = 00:00-00:15)', max_length=24)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('venue', models.ForeignKey(help_text='Venue', on_delete=django.db.models.deletion.CASCADE, related_name='occupancy_days', to='venue_management.venue')),
+            ],
+            options={
+                'verbose_name': 'Venue Day Occupancy',
+                'verbose_name_plural': 'Venue Day Occupancy',
+                'db_table': 'venue_day_occupancy',
+                'ordering': ['venue', 'date'],
+                'unique_together': {('venue', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_occupancy, migrations.RunPython.noop),
+    ]
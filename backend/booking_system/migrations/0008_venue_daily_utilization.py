@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venue_management', '0001_initial'),
+        ('booking_system', '0007_booking_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VenueDailyUtilization',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Day')),
+                ('booked_minutes', models.PositiveIntegerField(default=0, help_text='Minutes booked by confirmed/completed bookings')),
+                ('booking_count', models.PositiveIntegerField(default=0, help_text='Confirmed/completed bookings')),
+                ('cancelled_count', models.PositiveIntegerField(default=0, help_text='Cancelled bookings (including auto-cancelled)')),
+                ('auto_cancelled_count', models.PositiveIntegerField(default=0, help_text='Bookings auto-cancelled for not being confirmed')),
+                ('attendees', models.PositiveIntegerField(default=0, help_text='Expected attendees of confirmed/completed bookings')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('venue', models.ForeignKey(help_text='Venue', on_delete=django.db.models.deletion.CASCADE, related_name='daily_utilization', to='venue_management.venue')),
+            ],
+            options={
+                'verbose_name': 'Venue Daily Utilization',
+                'verbose_name_plural': 'Venue Daily Utilization',
+                'db_table': 'venue_daily_utilization',
+                'ordering': ['venue', 'date'],
+                'indexes': [models.Index(fields=['date'], name='venue_daily_date_7077c9_idx')],
+                'unique_together': {('venue', 'date')},
+            },
+        ),
+    ]
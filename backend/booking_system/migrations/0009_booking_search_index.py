@@ -0,0 +1,76 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:40
+
+from django.db import migrations
+
+
+# Full-text index of bookings (event name, description, requester, department).
+# The table is not a Django model: booking_system.search keeps it in sync from
+# the booking signals and queries it with raw SQL.
+# SQLite: FTS5 virtual table whose rowid is the booking id, with prefix
+# indexes for the short prefixes typed into search boxes.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE booking_search USING fts5(
+        event_name, event_description, requester, department,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    """
+    INSERT INTO booking_search (rowid, event_name, event_description, requester, department)
+    SELECT b.id, b.event_name, COALESCE(b.event_description, ''),
+           u.first_name || ' ' || u.last_name || ' ' || u.email, COALESCE(u.department, '')
+    FROM bookings b JOIN users u ON u.id = b.user_id
+    """,
+]
+
+SQLITE_REVERSE = [
+    "DROP TABLE IF EXISTS booking_search",
+]
+
+# PostgreSQL: weighted tsvector per booking with a GIN index
+# (A: event name, B: requester, C: department, D: description).
+POSTGRES_FORWARD = [
+    """
+    CREATE TABLE booking_search (
+        booking_id bigint PRIMARY KEY REFERENCES bookings (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+        document tsvector NOT NULL
+    )
+    """,
+    "CREATE INDEX booking_search_document_idx ON booking_search USING gin (document)",
+    """
+    INSERT INTO booking_search (booking_id, document)
+    SELECT b.id,
+           setweight(to_tsvector('simple', b.event_name), 'A')
+           || setweight(to_tsvector('simple', u.first_name || ' ' || u.last_name || ' ' || u.email), 'B')
+           || setweight(to_tsvector('simple', COALESCE(u.department, '')), 'C')
+           || setweight(to_tsvector('simple', COALESCE(b.event_description, '')), 'D')
+    FROM bookings b JOIN users u ON u.id = b.user_id
+    """,
+]
+
+POSTGRES_REVERSE = [
+    "DROP TABLE IF EXISTS booking_search",
+]
+
+
+def run_vendor_sql(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('booking_system', '0008_venue_daily_utilization'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_vendor_sql({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            run_vendor_sql({'postgresql': POSTGRES_REVERSE, 'sqlite': SQLITE_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:29
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('booking_system', '0009_booking_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationArchive',
+            fields=[
+                ('id', models.BigIntegerField(help_text='ID of the original notification', primary_key=True, serialize=False)),
+                ('notification_type', models.CharField(choices=[('booking_confirmed', 'Booking Confirmed'), ('booking_cancelled', 'Booking Cancelled'), ('booking_reminder', 'Booking Reminder'), ('new_booking', 'New Booking'), ('venue_assigned', 'Venue Assigned'), ('user_created', 'User Created'), ('system', 'System Notification')], help_text='Type of notification', max_length=50)),
+                ('title', models.CharField(help_text='Notification title', max_length=200)),
+                ('message', models.TextField(help_text='Notification message')),
+                ('is_read', models.BooleanField(default=False, help_text='Whether notification had been read when archived')),
+                ('created_at', models.DateTimeField(help_text='When the original notification was created')),
+                ('related_booking_id', models.IntegerField(blank=True, help_text='ID of related booking', null=True)),
+                ('related_venue_id', models.IntegerField(blank=True, help_text='ID of related venue', null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True, help_text='When the notification was archived')),
+                ('user', models.ForeignKey(help_text='User who received this notification', on_delete=django.db.models.deletion.CASCADE, related_name='archived_notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'notifications_archive',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
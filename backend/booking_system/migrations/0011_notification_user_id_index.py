@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_system', '0010_notification_archive'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'id'], name='notificatio_user_id_2f27a3_idx'),
+        ),
+    ]
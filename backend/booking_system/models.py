@@ -27,6 +27,14 @@ class Booking(models.Model):
         related_name='bookings',
         help_text="User who made the booking"
     )
+    series = models.ForeignKey(
+        'BookingSeries',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='bookings',
+        help_text="Recurring series this booking belongs to (if any)"
+    )
     
     # Event Details
     event_name = models.CharField(
@@ -128,10 +136,13 @@ class Booking(models.Model):
         verbose_name = 'Booking'
         verbose_name_plural = 'Bookings'
         ordering = ['-date', '-start_time']
-        # Prevent double booking: same venue, date, and overlapping time
+        # Prevent double booking: same venue, date, and overlapping time.
+        # Overlaps are rejected by the database itself (exclusion constraint
+        # on PostgreSQL, triggers on SQLite), see migration 0004.
         constraints = [
             models.UniqueConstraint(
                 fields=['venue', 'date', 'start_time', 'end_time'],
+                condition=models.Q(status='confirmed'),
                 name='unique_venue_datetime'
             )
         ]
@@ -144,11 +155,42 @@ class Booking(models.Model):
             models.Index(fields=['date', 'status', 'reminder_sent']),
             models.Index(fields=['date', 'start_time', 'confirmed']),
             models.Index(fields=['venue', 'date', 'status']),
+            # Keyset pagination of booking lists
+            models.Index(fields=['date', 'start_time', 'id']),
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['user', 'created_at', 'id']),
         ]
 
     def __str__(self):
         return f"{self.event_name} - {self.venue.name} on {self.date}"
     
+    # Fields remembered by from_db so that day summaries can be updated from
+    # the difference between the loaded and the saved booking
+    LOADED_FIELDS = (
+        'venue_id', 'date', 'start_time', 'end_time', 'status', 'auto_cancelled', 'expected_attendees'
+    )
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remember the loaded venue/day, times and status so that day summaries
+        can be updated incrementally, and the loaded status so that status
+        changes can be pushed to clients
+        """
+        instance = super().from_db(db, field_names, values)
+        # None when a field was deferred (the previous value is unknown)
+        instance._loaded_values = (
+            tuple(instance.__dict__[name] for name in cls.LOADED_FIELDS)
+            if all(name in instance.__dict__ for name in cls.LOADED_FIELDS) else None
+        )
+        instance._loaded_slot = (instance.__dict__.get('venue_id'), instance.__dict__.get('date'))
+        instance._loaded_state = (instance.__dict__.get('status'), instance.__dict__.get('confirmed'))
+        return instance
+    
+    def loaded_values(self):
+        """Current values of LOADED_FIELDS"""
+        return tuple(getattr(self, name) for name in self.LOADED_FIELDS)
+    
     def clean(self):
         """Validate booking data"""
         errors = {}
@@ -232,6 +274,205 @@ class Booking(models.Model):
         self.save()
 
 
+class BookingSeries(models.Model):
+    """
+    A recurring booking (e.g. every Monday for a semester).
+    Occurrences are stored as regular Booking rows linked to the series.
+    """
+    
+    ALLOWED_FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY')
+    MAX_OCCURRENCES = 52
+    
+    venue = models.ForeignKey(
+        'venue_management.Venue',
+        on_delete=models.PROTECT,
+        related_name='booking_series',
+        help_text="Venue being booked"
+    )
+    user = models.ForeignKey(
+        'accounts.User',
+        on_delete=models.PROTECT,
+        related_name='booking_series',
+        help_text="User who made the booking series"
+    )
+    
+    # Event Details (copied to every occurrence)
+    event_name = models.CharField(
+        max_length=200,
+        help_text="Name/title of the event"
+    )
+    event_description = models.TextField(
+        null=True,
+        blank=True,
+        help_text="Purpose/details of the event"
+    )
+    expected_attendees = models.IntegerField(
+        validators=[MinValueValidator(1)],
+        help_text="Expected number of attendees"
+    )
+    contact_number = models.CharField(
+        max_length=20,
+        help_text="Contact number for the event"
+    )
+    special_requirements = models.TextField(
+        null=True,
+        blank=True,
+        help_text="Any special needs/requirements"
+    )
+    
+    # Recurrence
+    start_date = models.DateField(help_text="Date of the first occurrence")
+    start_time = models.TimeField(help_text="Event start time")
+    end_time = models.TimeField(help_text="Event end time")
+    recurrence = models.CharField(
+        max_length=255,
+        help_text="RRULE recurrence (e.g. FREQ=WEEKLY;INTERVAL=1;COUNT=12)"
+    )
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'booking_series'
+        verbose_name = 'Booking Series'
+        verbose_name_plural = 'Booking Series'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.event_name} - {self.venue.name} ({self.recurrence})"
+    
+    def occurrence_dates(self):
+        """Expand the recurrence rule into occurrence dates"""
+        return expand_recurrence(self.recurrence, self.start_date, self.start_time)
+
+
+def expand_recurrence(recurrence, start_date, start_time=None, limit=None):
+    """
+    Expand an RRULE string into a sorted list of distinct dates.
+    
+    Args:
+        recurrence (str): RRULE, with or without the "RRULE:" prefix
+        start_date (date): First occurrence (DTSTART)
+        start_time (time, optional): Start time used for DTSTART
+        limit (int, optional): Stop after this many occurrences
+        
+    Returns:
+        list: Occurrence dates
+        
+    Raises:
+        ValueError: If the rule cannot be parsed
+    """
+    from dateutil.rrule import rrulestr
+    
+    rule_text = recurrence.strip()
+    if rule_text.upper().startswith('RRULE:'):
+        rule_text = rule_text[len('RRULE:'):]
+    dtstart = datetime.combine(start_date, start_time or time(0, 0))
+    rule = rrulestr(rule_text, dtstart=dtstart)
+    
+    dates = []
+    for occurrence in rule:
+        if occurrence.date() not in dates:
+            dates.append(occurrence.date())
+        if limit is not None and len(dates) >= limit:
+            break
+    return dates
+
+
+class VenueDayOccupancy(models.Model):
+    """
+    Precomputed occupancy of a venue on one day.
+    One bit per 15-minute cell, maintained on every booking write
+    (see booking_system.occupancy).
+    """
+    
+    CELL_MINUTES = 15
+    CELLS_PER_DAY = 24 * 60 // CELL_MINUTES
+    
+    venue = models.ForeignKey(
+        'venue_management.Venue',
+        on_delete=models.CASCADE,
+        related_name='occupancy_days',
+        help_text="Venue"
+    )
+    date = models.DateField(help_text="Day")
+    mask = models.CharField(
+        max_length=CELLS_PER_DAY // 4,
+        default='0' * (CELLS_PER_DAY // 4),
+        help_text="Occupied 15-minute cells as a hex bitmask (bit 0 = 00:00-00:15)"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'venue_day_occupancy'
+        verbose_name = 'Venue Day Occupancy'
+        verbose_name_plural = 'Venue Day Occupancy'
+        unique_together = ['venue', 'date']
+        ordering = ['venue', 'date']
+    
+    def __str__(self):
+        return f"{self.venue_id} on {self.date}: {self.mask}"
+    
+    @property
+    def bits(self):
+        """Mask as an integer"""
+        return int(self.mask, 16)
+    
+    @bits.setter
+    def bits(self, value):
+        self.mask = format(value, f'0{self.CELLS_PER_DAY // 4}x')
+
+
+class VenueDailyUtilization(models.Model):
+    """
+    Daily usage rollup of a venue, updated after every booking write
+    (see booking_system.utilization). Used by the utilization dashboard.
+    """
+    
+    venue = models.ForeignKey(
+        'venue_management.Venue',
+        on_delete=models.CASCADE,
+        related_name='daily_utilization',
+        help_text="Venue"
+    )
+    date = models.DateField(help_text="Day")
+    booked_minutes = models.PositiveIntegerField(
+        default=0,
+        help_text="Minutes booked by confirmed/completed bookings"
+    )
+    booking_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Confirmed/completed bookings"
+    )
+    cancelled_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Cancelled bookings (including auto-cancelled)"
+    )
+    auto_cancelled_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Bookings auto-cancelled for not being confirmed"
+    )
+    attendees = models.PositiveIntegerField(
+        default=0,
+        help_text="Expected attendees of confirmed/completed bookings"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'venue_daily_utilization'
+        verbose_name = 'Venue Daily Utilization'
+        verbose_name_plural = 'Venue Daily Utilization'
+        unique_together = ['venue', 'date']
+        ordering = ['venue', 'date']
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.venue_id} on {self.date}: {self.booked_minutes} min"
+
+
 class VenueAdmin(models.Model):
     """Model mapping Hall Admins to their assigned venues"""
     
@@ -364,4 +605,4 @@ class Waitlist(models.Model):
 
 
 # Import Notification model from separate file to keep models organized
-from .notification_models import Notification
+from .notification_models import Notification, NotificationArchive
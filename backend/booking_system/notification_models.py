@@ -81,6 +81,7 @@ class Notification(models.Model):
         indexes = [
             models.Index(fields=['user', 'is_read']),
             models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['user', 'id']),  # delta sync (?since_id=)
         ]
     
     def __str__(self):
@@ -89,7 +90,83 @@ class Notification(models.Model):
     def mark_as_read(self):
         """Mark notification as read"""
         from django.utils import timezone
+        from utils.notification_utils import adjust_unread_count
         if not self.is_read:
             self.is_read = True
             self.read_at = timezone.now()
             self.save()
+            adjust_unread_count(self.user_id, -1)
+
+
+class NotificationArchive(models.Model):
+    """
+    Compact copy of notifications past the retention age, moved out of the
+    notifications table by the archive_old_notifications task. Keeps the
+    original ID and no secondary index besides the user.
+    """
+    
+    id = models.BigIntegerField(
+        primary_key=True,
+        help_text="ID of the original notification"
+    )
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_notifications',
+        help_text="User who received this notification"
+    )
+    
+    notification_type = models.CharField(
+        max_length=50,
+        choices=Notification.NOTIFICATION_TYPES,
+        help_text="Type of notification"
+    )
+    
+    title = models.CharField(
+        max_length=200,
+        help_text="Notification title"
+    )
+    
+    message = models.TextField(
+        help_text="Notification message"
+    )
+    
+    is_read = models.BooleanField(
+        default=False,
+        help_text="Whether notification had been read when archived"
+    )
+    
+    created_at = models.DateTimeField(
+        help_text="When the original notification was created"
+    )
+    
+    related_booking_id = models.IntegerField(
+        blank=True,
+        null=True,
+        help_text="ID of related booking"
+    )
+    
+    related_venue_id = models.IntegerField(
+        blank=True,
+        null=True,
+        help_text="ID of related venue"
+    )
+    
+    archived_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="When the notification was archived"
+    )
+    
+    # Columns copied from Notification rows
+    ARCHIVED_FIELDS = (
+        'id', 'user_id', 'notification_type', 'title', 'message', 'is_read',
+        'created_at', 'related_booking_id', 'related_venue_id'
+    )
+    
+    class Meta:
+        db_table = 'notifications_archive'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.title} (archived)"
@@ -0,0 +1,189 @@
+"""
+Per-day occupancy bitmasks.
+
+Every venue/day with bookings has a VenueDayOccupancy row whose mask has one
+bit per 15-minute cell (96 bits). Bit i is set when a confirmed booking
+overlaps cell i, counted from midnight. The row is updated inside the same
+transaction as every booking write, so readers can answer free/busy
+questions with bitwise operations instead of scanning bookings.
+
+Newly confirmed bookings are OR'ed into the stored mask. Only when a
+confirmed booking leaves a day (cancelled, moved, shortened or deleted) is
+that day's mask rebuilt from its bookings, because a freed 15-minute cell
+may still be shared with another booking.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Booking, VenueDayOccupancy
+from .availability import time_to_seconds
+
+CELL_MINUTES = VenueDayOccupancy.CELL_MINUTES
+CELLS_PER_DAY = VenueDayOccupancy.CELLS_PER_DAY
+CELL_SECONDS = CELL_MINUTES * 60
+
+
+def interval_mask(start_time, end_time):
+    """Bits of every cell overlapped by [start_time, end_time)"""
+    first = time_to_seconds(start_time) // CELL_SECONDS
+    last = (time_to_seconds(end_time) - 1) // CELL_SECONDS
+    if last < first:
+        return 0
+    return ((1 << (last - first + 1)) - 1) << first
+
+
+def day_mask(intervals):
+    """Combined mask of (start_time, end_time) intervals"""
+    mask = 0
+    for start_time, end_time in intervals:
+        mask |= interval_mask(start_time, end_time)
+    return mask
+
+
+def _confirmed_slot(values):
+    """((venue_id, date), (start_time, end_time)) of confirmed booking values, else None"""
+    if values is None or values[4] != 'confirmed':
+        return None
+    return (values[0], values[1]), (values[2], values[3])
+
+
+def occupancy_changes(previous, current, changes=None):
+    """
+    Mask updates needed after a booking write.
+
+    Args:
+        previous (tuple): Booking.LOADED_FIELDS values before the write
+                          (None for a new booking)
+        current (tuple): Values after the write (None for a deleted booking)
+        changes (dict, optional): Changes to merge into (e.g. for bulk writes)
+
+    Returns:
+        dict: {(venue_id, date): (intervals to add, rebuild)}
+    """
+    changes = {} if changes is None else changes
+    old = _confirmed_slot(previous)
+    new = _confirmed_slot(current)
+    if old == new:
+        return changes
+    if old is not None:
+        changes[old[0]] = (changes.get(old[0], ([], False))[0], True)
+    if new is not None:
+        add, rebuild = changes.get(new[0], ([], False))
+        changes[new[0]] = (add + [new[1]], rebuild)
+    return changes
+
+
+def apply_occupancy_changes(changes):
+    """
+    Apply the result of occupancy_changes(): rebuilt days are recomputed one
+    by one, added intervals are OR'ed into the rows of each venue at once.
+    """
+    added = {}
+    for (venue_id, booking_date), (add, rebuild) in changes.items():
+        if rebuild:
+            refresh_day_occupancy(venue_id, booking_date)
+        else:
+            added.setdefault(venue_id, {})[booking_date] = day_mask(add)
+    for venue_id, masks in added.items():
+        add_occupancy(venue_id, masks)
+
+
+def add_occupancy(venue_id, masks):
+    """
+    OR masks into the occupancy rows of one venue (creating missing rows).
+
+    Args:
+        venue_id (int): Venue ID
+        masks (dict): {date: mask} of newly confirmed bookings
+    """
+    # Inside the booking write's transaction no savepoint is needed
+    with transaction.atomic(savepoint=False):
+        rows = VenueDayOccupancy.objects.select_for_update().filter(venue_id=venue_id, date__in=list(masks))
+        rows = {row.date: row for row in rows}
+        missing = [booking_date for booking_date in masks if booking_date not in rows]
+        if missing:
+            # Days without a row have no confirmed bookings yet
+            new_rows = []
+            for booking_date in missing:
+                row = VenueDayOccupancy(venue_id=venue_id, date=booking_date)
+                row.bits = masks[booking_date]
+                new_rows.append(row)
+            VenueDayOccupancy.objects.bulk_create(new_rows, ignore_conflicts=True)
+            # Rows created meanwhile by another writer were ignored above and
+            # still need these bits (re-ORing the inserted ones is a no-op)
+            rows.update(
+                (row.date, row)
+                for row in VenueDayOccupancy.objects.select_for_update().filter(venue_id=venue_id, date__in=missing)
+            )
+
+        changed = []
+        now = timezone.now()
+        for booking_date, row in rows.items():
+            mask = row.bits | masks[booking_date]
+            if mask != row.bits:
+                row.bits = mask
+                row.updated_at = now
+                changed.append(row)
+        if changed:
+            VenueDayOccupancy.objects.bulk_update(changed, ['mask', 'updated_at'])
+
+
+def refresh_day_occupancy(venue_id, booking_date):
+    """
+    Recompute the occupancy mask of one venue/day from its bookings.
+
+    The occupancy row is locked first so that concurrent writers to the same
+    day recompute one after another and the last one sees every booking.
+    """
+    with transaction.atomic():
+        occupancy, _ = VenueDayOccupancy.objects.select_for_update().get_or_create(
+            venue_id=venue_id,
+            date=booking_date
+        )
+        intervals = Booking.objects.filter(
+            venue_id=venue_id,
+            date=booking_date,
+            status='confirmed'
+        ).values_list('start_time', 'end_time')
+        mask = day_mask(intervals)
+        if mask != occupancy.bits:
+            occupancy.bits = mask
+            occupancy.save(update_fields=['mask', 'updated_at'])
+    return mask
+
+
+def get_masks(venue_ids, start_date, end_date):
+    """
+    Load occupancy masks for several venues over a date range in one query.
+
+    Returns:
+        dict: {(venue_id, date): mask}; days without a row are free
+    """
+    rows = VenueDayOccupancy.objects.filter(
+        venue_id__in=list(venue_ids),
+        date__gte=start_date,
+        date__lte=end_date
+    ).values_list('venue_id', 'date', 'mask')
+    return {
+        (venue_id, booking_date): int(mask, 16)
+        for venue_id, booking_date, mask in rows
+    }
+
+
+def mask_to_bitmap(mask, slot_minutes):
+    """
+    Render a mask at a coarser granularity.
+
+    Args:
+        mask (int): Day mask
+        slot_minutes (int): Slot size, a multiple of CELL_MINUTES
+
+    Returns:
+        str: One character per slot, '1' if any cell in it is occupied
+    """
+    cells_per_slot = slot_minutes // CELL_MINUTES
+    slot_bits = (1 << cells_per_slot) - 1
+    return ''.join(
+        '1' if (mask >> (slot * cells_per_slot)) & slot_bits else '0'
+        for slot in range(CELLS_PER_DAY // cells_per_slot)
+    )
@@ -0,0 +1,89 @@
+"""
+Database-level guard against overlapping confirmed bookings.
+
+Migration 0004 adds an exclusion constraint (PostgreSQL) or two triggers
+(SQLite) that reject overlapping confirmed bookings of a venue. SQLite
+silently drops triggers whenever a later migration rebuilds the bookings
+table (AlterField, RemoveField, ...), after which only the API validation
+is left and concurrent requests can double-book again. After every migrate
+the guard is checked and whatever is missing is recreated from the
+statements of migration 0004.
+"""
+from importlib import import_module
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.recorder import MigrationRecorder
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+GUARD_MIGRATION = ('booking_system', '0004_booking_no_overlap')
+GUARD_TABLE = 'bookings'
+
+# Triggers/constraints created by GUARD_MIGRATION, per database vendor
+GUARD_NAMES = {
+    'sqlite': ('bookings_no_overlap_insert', 'bookings_no_overlap_update'),
+    'postgresql': ('bookings_no_overlap',),
+}
+
+
+def _forward_statements(vendor):
+    migration = import_module('booking_system.migrations.' + GUARD_MIGRATION[1])
+    return {'sqlite': migration.SQLITE_FORWARD, 'postgresql': migration.POSTGRES_FORWARD}[vendor]
+
+
+def missing_guards(connection):
+    """
+    Names of the guard triggers/constraints missing from the bookings table.
+
+    Returns:
+        list: Missing names (empty when the guard is complete or the
+              database has no guard)
+    """
+    names = GUARD_NAMES.get(connection.vendor, ())
+    if not names:
+        return []
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s",
+                [GUARD_TABLE]
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+        else:
+            existing = set(connection.introspection.get_constraints(cursor, GUARD_TABLE))
+    return [name for name in names if name not in existing]
+
+
+def ensure_overlap_guard(using=DEFAULT_DB_ALIAS):
+    """
+    Recreate missing parts of the guard once its migration is applied.
+
+    Returns:
+        list: Names of the recreated triggers/constraints
+    """
+    connection = connections[using]
+    if connection.vendor not in GUARD_NAMES:
+        return []
+    if GUARD_MIGRATION not in MigrationRecorder(connection).applied_migrations():
+        return []
+    missing = missing_guards(connection)
+    if not missing:
+        return []
+
+    guarded = GUARD_NAMES[connection.vendor]
+    with connection.cursor() as cursor:
+        for statement in _forward_statements(connection.vendor):
+            # Statements creating a guard that still exists are skipped;
+            # the rest (e.g. CREATE EXTENSION IF NOT EXISTS) are idempotent
+            creates = [name for name in guarded if name in statement]
+            if not creates or any(name in missing for name in creates):
+                cursor.execute(statement)
+    logger.warning(f"Recreated missing booking overlap guard(s) on '{using}': {', '.join(missing)}")
+    return missing
+
+
+def recreate_overlap_guard(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """post_migrate receiver for the booking_system app"""
+    ensure_overlap_guard(using)
@@ -0,0 +1,141 @@
+"""
+Keyset (cursor) pagination for booking lists.
+
+Pages are selected with a WHERE clause on the sort key of the last row of
+the previous page instead of an OFFSET, so every page costs the same index
+range scan however deep into the history it is, and rows inserted while a
+client pages through cannot shift or duplicate entries.
+"""
+import base64
+import json
+
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginate a queryset on a unique composite key.
+
+    Args:
+        ordering (tuple): Field names, '-' prefixed for descending order.
+            The last field must be unique (normally 'id').
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 20
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering):
+        self.ordering = tuple(ordering)
+        self.fields = [field.lstrip('-') for field in self.ordering]
+        self.next_cursor = None
+        self.request = None
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, row):
+        # Rows are model instances or values() dicts (fast serializers)
+        values = [row[field] if isinstance(row, dict) else getattr(row, field) for field in self.fields]
+        payload = json.dumps([value.isoformat() if hasattr(value, 'isoformat') else value for value in values])
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, queryset, cursor):
+        """Turn a cursor back into typed values of the key fields"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            raw_values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            if not isinstance(raw_values, list) or len(raw_values) != len(self.fields):
+                raise ValueError
+            return [
+                queryset.model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, raw_values)
+            ]
+        except Exception:
+            raise ValidationError({self.cursor_query_param: self.invalid_cursor_message})
+
+    def after(self, values):
+        """
+        Filter for rows strictly after the given key in sort order:
+        a >= x AND ((a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z) ...)
+
+        The leading a >= x conjunct is redundant logically but gives the
+        planner a range on the first index column to scan from.
+        """
+        first = self.ordering[0]
+        condition = Q()
+        for position, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal_prefix = {prefix: values[i] for i, prefix in enumerate(self.fields[:position])}
+            condition |= Q(**equal_prefix, **{f'{name}__{lookup}': values[position]})
+        leading = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{self.fields[0]}__{leading}': values[0]}) & condition
+
+    def seek(self, queryset, values):
+        """
+        Restrict the queryset to rows after the cursor key.
+
+        On PostgreSQL a single-direction ordering is compared as a row value,
+        (a, b, c) < (x, y, z), which the planner turns into one index range
+        scan; other backends and mixed directions use the expanded form.
+        """
+        connection = connections[queryset.db]
+        directions = {field.startswith('-') for field in self.ordering}
+        if connection.vendor != 'postgresql' or len(directions) != 1:
+            return queryset.filter(self.after(values))
+
+        opts = queryset.model._meta
+        fields = [opts.get_field(field) for field in self.fields]
+        table = connection.ops.quote_name(opts.db_table)
+        columns = ', '.join(f'{table}.{connection.ops.quote_name(field.column)}' for field in fields)
+        operator = '<' if directions.pop() else '>'
+        placeholders = ', '.join(['%s'] * len(fields))
+        params = [field.get_db_prep_value(value, connection) for field, value in zip(fields, values)]
+        return queryset.extra(where=[f'({columns}) {operator} ({placeholders})'], params=params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = self.seek(queryset, self.decode_cursor(queryset, cursor))
+
+        rows = list(queryset[:page_size + 1])
+        page = rows[:page_size]
+        self.next_cursor = self.encode_cursor(page[-1]) if len(rows) > page_size else None
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'next_cursor': self.next_cursor,
+            'results': data
+        })
+
+    @staticmethod
+    def requested(request):
+        """Pagination is opt-in: ?paginate=cursor or an explicit cursor"""
+        return (
+            request.query_params.get('paginate') == 'cursor'
+            or 'cursor' in request.query_params
+        )
@@ -0,0 +1,458 @@
+"""
+Realtime push of notifications and booking changes.
+
+Signals publish events to pub/sub channels (``utils.pubsub``) once the write
+commits: notifications and booking changes to the user's channel, booking
+changes also to the venue's channel. Two ASGI apps mounted in
+``config/asgi.py`` relay them, so the frontend no longer has to poll.
+
+``EventStream`` sends the user's events as Server-Sent Events. Clients
+connect with ``new EventSource('/api/events/stream/?token=<access JWT>')``
+(EventSource cannot send an Authorization header) and receive:
+
+    event: ready          {"unread_count": 3}
+    event: notification   {"notification": {...}, "unread_count": 4}
+    event: notifications  {"notifications": [{...}, ...], "unread_count": 6}
+    event: booking        {"change": "cancelled", "booking": {...}}
+
+Notification events carry the (highest) notification ID as the SSE event
+ID. A reconnecting EventSource sends it back as Last-Event-ID (a first
+connection may pass ?since_id= instead), and the notifications missed in
+between are replayed as one "notifications" event, up to SSE_REPLAY_LIMIT
+of them ("has_more" tells the client to fetch the rest with the
+notifications API's ?since_id=).
+
+``VenueSocket`` is a WebSocket for dashboards following venues. Clients
+connect to ``/ws/venues/?token=<access JWT>`` and send JSON messages:
+
+    {"action": "subscribe", "venue_ids": [1, 2]}
+    {"action": "unsubscribe", "venue_ids": [2]}
+
+and receive JSON messages:
+
+    {"event": "subscribed", "venue_ids": [1]}
+    {"event": "booking", "data": {"change": "created", "booking": {...}}}
+    {"event": "error", "detail": "...", "venue_ids": [7]}
+"""
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from utils.pubsub import publish, get_broker, user_channel, venue_channel
+
+EVENT_STREAM_PATH = '/api/events/stream/'
+VENUE_SOCKET_PATH = '/ws/venues/'
+
+BOOKING_EVENT_FIELDS = (
+    'id', 'event_name', 'venue_id', 'user_id', 'date', 'start_time', 'end_time',
+    'status', 'confirmed', 'auto_cancelled'
+)
+
+
+# ----------------------------------------------------------------------------
+# Publishing (sync, called from signals after commit)
+# ----------------------------------------------------------------------------
+
+def booking_payload(booking):
+    """Compact booking representation sent to realtime clients"""
+    return {field: getattr(booking, field) for field in BOOKING_EVENT_FIELDS}
+
+
+def booking_change(booking, created=False, previous=None):
+    """
+    Name the change of a saved booking.
+
+    Args:
+        booking: Booking object
+        created (bool): The booking was just inserted
+        previous (tuple, optional): (status, confirmed) as loaded from the database
+
+    Returns:
+        str: 'created', 'cancelled', 'auto_cancelled', 'confirmed', 'status',
+             or None when neither status nor confirmation changed
+    """
+    if created:
+        return 'created'
+    if previous is None or previous == (booking.status, booking.confirmed):
+        return None
+    if booking.status != previous[0]:
+        if booking.status == 'cancelled':
+            return 'auto_cancelled' if booking.auto_cancelled else 'cancelled'
+        return 'status'
+    return 'confirmed' if booking.confirmed else 'status'
+
+
+def publish_booking_change(booking, change):
+    """Send a booking change to the booking owner's and the venue's channels"""
+    message = {
+        'event': 'booking',
+        'data': {'change': change, 'booking': booking_payload(booking)},
+    }
+    publish(user_channel(booking.user_id), message)
+    publish(venue_channel(booking.venue_id), message)
+
+
+def publish_notification(notification):
+    """Send a new notification (and the new unread count) to its user's stream"""
+    from utils.notification_utils import get_unread_count
+    from .serializers import NotificationSerializer
+
+    publish(user_channel(notification.user_id), {
+        'event': 'notification',
+        'id': notification.id,
+        'data': {
+            'notification': NotificationSerializer(notification).data,
+            'unread_count': get_unread_count(notification.user),
+        },
+    })
+
+
+def publish_notifications(notifications):
+    """
+    Send bulk-created notifications to their users' streams: one message
+    per user with all of the user's new notifications and the unread count
+    """
+    from utils.notification_utils import get_unread_count
+    from .serializers import NotificationSerializer
+
+    by_user = {}
+    for notification in notifications:
+        by_user.setdefault(notification.user_id, []).append(notification)
+    for user_id, batch in by_user.items():
+        publish(user_channel(user_id), {
+            'event': 'notifications',
+            'id': max(notification.id for notification in batch),
+            'data': {
+                'notifications': NotificationSerializer(batch, many=True).data,
+                'unread_count': get_unread_count(batch[0].user),
+            },
+        })
+
+
+# ----------------------------------------------------------------------------
+# Server-Sent Events endpoint (ASGI)
+# ----------------------------------------------------------------------------
+
+def _sse(event=None, data=None, comment=None, retry=None, event_id=None):
+    """Encode one SSE frame"""
+    lines = []
+    if comment is not None:
+        lines.append(f': {comment}')
+    if retry is not None:
+        lines.append(f'retry: {retry}')
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event is not None:
+        lines.append(f'event: {event}')
+    if data is not None:
+        lines.extend(f'data: {line}' for line in json.dumps(data, cls=DjangoJSONEncoder).splitlines())
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+
+def _raw_token(scope):
+    """Access token from ?token= or an Authorization: Bearer header"""
+    token = parse_qs(scope.get('query_string', b'').decode('latin-1')).get('token')
+    if token:
+        return token[0]
+    for name, value in scope.get('headers', []):
+        if name == b'authorization':
+            parts = value.decode('latin-1').split()
+            if len(parts) == 2 and parts[0] in settings.SIMPLE_JWT.get('AUTH_HEADER_TYPES', ('Bearer',)):
+                return parts[1]
+    return None
+
+
+def _since_id(scope):
+    """Notification ID to replay from: Last-Event-ID header, else ?since_id="""
+    value = dict(scope.get('headers', [])).get(b'last-event-id', b'').decode('latin-1')
+    if not value:
+        value = (parse_qs(scope.get('query_string', b'').decode('latin-1')).get('since_id') or [''])[0]
+    return int(value) if value.isdigit() else None
+
+
+def replay_notifications(user, since_id):
+    """
+    The user's notifications newer than since_id, oldest first (sync; runs DB queries).
+
+    Returns:
+        dict: "notifications" event data with has_more, or None if there are none
+    """
+    from utils.notification_utils import get_unread_count
+    from .models import Notification
+    from .serializers import NotificationSerializer
+
+    limit = getattr(settings, 'SSE_REPLAY_LIMIT', 100)
+    rows = list(
+        Notification.objects.filter(user=user, id__gt=since_id).select_related('user').order_by('id')[:limit + 1]
+    )
+    if not rows:
+        return None
+    return {
+        'notifications': NotificationSerializer(rows[:limit], many=True).data,
+        'unread_count': get_unread_count(user),
+        'has_more': len(rows) > limit,
+    }
+
+
+def authenticate_scope(scope):
+    """
+    Resolve the user of a connection from its access token (sync; runs DB queries).
+
+    Returns:
+        User: Active user, or None if the token is missing or invalid
+    """
+    from rest_framework.exceptions import AuthenticationFailed
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+    raw = _raw_token(scope)
+    if not raw:
+        return None
+    authentication = JWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+
+
+def followable_venue_ids(user, venue_ids):
+    """
+    The venues among venue_ids whose booking changes the user may follow
+    (sync; runs DB queries). Same rule as booking visibility: super admins
+    follow any venue, hall admins their assigned venues, others none.
+
+    Returns:
+        set: Allowed venue IDs
+    """
+    from venue_management.models import Venue
+    from .assignments import get_assigned_venue_ids
+
+    if user.is_admin():
+        return set(Venue.objects.filter(id__in=venue_ids).values_list('id', flat=True))
+    if user.is_venue_admin():
+        return set(venue_ids) & get_assigned_venue_ids(user)
+    return set()
+
+
+def _cors_headers(scope):
+    origin = dict(scope.get('headers', [])).get(b'origin')
+    if origin and origin.decode('latin-1') in getattr(settings, 'CORS_ALLOWED_ORIGINS', []):
+        headers = [(b'access-control-allow-origin', origin), (b'vary', b'Origin')]
+        if getattr(settings, 'CORS_ALLOW_CREDENTIALS', False):
+            headers.append((b'access-control-allow-credentials', b'true'))
+        return headers
+    return []
+
+
+class EventStream:
+    """ASGI app streaming the authenticated user's events as text/event-stream"""
+
+    async def __call__(self, scope, receive, send):
+        if scope['method'] != 'GET':
+            await self._reject(scope, send, 405, 'Method not allowed')
+            return
+        user = await sync_to_async(authenticate_scope)(scope)
+        if user is None:
+            await self._reject(scope, send, 401, 'Authentication credentials were not provided or are invalid')
+            return
+
+        from utils.notification_utils import get_unread_count
+
+        subscription = await get_broker().subscribe([user_channel(user.pk)])
+        disconnected = asyncio.ensure_future(self._wait_for_disconnect(receive))
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [
+                    (b'content-type', b'text/event-stream; charset=utf-8'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no'),
+                    *_cors_headers(scope),
+                ],
+            })
+            unread_count = await sync_to_async(get_unread_count)(user)
+            await self._send(send, _sse(
+                'ready', {'unread_count': unread_count}, retry=getattr(settings, 'SSE_RETRY_MS', 3000)
+            ))
+
+            # Subscribed before the replay query, so nothing falls in between;
+            # live notifications the replay already covered are skipped
+            replayed_id = _since_id(scope)
+            if replayed_id is not None:
+                replay = await sync_to_async(replay_notifications)(user, replayed_id)
+                if replay is not None:
+                    replayed_id = replay['notifications'][-1]['id']
+                    await self._send(send, _sse('notifications', replay, event_id=replayed_id))
+
+            heartbeat = getattr(settings, 'SSE_HEARTBEAT_SECONDS', 15)
+            # Close long-lived streams so clients reconnect (and re-authenticate)
+            loop = asyncio.get_running_loop()
+            closes_at = loop.time() + getattr(settings, 'SSE_MAX_SECONDS', 60 * 60)
+            while not disconnected.done() and loop.time() < closes_at:
+                message = asyncio.ensure_future(subscription.get(timeout=heartbeat))
+                await asyncio.wait({message, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if not message.done():
+                    message.cancel()
+                    break
+                item = message.result()
+                if item is None:
+                    await self._send(send, _sse(comment='keepalive'))
+                else:
+                    _, payload = item
+                    event_id = payload.get('id')
+                    if event_id is not None and replayed_id is not None and event_id <= replayed_id:
+                        continue
+                    await self._send(send, _sse(payload['event'], payload['data'], event_id=event_id))
+            if not disconnected.done():
+                await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            disconnected.cancel()
+            await subscription.close()
+
+    @staticmethod
+    async def _send(send, body):
+        await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+
+    @staticmethod
+    async def _wait_for_disconnect(receive):
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+
+    @staticmethod
+    async def _reject(scope, send, status, detail):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), *_cors_headers(scope)],
+        })
+        await send({'type': 'http.response.body', 'body': json.dumps({'detail': detail}).encode('utf-8')})
+
+
+# ----------------------------------------------------------------------------
+# Per-venue booking updates (ASGI WebSocket)
+# ----------------------------------------------------------------------------
+
+def _parse_command(text):
+    """
+    Parse a client message.
+
+    Returns:
+        tuple: (action, venue_ids)
+
+    Raises:
+        ValueError: If the message is not a valid subscribe/unsubscribe command
+    """
+    try:
+        command = json.loads(text or '')
+    except json.JSONDecodeError:
+        raise ValueError('Messages must be JSON')
+    if not isinstance(command, dict) or command.get('action') not in ('subscribe', 'unsubscribe'):
+        raise ValueError('action must be "subscribe" or "unsubscribe"')
+    venue_ids = command.get('venue_ids')
+    if (not isinstance(venue_ids, list)
+            or not all(isinstance(venue_id, int) and not isinstance(venue_id, bool) for venue_id in venue_ids)):
+        raise ValueError('venue_ids must be a list of venue IDs')
+    return command['action'], set(venue_ids)
+
+
+class VenueSocket:
+    """ASGI WebSocket app relaying booking changes of the venues a client subscribes to"""
+
+    async def __call__(self, scope, receive, send):
+        message = await receive()
+        if message['type'] != 'websocket.connect':
+            return
+        user = await sync_to_async(authenticate_scope)(scope)
+        if user is None:
+            # Rejects the handshake (HTTP 403)
+            await send({'type': 'websocket.close', 'code': 4401})
+            return
+        await send({'type': 'websocket.accept'})
+
+        venue_ids = set()
+        subscription = None
+        client = asyncio.ensure_future(receive())
+        event = None
+        loop = asyncio.get_running_loop()
+        # Close long-lived sockets so clients reconnect (and re-authenticate)
+        closes_at = loop.time() + getattr(settings, 'WEBSOCKET_MAX_SECONDS', 60 * 60)
+        try:
+            while True:
+                if event is None and subscription is not None:
+                    event = asyncio.ensure_future(subscription.get())
+                remaining = closes_at - loop.time()
+                if remaining <= 0:
+                    await send({'type': 'websocket.close', 'code': 1000})
+                    return
+                await asyncio.wait(
+                    {client} if event is None else {client, event},
+                    timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if event is not None and event.done():
+                    _, payload = event.result()
+                    event = None
+                    await self._send(send, payload)
+
+                if client.done():
+                    message = client.result()
+                    if message['type'] == 'websocket.disconnect':
+                        return
+                    client = asyncio.ensure_future(receive())
+                    changed = await self._handle(user, message.get('text'), venue_ids, send)
+                    if changed is not None:
+                        # Subscribe to the new set before dropping the old one
+                        old, subscription = subscription, (
+                            await get_broker().subscribe([venue_channel(venue_id) for venue_id in changed])
+                            if changed else None
+                        )
+                        venue_ids = changed
+                        if event is not None:
+                            event.cancel()
+                            event = None
+                        if old is not None:
+                            await old.close()
+        finally:
+            client.cancel()
+            if event is not None:
+                event.cancel()
+            if subscription is not None:
+                await subscription.close()
+
+    async def _handle(self, user, text, venue_ids, send):
+        """
+        Apply a client command.
+
+        Returns:
+            set: The new subscribed venue IDs, or None if unchanged
+        """
+        try:
+            action, requested = _parse_command(text)
+        except ValueError as e:
+            await self._send(send, {'event': 'error', 'detail': str(e)})
+            return None
+
+        if action == 'unsubscribe':
+            changed = venue_ids - requested
+        else:
+            allowed = await sync_to_async(followable_venue_ids)(user, requested)
+            if requested - allowed:
+                await self._send(send, {
+                    'event': 'error',
+                    'detail': 'You do not have permission to follow these venues',
+                    'venue_ids': sorted(requested - allowed),
+                })
+            changed = venue_ids | allowed
+        await self._send(send, {'event': 'subscribed', 'venue_ids': sorted(changed)})
+        return changed if changed != venue_ids else None
+
+    @staticmethod
+    async def _send(send, message):
+        await send({'type': 'websocket.send', 'text': json.dumps(message, cls=DjangoJSONEncoder)})
@@ -0,0 +1,95 @@
+"""
+Notification retention.
+
+Notifications older than the retention age are copied to
+NotificationArchive (or just dropped) and deleted from the notifications
+table in small primary-key ranges, one short transaction per batch, so the
+hot table and its (user, -created_at) index stay small and SQLite never
+holds the write lock for long.
+"""
+from datetime import timedelta
+import time as time_module
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification, NotificationArchive
+
+
+def _settings():
+    return {
+        'days': getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 90),
+        'mode': getattr(settings, 'NOTIFICATION_RETENTION_MODE', 'archive'),
+        'batch_size': getattr(settings, 'NOTIFICATION_RETENTION_BATCH_SIZE', 1000),
+        'pause': getattr(settings, 'NOTIFICATION_RETENTION_PAUSE_SECONDS', 0),
+    }
+
+
+def _expire_batch(rows, cutoff, archive):
+    """Archive (optionally) and delete the old rows of one ID range"""
+    from utils.notification_utils import invalidate_unread_counts
+
+    old = [row for row in rows if row['created_at'] < cutoff]
+    if not old:
+        return 0
+    with transaction.atomic():
+        if archive:
+            NotificationArchive.objects.bulk_create(
+                [NotificationArchive(**row) for row in old],
+                ignore_conflicts=True
+            )
+        deleted, _ = Notification.objects.filter(
+            id__gte=old[0]['id'],
+            id__lte=old[-1]['id'],
+            created_at__lt=cutoff
+        ).delete()
+        # Unread rows leave the unread counters
+        invalidate_unread_counts({row['user_id'] for row in old if not row['is_read']})
+    return deleted
+
+
+def expire_notifications(days=None, mode=None, batch_size=None, max_batches=None):
+    """
+    Move or delete notifications older than the retention age.
+
+    IDs grow with created_at, so the table is walked in ascending ID
+    batches through the primary key and the walk stops at the first batch
+    that reaches the cutoff.
+
+    Args:
+        days (int, optional): Retention age (default NOTIFICATION_RETENTION_DAYS)
+        mode (str, optional): 'archive' or 'delete' (default NOTIFICATION_RETENTION_MODE)
+        batch_size (int, optional): Rows per batch (default NOTIFICATION_RETENTION_BATCH_SIZE)
+        max_batches (int, optional): Stop after this many batches (the next run continues)
+
+    Returns:
+        dict: {'expired': rows removed, 'batches': batches run, 'mode': mode}
+    """
+    config = _settings()
+    days = config['days'] if days is None else days
+    mode = mode or config['mode']
+    batch_size = batch_size or config['batch_size']
+    if mode not in ('archive', 'delete'):
+        raise ValueError(f"Unknown notification retention mode: {mode}")
+
+    cutoff = timezone.now() - timedelta(days=days)
+    expired = batches = 0
+    last_id = 0
+    while max_batches is None or batches < max_batches:
+        rows = list(
+            Notification.objects.filter(id__gt=last_id).order_by('id')
+            .values(*NotificationArchive.ARCHIVED_FIELDS)[:batch_size]
+        )
+        if not rows:
+            break
+        expired += _expire_batch(rows, cutoff, mode == 'archive')
+        batches += 1
+        last_id = rows[-1]['id']
+        if rows[-1]['created_at'] >= cutoff:
+            break
+        if config['pause']:
+            # Let other writers take the database lock between batches
+            time_module.sleep(config['pause'])
+
+    return {'expired': expired, 'batches': batches, 'mode': mode}
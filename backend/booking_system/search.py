@@ -0,0 +1,223 @@
+"""
+Full-text search over bookings.
+
+The booking_search table (migration 0009) holds one document per booking
+built from its event name, description, requester and department: an FTS5
+virtual table on SQLite and a weighted tsvector with a GIN index on
+PostgreSQL. The booking signals in ``booking_system.signals`` keep it in
+sync; ``search_bookings`` ranks matches in the database so only the IDs of
+the best hits are returned. Other databases fall back to icontains scans.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Booking
+
+SEARCH_TABLE = 'booking_search'
+
+# Search terms beyond this are ignored
+MAX_TERMS = 8
+
+# FTS5 bm25() column weights: event_name, event_description, requester, department
+SQLITE_WEIGHTS = (10.0, 2.0, 5.0, 3.0)
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_supported():
+    """Whether the database has a full-text index of bookings"""
+    return connection.vendor in ('sqlite', 'postgresql')
+
+
+def search_terms(query):
+    """
+    Split a user query into search terms.
+
+    Only word characters are kept, so terms never carry FTS5 or tsquery
+    operators.
+
+    Returns:
+        list: Lowercase terms (at most MAX_TERMS)
+    """
+    return [term.lower() for term in _TERM_RE.findall(query or '')][:MAX_TERMS]
+
+
+def _document(booking):
+    """(id, event_name, event_description, requester, department) of a booking with its user"""
+    user = booking.user
+    return (
+        booking.pk,
+        booking.event_name or '',
+        booking.event_description or '',
+        f'{user.first_name} {user.last_name} {user.email}',
+        user.department or '',
+    )
+
+
+def index_bookings(bookings):
+    """
+    Add or replace the search documents of bookings.
+
+    Args:
+        bookings: Iterable of saved Booking objects (their users are read)
+    """
+    if not search_supported():
+        return
+    documents = [_document(booking) for booking in bookings]
+    if not documents:
+        return
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.executemany(
+                f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s',
+                [(document[0],) for document in documents]
+            )
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, event_name, event_description, requester, department) '
+                'VALUES (%s, %s, %s, %s, %s)',
+                documents
+            )
+        else:
+            cursor.executemany(
+                f"""
+                INSERT INTO {SEARCH_TABLE} (booking_id, document)
+                VALUES (%s,
+                    setweight(to_tsvector('simple', %s), 'A')
+                    || setweight(to_tsvector('simple', %s), 'D')
+                    || setweight(to_tsvector('simple', %s), 'B')
+                    || setweight(to_tsvector('simple', %s), 'C'))
+                ON CONFLICT (booking_id) DO UPDATE SET document = EXCLUDED.document
+                """,
+                documents
+            )
+
+
+def remove_bookings(booking_ids):
+    """Drop the search documents of deleted bookings"""
+    booking_ids = list(booking_ids)
+    if not search_supported() or not booking_ids:
+        return
+    column = 'rowid' if connection.vendor == 'sqlite' else 'booking_id'
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {SEARCH_TABLE} WHERE {column} = %s',
+            [(booking_id,) for booking_id in booking_ids]
+        )
+
+
+def rebuild_search_index(batch_size=1000):
+    """
+    Rebuild the whole index from the bookings table.
+
+    Returns:
+        int: Number of bookings indexed
+    """
+    if not search_supported():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+
+    indexed = 0
+    batch = []
+    for booking in Booking.objects.select_related('user').order_by('id').iterator(chunk_size=batch_size):
+        batch.append(booking)
+        if len(batch) >= batch_size:
+            index_bookings(batch)
+            indexed += len(batch)
+            batch = []
+    index_bookings(batch)
+    return indexed + len(batch)
+
+
+def _scope_sql(venue_ids, user_id, status):
+    clauses, params = [], []
+    if venue_ids is not None:
+        if not venue_ids:
+            clauses.append('1 = 0')
+        else:
+            clauses.append('b.venue_id IN ({})'.format(', '.join(['%s'] * len(venue_ids))))
+            params.extend(venue_ids)
+    if user_id is not None:
+        clauses.append('b.user_id = %s')
+        params.append(user_id)
+    if status:
+        clauses.append('b.status = %s')
+        params.append(status)
+    return ''.join(f' AND {clause}' for clause in clauses), params
+
+
+def search_bookings(query, limit=20, venue_ids=None, user_id=None, status=None):
+    """
+    Rank bookings matching a query.
+
+    Every term must match (as a prefix) one of the indexed columns; hits in
+    the event name weigh most, then requester, department and description.
+
+    Args:
+        query (str): User query
+        limit (int): Maximum number of hits
+        venue_ids (iterable, optional): Only bookings of these venues
+        user_id (int, optional): Only bookings of this user
+        status (str, optional): Only bookings with this status
+
+    Returns:
+        list: (booking_id, rank) tuples, best first (higher rank is better)
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    if venue_ids is not None:
+        venue_ids = sorted(venue_ids)
+
+    if not search_supported():
+        return _fallback_search(terms, limit, venue_ids, user_id, status)
+
+    scope, scope_params = _scope_sql(venue_ids, user_id, status)
+    if connection.vendor == 'sqlite':
+        weights = ', '.join(str(weight) for weight in SQLITE_WEIGHTS)
+        sql = f"""
+            SELECT s.rowid, bm25({SEARCH_TABLE}, {weights}) AS score
+            FROM {SEARCH_TABLE} s JOIN bookings b ON b.id = s.rowid
+            WHERE {SEARCH_TABLE} MATCH %s{scope}
+            ORDER BY score, s.rowid DESC
+            LIMIT %s
+        """
+        params = [' '.join(f'"{term}"*' for term in terms), *scope_params, limit]
+    else:
+        sql = f"""
+            SELECT s.booking_id, ts_rank_cd(s.document, q) AS score
+            FROM {SEARCH_TABLE} s JOIN bookings b ON b.id = s.booking_id,
+                 to_tsquery('simple', %s) q
+            WHERE s.document @@ q{scope}
+            ORDER BY score DESC, s.booking_id DESC
+            LIMIT %s
+        """
+        params = [' & '.join(f'{term}:*' for term in terms), *scope_params, limit]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    # bm25() is lower-is-better; report ranks so that higher is better everywhere
+    sign = -1 if connection.vendor == 'sqlite' else 1
+    return [(booking_id, sign * score) for booking_id, score in rows]
+
+
+def _fallback_search(terms, limit, venue_ids, user_id, status):
+    """icontains scan for databases without a full-text index (unranked, newest first)"""
+    bookings = Booking.objects.all()
+    for term in terms:
+        bookings = bookings.filter(
+            Q(event_name__icontains=term) | Q(event_description__icontains=term)
+            | Q(user__first_name__icontains=term) | Q(user__last_name__icontains=term)
+            | Q(user__email__icontains=term) | Q(user__department__icontains=term)
+        )
+    if venue_ids is not None:
+        bookings = bookings.filter(venue_id__in=venue_ids)
+    if user_id is not None:
+        bookings = bookings.filter(user_id=user_id)
+    if status:
+        bookings = bookings.filter(status=status)
+    return [(booking_id, 0.0) for booking_id in bookings.order_by('-id').values_list('id', flat=True)[:limit]]
@@ -1,9 +1,12 @@
 from rest_framework import serializers
+from django.db import IntegrityError, transaction
 from django.utils import timezone
-from datetime import datetime, time
-from .models import Booking, VenueAdmin, Notification
+from datetime import datetime, time, timedelta
+from .models import Booking, BookingSeries, VenueAdmin, Notification, expand_recurrence
+from .interval_index import booking_index
 from venue_management.serializers import VenueListSerializer
 from accounts.serializers import UserSerializer
+from utils.fieldset_utils import SparseFieldsetMixin
 
 
 class BookingSerializer(serializers.ModelSerializer):
@@ -73,31 +76,213 @@ class BookingCreateSerializer(serializers.ModelSerializer):
                 errors['expected_attendees'] = f'Expected attendees ({attendees}) exceed venue capacity ({venue.capacity})'
         
         # Check for conflicting bookings
+        # The interval index rejects known clashes from memory. Slots it
+        # considers free are inserted optimistically: the database refuses
+        # overlapping confirmed bookings and create() reports the conflict.
         if attrs.get('venue') and attrs.get('date') and attrs.get('start_time') and attrs.get('end_time'):
-            conflicting = Booking.objects.filter(
-                venue=attrs['venue'],
-                date=attrs['date'],
-                status='confirmed'
-            ).filter(
-                start_time__lt=attrs['end_time'],
-                end_time__gt=attrs['start_time']
-            )
-            
-            if conflicting.exists():
-                conflict = conflicting.first()
-                errors['time_slot'] = f'Time slot conflicts with existing booking: {conflict.event_name} ({conflict.start_time}-{conflict.end_time})'
+            if booking_index.has_conflict(attrs['venue'].id, attrs['date'], attrs['start_time'], attrs['end_time']):
+                message = self._conflict_message(attrs)
+                if message:
+                    errors['time_slot'] = message
+                else:
+                    # Stale index entry (slot freed by another process)
+                    booking_index.invalidate(attrs['venue'].id, attrs['date'])
         
         if errors:
             raise serializers.ValidationError(errors)
         
         return attrs
     
+    def _conflict_message(self, attrs):
+        """Describe the confirmed booking overlapping the requested slot, if any"""
+        conflict = Booking.objects.filter(
+            venue=attrs['venue'],
+            date=attrs['date'],
+            status='confirmed'
+        ).filter(
+            start_time__lt=attrs['end_time'],
+            end_time__gt=attrs['start_time']
+        ).first()
+        
+        if conflict:
+            return f'Time slot conflicts with existing booking: {conflict.event_name} ({conflict.start_time}-{conflict.end_time})'
+        return None
+    
     def create(self, validated_data):
         """Create booking with current user"""
         user = self.context['request'].user
         validated_data['user'] = user
         validated_data['status'] = 'confirmed'
-        return super().create(validated_data)
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            # Another request booked an overlapping slot since validation
+            message = self._conflict_message(validated_data)
+            if not message:
+                raise
+            booking_index.invalidate(validated_data['venue'].id, validated_data['date'])
+            raise serializers.ValidationError({'time_slot': [message]})
+
+
+class SeriesOccurrenceSerializer(serializers.ModelSerializer):
+    """Compact representation of one occurrence of a booking series"""
+    
+    class Meta:
+        model = Booking
+        fields = ['id', 'date', 'start_time', 'end_time', 'status']
+        read_only_fields = fields
+
+
+class BookingSeriesSerializer(serializers.ModelSerializer):
+    """Serializer for BookingSeries model"""
+    
+    venue_name = serializers.CharField(source='venue.name', read_only=True)
+    user_name = serializers.CharField(source='user.get_full_name', read_only=True)
+    occurrences = SeriesOccurrenceSerializer(source='bookings', many=True, read_only=True)
+    
+    class Meta:
+        model = BookingSeries
+        fields = [
+            'id', 'venue', 'venue_name', 'user', 'user_name',
+            'event_name', 'event_description', 'expected_attendees',
+            'contact_number', 'special_requirements',
+            'start_date', 'start_time', 'end_time', 'recurrence',
+            'occurrences', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class BookingSeriesCreateSerializer(serializers.ModelSerializer):
+    """
+    Serializer for creating a recurring booking series.
+    All occurrences are validated and conflict-checked together and
+    inserted with a single bulk_create.
+    """
+    
+    class Meta:
+        model = BookingSeries
+        fields = [
+            'venue', 'event_name', 'event_description',
+            'start_date', 'start_time', 'end_time', 'recurrence',
+            'expected_attendees', 'contact_number', 'special_requirements'
+        ]
+    
+    def validate_venue(self, value):
+        """Validate that venue exists and is active"""
+        if not value.is_active:
+            raise serializers.ValidationError('This venue is not active for booking')
+        return value
+    
+    def validate_recurrence(self, value):
+        """Only bounded daily/weekly/monthly rules are accepted"""
+        rule = value.strip().upper()
+        if rule.startswith('RRULE:'):
+            rule = rule[len('RRULE:'):]
+        parts = dict(
+            part.split('=', 1) for part in rule.split(';') if '=' in part
+        )
+        if parts.get('FREQ') not in BookingSeries.ALLOWED_FREQUENCIES:
+            raise serializers.ValidationError(
+                f'FREQ must be one of: {", ".join(BookingSeries.ALLOWED_FREQUENCIES)}'
+            )
+        if 'COUNT' not in parts and 'UNTIL' not in parts:
+            raise serializers.ValidationError('Recurrence must end (COUNT or UNTIL is required)')
+        return value.strip()
+    
+    def validate(self, attrs):
+        """Validate the series and check every occurrence for conflicts in one query"""
+        errors = {}
+        today = timezone.now().date()
+        
+        if attrs['end_time'] <= attrs['start_time']:
+            errors['end_time'] = 'End time must be after start time'
+        
+        venue = attrs['venue']
+        if attrs['expected_attendees'] > venue.capacity:
+            errors['expected_attendees'] = f'Expected attendees ({attrs["expected_attendees"]}) exceed venue capacity ({venue.capacity})'
+        
+        try:
+            dates = expand_recurrence(
+                attrs['recurrence'],
+                attrs['start_date'],
+                attrs['start_time'],
+                limit=BookingSeries.MAX_OCCURRENCES + 1
+            )
+        except (ValueError, TypeError) as e:
+            raise serializers.ValidationError({'recurrence': f'Invalid recurrence rule: {e}'})
+        
+        if not dates:
+            errors['recurrence'] = 'Recurrence does not produce any occurrences'
+        elif len(dates) > BookingSeries.MAX_OCCURRENCES:
+            errors['recurrence'] = f'A series cannot have more than {BookingSeries.MAX_OCCURRENCES} occurrences'
+        elif dates[0] < today:
+            errors['start_date'] = 'Cannot book dates in the past'
+        elif (dates[-1] - today).days > 90:
+            errors['recurrence'] = f'Cannot book more than 90 days in advance (last occurrence is {dates[-1]})'
+        
+        if errors:
+            raise serializers.ValidationError(errors)
+        
+        conflicts = self._conflicts(venue, dates, attrs['start_time'], attrs['end_time'])
+        if conflicts:
+            raise serializers.ValidationError({'conflicts': conflicts})
+        
+        attrs['occurrence_dates'] = dates
+        return attrs
+    
+    def _conflicts(self, venue, dates, start_time, end_time):
+        """Describe every confirmed booking that clashes with an occurrence"""
+        conflicting = Booking.objects.filter(
+            venue=venue,
+            date__in=dates,
+            status='confirmed',
+            start_time__lt=end_time,
+            end_time__gt=start_time
+        ).order_by('date', 'start_time').values_list('date', 'event_name', 'start_time', 'end_time')
+        
+        return [
+            f'{booking_date}: conflicts with existing booking: {event_name} ({conflict_start}-{conflict_end})'
+            for booking_date, event_name, conflict_start, conflict_end in conflicting
+        ]
+    
+    def create(self, validated_data):
+        """Create the series and all of its occurrences"""
+        from .signals import bookings_bulk_created
+        
+        dates = validated_data.pop('occurrence_dates')
+        try:
+            with transaction.atomic():
+                series = BookingSeries.objects.create(**validated_data)
+                bookings = Booking.objects.bulk_create([
+                    Booking(
+                        venue=series.venue,
+                        user=series.user,
+                        series=series,
+                        event_name=series.event_name,
+                        event_description=series.event_description,
+                        date=occurrence_date,
+                        start_time=series.start_time,
+                        end_time=series.end_time,
+                        expected_attendees=series.expected_attendees,
+                        contact_number=series.contact_number,
+                        special_requirements=series.special_requirements,
+                        status='confirmed'
+                    )
+                    for occurrence_date in dates
+                ])
+                bookings_bulk_created.send(sender=Booking, bookings=bookings)
+        except IntegrityError:
+            # An overlapping booking was created since validation
+            conflicts = self._conflicts(
+                validated_data['venue'], dates,
+                validated_data['start_time'], validated_data['end_time']
+            )
+            if not conflicts:
+                raise
+            raise serializers.ValidationError({'conflicts': conflicts})
+        
+        return series
 
 
 class BookingUpdateSerializer(serializers.ModelSerializer):
@@ -151,7 +336,7 @@ class BookingCancelSerializer(serializers.Serializer):
         return instance
 
 
-class BookingListSerializer(serializers.ModelSerializer):
+class BookingListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Lightweight serializer for booking list"""
     
     venue_name = serializers.CharField(source='venue.name', read_only=True)
@@ -168,6 +353,10 @@ class BookingListSerializer(serializers.ModelSerializer):
             'status', 'cancellation_reason', 'cancelled_at', 'created_at'
         ]
         read_only_fields = ['id']
+        sparse_field_sources = {
+            'user_name': ['user__first_name', 'user__last_name'],
+            'requester_name': ['user__first_name', 'user__last_name'],
+        }
 
 
 class CheckAvailabilitySerializer(serializers.Serializer):
@@ -204,6 +393,216 @@ class CheckAvailabilitySerializer(serializers.Serializer):
         return attrs
 
 
+class AvailabilityGridSerializer(serializers.Serializer):
+    """Serializer for the multi-venue availability grid query"""
+    
+    MAX_VENUES = 50
+    MAX_DAYS = 31
+    
+    venue_ids = serializers.CharField(required=True)
+    start_date = serializers.DateField(required=True)
+    end_date = serializers.DateField(required=True)
+    slot_minutes = serializers.IntegerField(required=False, default=30, min_value=5, max_value=240)
+    
+    def validate_venue_ids(self, value):
+        """Parse comma-separated venue IDs and load the active venues in one query"""
+        from venue_management.models import Venue
+        try:
+            ids = sorted({int(part) for part in value.split(',') if part.strip()})
+        except ValueError:
+            raise serializers.ValidationError('venue_ids must be a comma-separated list of integers')
+        
+        if not ids:
+            raise serializers.ValidationError('At least one venue is required')
+        if len(ids) > self.MAX_VENUES:
+            raise serializers.ValidationError(f'At most {self.MAX_VENUES} venues can be requested at once')
+        
+        venues = list(Venue.objects.filter(id__in=ids, is_active=True).only('id', 'name'))
+        missing = set(ids) - {venue.id for venue in venues}
+        if missing:
+            raise serializers.ValidationError(
+                f'Venues not found or not active: {", ".join(str(i) for i in sorted(missing))}'
+            )
+        return venues
+    
+    def validate_slot_minutes(self, value):
+        """Slots must divide a day evenly"""
+        if (24 * 60) % value != 0:
+            raise serializers.ValidationError('slot_minutes must divide 1440 (minutes in a day) evenly')
+        return value
+    
+    def validate(self, attrs):
+        """Validate the date range"""
+        if attrs['end_date'] < attrs['start_date']:
+            raise serializers.ValidationError({
+                'end_date': 'End date must be on or after start date'
+            })
+        
+        if (attrs['end_date'] - attrs['start_date']).days >= self.MAX_DAYS:
+            raise serializers.ValidationError({
+                'end_date': f'Date range cannot exceed {self.MAX_DAYS} days'
+            })
+        
+        return attrs
+
+
+class FreeSlotSearchSerializer(serializers.Serializer):
+    """Serializer for the "next free slot" search across venues"""
+    
+    MAX_DAYS = 31
+    
+    duration_minutes = serializers.IntegerField(required=True, min_value=5, max_value=24 * 60)
+    attendees = serializers.IntegerField(required=False, default=1, min_value=1)
+    facilities = serializers.CharField(required=False, allow_blank=True, default='')
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    day_start = serializers.TimeField(required=False, default=time(8, 0))
+    day_end = serializers.TimeField(required=False, default=time(20, 0))
+    limit = serializers.IntegerField(required=False, default=5, min_value=1, max_value=50)
+    
+    def validate_facilities(self, value):
+        """Parse comma-separated facility names"""
+        return [item.strip() for item in value.split(',') if item.strip()]
+    
+    def validate(self, attrs):
+        """Fill in the default window and validate it"""
+        today = timezone.localdate()
+        start_date = attrs.get('start_date') or today
+        end_date = attrs.get('end_date') or start_date + timedelta(days=13)
+        
+        if start_date < today:
+            raise serializers.ValidationError({
+                'start_date': 'Cannot search past dates'
+            })
+        if end_date < start_date:
+            raise serializers.ValidationError({
+                'end_date': 'End date must be on or after start date'
+            })
+        if (end_date - start_date).days >= self.MAX_DAYS:
+            raise serializers.ValidationError({
+                'end_date': f'Date range cannot exceed {self.MAX_DAYS} days'
+            })
+        if (end_date - today).days > 90:
+            raise serializers.ValidationError({
+                'end_date': 'Cannot book more than 90 days in advance'
+            })
+        if attrs['day_end'] <= attrs['day_start']:
+            raise serializers.ValidationError({
+                'day_end': 'Day end must be after day start'
+            })
+        
+        attrs['start_date'] = start_date
+        attrs['end_date'] = end_date
+        return attrs
+
+
+class BookingExportSerializer(serializers.Serializer):
+    """Serializer for the booking export query (all filters optional)"""
+    
+    # 'format' is reserved by DRF for renderer selection
+    export_format = serializers.ChoiceField(choices=['csv', 'ndjson'], required=False, default='csv')
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    venue_ids = serializers.CharField(required=False, allow_blank=True)
+    status = serializers.ChoiceField(choices=Booking.STATUS_CHOICES, required=False)
+    
+    def validate_venue_ids(self, value):
+        """Parse comma-separated venue IDs"""
+        try:
+            return sorted({int(part) for part in value.split(',') if part.strip()})
+        except ValueError:
+            raise serializers.ValidationError('venue_ids must be a comma-separated list of integers')
+    
+    def validate(self, attrs):
+        """Validate the date range"""
+        start_date = attrs.get('start_date')
+        end_date = attrs.get('end_date')
+        if start_date and end_date and end_date < start_date:
+            raise serializers.ValidationError({
+                'end_date': 'End date must be on or after start date'
+            })
+        return attrs
+
+
+class UtilizationQuerySerializer(serializers.Serializer):
+    """Serializer for the venue utilization dashboard query"""
+    
+    MAX_DAYS = 366
+    
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    venue_ids = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate_venue_ids(self, value):
+        """Parse comma-separated venue IDs"""
+        try:
+            return sorted({int(part) for part in value.split(',') if part.strip()})
+        except ValueError:
+            raise serializers.ValidationError('venue_ids must be a comma-separated list of integers')
+    
+    def validate(self, attrs):
+        """Default to the last 30 days and validate the range"""
+        end_date = attrs.get('end_date') or timezone.localdate()
+        start_date = attrs.get('start_date') or end_date - timedelta(days=29)
+        
+        if end_date < start_date:
+            raise serializers.ValidationError({
+                'end_date': 'End date must be on or after start date'
+            })
+        if (end_date - start_date).days >= self.MAX_DAYS:
+            raise serializers.ValidationError({
+                'end_date': f'Date range cannot exceed {self.MAX_DAYS} days'
+            })
+        
+        attrs['start_date'] = start_date
+        attrs['end_date'] = end_date
+        return attrs
+
+
+class HeatmapQuerySerializer(serializers.Serializer):
+    """Serializer for the weekday x hour occupancy heatmap query"""
+    
+    MAX_DAYS = 10 * 366
+    
+    start_date = serializers.DateField(required=True)
+    end_date = serializers.DateField(required=True)
+    group_by = serializers.ChoiceField(choices=['venue', 'building'], required=False, default='venue')
+    venue_ids = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate_venue_ids(self, value):
+        """Parse comma-separated venue IDs"""
+        try:
+            return sorted({int(part) for part in value.split(',') if part.strip()})
+        except ValueError:
+            raise serializers.ValidationError('venue_ids must be a comma-separated list of integers')
+    
+    def validate(self, attrs):
+        """Validate the date range"""
+        if attrs['end_date'] < attrs['start_date']:
+            raise serializers.ValidationError({
+                'end_date': 'End date must be on or after start date'
+            })
+        if (attrs['end_date'] - attrs['start_date']).days >= self.MAX_DAYS:
+            raise serializers.ValidationError({
+                'end_date': f'Date range cannot exceed {self.MAX_DAYS} days'
+            })
+        return attrs
+
+
+class BookingSearchSerializer(serializers.Serializer):
+    """Serializer for the full-text booking search query"""
+    
+    q = serializers.CharField(required=True, max_length=200)
+    limit = serializers.IntegerField(required=False, default=20, min_value=1, max_value=100)
+    status = serializers.ChoiceField(choices=Booking.STATUS_CHOICES, required=False)
+    
+    def validate_q(self, value):
+        """Require at least one searchable word"""
+        if not any(character.isalnum() for character in value):
+            raise serializers.ValidationError('Search query must contain at least one letter or digit')
+        return value.strip()
+
+
 class VenueAdminSerializer(serializers.ModelSerializer):
     """Serializer for VenueAdmin model"""
     
@@ -238,7 +637,7 @@ class VenueAdminSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for Notification model"""
     
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
@@ -252,27 +651,56 @@ class NotificationSerializer(serializers.ModelSerializer):
             'related_booking_id', 'related_venue_id'
         ]
         read_only_fields = ['id', 'user', 'created_at', 'read_at', 'user_name', 'time_ago']
+        sparse_field_sources = {
+            'user_name': ['user__first_name', 'user__last_name'],
+            'time_ago': ['created_at'],
+        }
     
     def get_time_ago(self, obj):
         """Calculate time ago string"""
-        from django.utils import timezone
-        now = timezone.now()
-        diff = now - obj.created_at
-        
-        seconds = diff.total_seconds()
-        if seconds < 60:
-            return 'Just now'
-        elif seconds < 3600:
-            minutes = int(seconds / 60)
-            return f'{minutes} minute{"s" if minutes != 1 else ""} ago'
-        elif seconds < 86400:
-            hours = int(seconds / 3600)
-            return f'{hours} hour{"s" if hours != 1 else ""} ago'
-        elif seconds < 604800:
-            days = int(seconds / 86400)
-            return f'{days} day{"s" if days != 1 else ""} ago'
-        else:
-            return obj.created_at.strftime('%B %d, %Y')
+        return format_time_ago(obj.created_at)
+
+
+def format_time_ago(created_at, now=None):
+    """
+    Human readable age of a notification ('5 minutes ago', 'March 02, 2026').
+    
+    Args:
+        created_at (datetime): Creation time
+        now (datetime, optional): Reference time (default: timezone.now())
+    """
+    diff = (now or timezone.now()) - created_at
+    
+    seconds = diff.total_seconds()
+    if seconds < 60:
+        return 'Just now'
+    elif seconds < 3600:
+        minutes = int(seconds / 60)
+        return f'{minutes} minute{"s" if minutes != 1 else ""} ago'
+    elif seconds < 86400:
+        hours = int(seconds / 3600)
+        return f'{hours} hour{"s" if hours != 1 else ""} ago'
+    elif seconds < 604800:
+        days = int(seconds / 86400)
+        return f'{days} day{"s" if days != 1 else ""} ago'
+    else:
+        return created_at.strftime('%B %d, %Y')
+
+
+class NotificationSyncSerializer(serializers.Serializer):
+    """Serializer for notification delta-sync queries (?since_id= or ?since=)"""
+    
+    since_id = serializers.IntegerField(required=False, min_value=0)
+    since = serializers.DateTimeField(required=False)
+    limit = serializers.IntegerField(required=False, default=100, min_value=1, max_value=500)
+    
+    def validate(self, attrs):
+        """Require exactly one of since_id / since"""
+        if ('since_id' in attrs) == ('since' in attrs):
+            raise serializers.ValidationError({
+                'since_id': 'Provide either since_id or since'
+            })
+        return attrs
 
 
 class NotificationCreateSerializer(serializers.ModelSerializer):
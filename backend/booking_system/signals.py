@@ -0,0 +1,251 @@
+"""
+Signal handlers for the booking system.
+Keeps derived booking data in sync with the bookings table.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver, Signal
+
+from venue_management.models import Venue
+from .models import Booking, VenueAdmin, Notification
+from .interval_index import booking_index
+from . import availability_cache
+from .occupancy import refresh_day_occupancy, occupancy_changes, apply_occupancy_changes
+from .utilization import refresh_day_utilization, utilization_deltas, apply_utilization_deltas
+from .assignments import invalidate_assignments
+from .search import index_bookings, remove_bookings
+from utils.notification_utils import adjust_unread_count
+from .realtime import booking_change, publish_booking_change, publish_notification, publish_notifications
+
+
+# Sent after Booking.objects.bulk_create(), which skips post_save.
+# Provides: bookings (list of saved Booking objects)
+bookings_bulk_created = Signal()
+
+# Sent after Notification.objects.bulk_create() (utils.notification_utils.create_notifications).
+# Provides: notifications (list of saved Notification objects)
+notifications_bulk_created = Signal()
+
+# Fields whose change can alter availability data derived from a booking
+AVAILABILITY_FIELDS = {'venue', 'date', 'start_time', 'end_time', 'status', 'event_name'}
+
+# Fields whose change can alter the per-day occupancy/utilization tables
+DAY_SUMMARY_FIELDS = AVAILABILITY_FIELDS | {'expected_attendees', 'auto_cancelled'}
+
+# Booking and user fields copied into the full-text search index
+SEARCH_FIELDS = {'event_name', 'event_description', 'user'}
+USER_SEARCH_FIELDS = {'first_name', 'last_name', 'email', 'department'}
+
+
+def _affects(update_fields, fields=AVAILABILITY_FIELDS):
+    """Saves limited to other fields (confirmations, reminders) are ignored"""
+    return update_fields is None or bool(fields & set(update_fields))
+
+
+def _saved_values(instance, previous, update_fields):
+    """Booking.LOADED_FIELDS values stored by a save (partial saves keep the other fields)"""
+    current = instance.loaded_values()
+    if update_fields is None or previous is None:
+        return current
+    updated = {Booking._meta.get_field(name).attname for name in update_fields}
+    return tuple(
+        value if name in updated else old
+        for name, value, old in zip(Booking.LOADED_FIELDS, current, previous)
+    )
+
+
+def _sync_venue(venue_id, record=(), discard=()):
+    """
+    Bump the venue's availability version and apply the changes to the
+    interval index of this process.
+    """
+    new_version = availability_cache.bump_venue_version(venue_id)
+    for booking in record:
+        booking_index.record(booking)
+    for booking_id in discard:
+        booking_index.discard(booking_id)
+    booking_index.advance_version(venue_id, new_version - 1, new_version)
+
+
+@receiver(post_save, sender=Booking)
+def sync_availability_on_booking_save(sender, instance, update_fields=None, **kwargs):
+    """Refresh availability data once the write is committed"""
+    if not _affects(update_fields):
+        return
+    transaction.on_commit(lambda: _sync_venue(instance.venue_id, record=[instance]))
+
+
+def _refresh_utilization_on_commit(days):
+    transaction.on_commit(lambda: [refresh_day_utilization(venue_id, booking_date) for venue_id, booking_date in days])
+
+
+@receiver(post_save, sender=Booking)
+def refresh_day_summaries_on_booking_save(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+    Update occupancy in the same transaction as the booking write and
+    utilization once it commits
+    """
+    if not _affects(update_fields, DAY_SUMMARY_FIELDS):
+        return
+    previous = None if created else getattr(instance, '_loaded_values', None)
+    current = _saved_values(instance, previous, update_fields)
+    days = {(instance.venue_id, instance.date)}
+    loaded_slot = getattr(instance, '_loaded_slot', None)
+    if loaded_slot and None not in loaded_slot:
+        days.add(loaded_slot)
+    if created or previous is not None:
+        apply_occupancy_changes(occupancy_changes(previous, current))
+        deltas = utilization_deltas(previous, current)
+        transaction.on_commit(lambda: apply_utilization_deltas(deltas))
+    else:
+        # Previous values unknown (deferred fields or an unsaved copy)
+        for venue_id, booking_date in days:
+            refresh_day_occupancy(venue_id, booking_date)
+        _refresh_utilization_on_commit(days)
+    instance._loaded_values = current
+    instance._loaded_slot = (instance.venue_id, instance.date)
+
+
+@receiver(post_delete, sender=Booking)
+def sync_availability_on_booking_delete(sender, instance, **kwargs):
+    """Refresh availability data once the delete is committed"""
+    venue_id, booking_id = instance.venue_id, instance.id
+    transaction.on_commit(lambda: _sync_venue(venue_id, discard=[booking_id]))
+
+
+@receiver(post_delete, sender=Booking)
+def refresh_day_summaries_on_booking_delete(sender, instance, **kwargs):
+    """Update occupancy and utilization of the deleted booking's day"""
+    previous = getattr(instance, '_loaded_values', None)
+    if previous is not None:
+        apply_occupancy_changes(occupancy_changes(previous, None))
+        deltas = utilization_deltas(previous, None)
+        transaction.on_commit(lambda: apply_utilization_deltas(deltas))
+    else:
+        refresh_day_occupancy(instance.venue_id, instance.date)
+        _refresh_utilization_on_commit([(instance.venue_id, instance.date)])
+
+
+@receiver(post_save, sender=Booking)
+def index_booking_on_save(sender, instance, update_fields=None, **kwargs):
+    """Update the booking's search document in the same transaction"""
+    if _affects(update_fields, SEARCH_FIELDS):
+        index_bookings([instance])
+
+
+@receiver(post_delete, sender=Booking)
+def remove_booking_from_search_on_delete(sender, instance, **kwargs):
+    """Drop the deleted booking's search document"""
+    remove_bookings([instance.id])
+
+
+@receiver(post_save, sender=Booking)
+def push_booking_change_on_save(sender, instance, created=False, **kwargs):
+    """Push creations and status/confirmation changes to the owner's event stream"""
+    change = booking_change(instance, created, getattr(instance, '_loaded_state', None))
+    instance._loaded_state = (instance.status, instance.confirmed)
+    if change:
+        transaction.on_commit(lambda: publish_booking_change(instance, change))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reindex_bookings_on_user_save(sender, instance, created=False, update_fields=None, **kwargs):
+    """Requester names/departments are indexed with every booking of the user"""
+    if created or not _affects(update_fields, USER_SEARCH_FIELDS):
+        return
+    bookings = Booking.objects.filter(user=instance).only('id', 'event_name', 'event_description', 'user_id')
+    batch = []
+    for booking in bookings.iterator(chunk_size=1000):
+        booking.user = instance
+        batch.append(booking)
+        if len(batch) >= 1000:
+            index_bookings(batch)
+            batch = []
+    index_bookings(batch)
+
+
+@receiver(bookings_bulk_created)
+def sync_availability_on_bulk_create(sender, bookings, **kwargs):
+    """Refresh availability data and day summaries for bulk-created bookings"""
+    by_venue = {}
+    for booking in bookings:
+        by_venue.setdefault(booking.venue_id, []).append(booking)
+
+    def sync_all():
+        for venue_id, venue_bookings in by_venue.items():
+            _sync_venue(venue_id, record=venue_bookings)
+    transaction.on_commit(sync_all)
+
+    # One mask and one rollup update per venue/day, however many bookings it received
+    changes, deltas = {}, {}
+    for booking in bookings:
+        booking._loaded_values = booking.loaded_values()
+        occupancy_changes(None, booking._loaded_values, changes)
+        utilization_deltas(None, booking._loaded_values, deltas)
+    apply_occupancy_changes(changes)
+    transaction.on_commit(lambda: apply_utilization_deltas(deltas))
+    index_bookings(bookings)
+    transaction.on_commit(lambda: [publish_booking_change(booking, 'created') for booking in bookings])
+
+
+@receiver(post_save, sender=Venue)
+def invalidate_availability_on_venue_save(sender, instance, **kwargs):
+    """Venue changes (e.g. is_active toggles) invalidate its cached availability"""
+    venue_id = instance.id
+    transaction.on_commit(lambda: availability_cache.bump_venue_version(venue_id))
+
+
+def _invalidate_assignments(user_ids):
+    """Drop cached assignments now (for reads in this transaction) and after commit"""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    for user_id in user_ids:
+        invalidate_assignments(user_id)
+    transaction.on_commit(lambda: [invalidate_assignments(user_id) for user_id in user_ids])
+
+
+@receiver(pre_save, sender=VenueAdmin)
+def remember_previous_venue_admin_user(sender, instance, **kwargs):
+    """An assignment moved to another user must invalidate the old user too"""
+    instance._previous_user_id = None
+    if instance.pk:
+        instance._previous_user_id = VenueAdmin.objects.filter(pk=instance.pk).values_list(
+            'user_id', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=VenueAdmin)
+def invalidate_assignments_on_venue_admin_save(sender, instance, **kwargs):
+    """Refresh the cached venue assignments of the affected hall admin(s)"""
+    _invalidate_assignments([instance.user_id, getattr(instance, '_previous_user_id', None)])
+
+
+@receiver(post_delete, sender=VenueAdmin)
+def invalidate_assignments_on_venue_admin_delete(sender, instance, **kwargs):
+    """Refresh the cached venue assignments of the hall admin"""
+    _invalidate_assignments([instance.user_id])
+
+
+@receiver(post_save, sender=Notification)
+def count_unread_notification_on_create(sender, instance, created=False, **kwargs):
+    """Every new unread notification bumps its user's cached unread count"""
+    if created and not instance.is_read:
+        adjust_unread_count(instance.user_id, 1)
+
+
+@receiver(post_save, sender=Notification)
+def push_notification_on_create(sender, instance, created=False, **kwargs):
+    """Push new notifications to the user's event stream (after the count is updated)"""
+    if created:
+        transaction.on_commit(lambda: publish_notification(instance))
+
+
+@receiver(notifications_bulk_created)
+def count_and_push_bulk_created_notifications(sender, notifications, **kwargs):
+    """Bulk-created notifications skip post_save: update counters and streams here"""
+    unread = Counter(notification.user_id for notification in notifications if not notification.is_read)
+    for user_id, count in unread.items():
+        adjust_unread_count(user_id, count)
+    transaction.on_commit(lambda: publish_notifications(notifications))
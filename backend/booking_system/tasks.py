@@ -4,6 +4,7 @@ Handles reminders, auto-cancellation, and waitlist processing.
 """
 
 from celery import shared_task
+from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
 from datetime import timedelta, datetime, time as datetime_time
@@ -85,6 +86,7 @@ def auto_cancel_unconfirmed_bookings(self):
     """
     from booking_system.models import Booking
     from utils.email_utils import send_auto_cancel_email
+    from utils.notification_utils import build_booking_cancelled, create_notifications
     
     logger.info("Starting auto_cancel_unconfirmed_bookings task")
     
@@ -105,9 +107,10 @@ def auto_cancel_unconfirmed_bookings(self):
             status='confirmed',
             confirmed=False,
             reminder_sent=True  # Only cancel if reminder was sent
-        )
+        ).select_related('user', 'venue')
         
         cancelled_count = 0
+        notifications = []
         
         for booking in bookings_to_cancel:
             try:
@@ -133,11 +136,15 @@ def auto_cancel_unconfirmed_bookings(self):
                     )
                     
                     cancelled_count += 1
+                    notifications.append(build_booking_cancelled(booking))
                     logger.info(f"✓ Auto-cancelled booking {booking.id}")
                     
             except Exception as e:
                 logger.error(f"Error auto-cancelling booking {booking.id}: {e}")
         
+        # In-app notifications for every owner in one INSERT
+        create_notifications(notifications)
+        
         result = {
             'cancelled': cancelled_count,
             'timestamp': now.isoformat()
@@ -241,7 +248,7 @@ def notify_waitlist_users(self, venue_id, date_str, start_time_str, end_time_str
             notified=False,
             claimed=False,
             expired=False
-        ).order_by('priority', 'created_at').first()
+        ).select_related('user', 'venue').order_by('priority', 'created_at').first()
         
         if waitlist_entry:
             # Send notification email
@@ -254,9 +261,9 @@ def notify_waitlist_users(self, venue_id, date_str, start_time_str, end_time_str
                 logger.info(f"✓ Notified user {waitlist_entry.user.email} for waitlist entry {waitlist_entry.id}")
                 
                 # Create in-app notification
-                from booking_system.models import Notification
-                Notification.objects.create(
-                    user=waitlist_entry.user,
+                from utils.notification_utils import notify_many
+                notify_many(
+                    [waitlist_entry.user],
                     notification_type='waitlist',
                     title='🎉 Venue Slot Available!',
                     message=f'{waitlist_entry.venue.name} is now available on {waitlist_entry.date.strftime("%B %d, %Y")} at {waitlist_entry.start_time.strftime("%I:%M %p")}. You have 15 minutes to claim it!',
@@ -279,3 +286,62 @@ def notify_waitlist_users(self, venue_id, date_str, start_time_str, end_time_str
     except Exception as exc:
         logger.error(f"Error in notify_waitlist_users: {exc}")
         raise self.retry(exc=exc, countdown=60)
+
+
+@shared_task(bind=True, max_retries=3)
+def reconcile_unread_notification_counts(self):
+    """
+    Periodic task: Runs every 15 minutes
+    Drops the cached per-user unread notification counters so they are
+    recounted from the notifications table, repairing any drift. Needs the
+    shared (Redis) cache the web workers use; a no-op with a per-process cache
+    """
+    from utils.notification_utils import reconcile_unread_counts
+    
+    try:
+        reconciled = reconcile_unread_counts()
+        logger.info(f"Reconciled unread notification counts of {reconciled} user(s)")
+        return {'reconciled': reconciled}
+    except Exception as exc:
+        logger.error(f"Error in reconcile_unread_notification_counts: {exc}")
+        raise self.retry(exc=exc, countdown=60)
+
+
+@shared_task(bind=True, max_retries=3)
+def archive_old_notifications(self):
+    """
+    Periodic task: Runs daily at 03:30
+    Moves notifications older than NOTIFICATION_RETENTION_DAYS to the
+    archive table (or deletes them) in small primary-key batches
+    """
+    from booking_system.retention import expire_notifications
+    
+    logger.info("Starting archive_old_notifications task")
+    
+    try:
+        result = expire_notifications()
+        logger.info(f"Notification retention complete: {result['expired']} notification(s) {result['mode']}d in {result['batches']} batch(es)")
+        return result
+    except Exception as exc:
+        logger.error(f"Error in archive_old_notifications: {exc}")
+        raise self.retry(exc=exc, countdown=300)
+
+
+@shared_task(bind=True, max_retries=3)
+def reconcile_venue_utilization(self):
+    """
+    Periodic task: Runs daily at 02:45
+    Rebuilds the utilization rollups of the last UTILIZATION_RECONCILE_DAYS
+    days and all future days from the bookings table, repairing any drift
+    in the incrementally updated counters
+    """
+    from booking_system.utilization import rebuild_utilization
+    
+    try:
+        start_date = timezone.now().date() - timedelta(days=getattr(settings, 'UTILIZATION_RECONCILE_DAYS', 30))
+        written = rebuild_utilization(start_date=start_date)
+        logger.info(f"Reconciled utilization of {written} venue/day(s) from {start_date}")
+        return {'written': written, 'start_date': str(start_date)}
+    except Exception as exc:
+        logger.error(f"Error in reconcile_venue_utilization: {exc}")
+        raise self.retry(exc=exc, countdown=300)
@@ -1,3 +1,1586 @@
-from django.test import TestCase
+from datetime import datetime, time, timedelta
+from unittest import mock
+from urllib.parse import urlencode
+import asyncio
+import json
+import time as time_module
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.sql import emit_post_migrate_signal
+from django.db import IntegrityError, connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date, parse_http_date
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from venue_management.models import Venue
+from utils.fast_serializers import FastSerializer
+from utils.notification_utils import create_notifications, get_unread_count, notify_many, reconcile_unread_counts
+from utils.pubsub import MemoryBroker, RedisBroker, get_broker
+from utils.query_budget import QueryBudgetExceeded, assert_query_budget
+from . import availability_cache
+from .export import stream_ndjson
+from .fast_serializers import BookingListFastSerializer
+from .ics import feed_window
+from .interval_index import BookingIntervalIndex, DayIntervals, booking_index
+from .models import Booking, BookingSeries, Notification, NotificationArchive, VenueAdmin, VenueDailyUtilization
+from .occupancy import get_masks, interval_mask
+from .overlap_guard import missing_guards
+from .realtime import EVENT_STREAM_PATH, VENUE_SOCKET_PATH, EventStream, VenueSocket, publish_notification
+from .retention import expire_notifications
+from .search import rebuild_search_index, remove_bookings
+from .serializers import BookingListSerializer, BookingSeriesCreateSerializer, NotificationSerializer
+from .signals import notifications_bulk_created
+from .tasks import auto_cancel_unconfirmed_bookings, reconcile_venue_utilization
+from .utilization import ROLLUP_FIELDS, rebuild_utilization
+from .views import BookingViewSet
+
+
+@override_settings(PUBSUB={'BACKEND': 'memory'})
+class BookingTestCase(TestCase):
+    """
+    Shared fixtures: a super admin, an HOD, a hall admin assigned to the
+    first venue, two venues and a day in the near future.
+    Celery is reported unavailable so emails are sent synchronously, and
+    realtime events go through the in-memory broker.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            'admin@pccoe.edu', 'password', first_name='Super', last_name='Admin', role='super_admin'
+        )
+        cls.hod = User.objects.create_user(
+            'hod@pccoe.edu', 'password', first_name='Head', last_name='Dept', role='hod', department='Computer'
+        )
+        cls.hall_admin = User.objects.create_user(
+            'hall@pccoe.edu', 'password', first_name='Hall', last_name='Admin', role='hall_admin'
+        )
+        cls.venue = Venue.objects.create(
+            name='LRDC Hall', location='Main', building='A', floor='1', capacity=100, facilities=['Projector']
+        )
+        cls.other_venue = Venue.objects.create(
+            name='Seminar Hall', location='Main', building='B', floor='2', capacity=50, facilities=['AC']
+        )
+        VenueAdmin.objects.create(user=cls.hall_admin, venue=cls.venue)
+        cls.day = timezone.now().date() + timedelta(days=3)
+
+    def setUp(self):
+        patcher = mock.patch('utils.email_utils.is_celery_available', return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def make_booking(self, start, end, venue=None, day=None, user=None, **fields):
+        return Booking.objects.create(
+            venue=venue or self.venue,
+            user=user or self.hod,
+            event_name=fields.pop('event_name', 'Guest Lecture'),
+            date=day or self.day,
+            start_time=start,
+            end_time=end,
+            contact_number='9999999999',
+            expected_attendees=fields.pop('expected_attendees', 20),
+            **fields
+        )
+
+    def booking_payload(self, start='11:00', end='12:00', **fields):
+        return {
+            'venue': self.venue.id,
+            'date': str(self.day),
+            'start_time': start,
+            'end_time': end,
+            'event_name': 'Workshop',
+            'expected_attendees': 20,
+            'contact_number': '9999999999',
+            **fields
+        }
+
+
+@override_settings(QUERY_BUDGET_RAISE=True)
+class QueryBudgetTests(BookingTestCase):
+    """Pin the query counts of hot endpoints to their QUERY_BUDGETS entries"""
+
+    def budget(self, url_name, method):
+        return settings.QUERY_BUDGETS[(url_name, method)]
+
+    def test_list_does_not_grow_with_bookings(self):
+        for offset in range(20):
+            self.make_booking(time(9), time(10), day=self.day + timedelta(days=offset))
+        client = self.client_for(self.hod)
+
+        with assert_query_budget(self.budget('booking-list', 'GET')):
+            response = client.get('/api/bookings/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 20)
+
+    def test_check_availability(self):
+        self.make_booking(time(9), time(10))
+        client = self.client_for(self.hod)
+
+        with assert_query_budget(self.budget('booking-check-availability', 'POST')):
+            response = client.post('/api/bookings/check_availability/', {
+                'venue': self.venue.id, 'date': str(self.day), 'start_time': '09:30', 'end_time': '10:30'
+            }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json()['available'])
+
+    def test_create_including_after_commit_work(self):
+        self.make_booking(time(9), time(10))
+        client = self.client_for(self.hod)
+
+        with assert_query_budget(self.budget('booking-list', 'POST')):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = client.post('/api/bookings/', self.booking_payload(), format='json')
+
+        self.assertEqual(response.status_code, 201)
+
+    def test_budgets_are_per_method(self):
+        client = self.client_for(self.hod)
+
+        with override_settings(QUERY_BUDGETS={('booking-list', 'GET'): 0}):
+            with self.assertRaises(QueryBudgetExceeded):
+                client.get('/api/bookings/')
+            response = client.post('/api/bookings/', self.booking_payload(), format='json')
+
+        self.assertEqual(response.status_code, 201)
+
+
+class CalendarFeedTests(BookingTestCase):
+
+    def feed_url(self, user):
+        response = self.client_for(user).get('/api/bookings/calendar_feed/')
+        return response.json()['url']
+
+    def test_etag_changes_when_a_booking_is_deleted(self):
+        booking = self.make_booking(time(9), time(10), status='confirmed')
+        self.make_booking(time(11), time(12), status='confirmed')
+        url = self.feed_url(self.hod)
+
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        booking.delete()
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second.content.count(b'BEGIN:VEVENT'), 1)
+
+    def test_password_change_revokes_token(self):
+        url = self.feed_url(self.hod)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.hod.set_password('new-password')
+        self.hod.save()
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    @override_settings(ICS_FEED_TOKEN_MAX_AGE=-1)
+    def test_token_expires(self):
+        self.assertEqual(self.client.get(self.feed_url(self.hod)).status_code, 404)
+
+    def test_if_modified_since(self):
+        booking = self.make_booking(time(9), time(10))
+        url = self.feed_url(self.hod)
+        first = self.client.get(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 304)
+
+        Booking.objects.filter(pk=booking.pk).update(
+            event_name='Moved', updated_at=timezone.now() + timedelta(minutes=1)
+        )
+        second = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(second.status_code, 200)
+        self.assertIn(b'SUMMARY:Moved', second.content)
+        self.assertNotEqual(second['Last-Modified'], first['Last-Modified'])
+
+    def test_if_none_match_takes_precedence(self):
+        url = self.feed_url(self.hod)
+        first = self.client.get(url)
+        self.make_booking(time(9), time(10))
+
+        # Fresh date but stale entity tag: the tag decides
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH=first['ETag'], HTTP_IF_MODIFIED_SINCE=http_date(time_module.time() + 60)
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_last_modified_follows_the_window_start(self):
+        old = self.make_booking(time(9), time(10))
+        Booking.objects.filter(pk=old.pk).update(updated_at=timezone.now() - timedelta(days=400))
+        start, _ = feed_window()
+
+        response = self.client.get(self.feed_url(self.hod))
+        self.assertEqual(
+            parse_http_date(response['Last-Modified']),
+            int(timezone.make_aware(datetime.combine(start, time.min)).timestamp())
+        )
+
+    def test_venue_feed(self):
+        self.make_booking(time(9), time(10), event_name='Seminar', status='confirmed')
+        self.make_booking(time(11), time(12), venue=self.other_venue)
+        url = f'/api/venues/{self.venue.id}/calendar.ics'
+
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['Content-Type'], 'text/calendar; charset=utf-8')
+        self.assertEqual(first.content.count(b'BEGIN:VEVENT'), 1)
+        self.assertIn(b'SUMMARY:Seminar', first.content)
+        self.assertIn('public', first['Cache-Control'])
+
+        Venue.objects.filter(pk=self.venue.pk).update(name='Renamed Hall', updated_at=timezone.now() + timedelta(minutes=1))
+        second = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(second.status_code, 200)
+        self.assertIn(b'Renamed Hall', second.content)
+
+
+class AssignmentTests(BookingTestCase):
+
+    def test_revoked_assignment_is_not_served_from_a_local_cache(self):
+        from .assignments import is_assigned
+
+        self.assertTrue(is_assigned(self.hall_admin, self.venue))
+        # Queryset deletes skip the signals that drop the cached entry
+        VenueAdmin.objects.filter(user=self.hall_admin).delete()
+        self.assertFalse(is_assigned(self.hall_admin, self.venue))
+
+
+class UnreadCountTests(BookingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def notify(self, count):
+        Notification.objects.bulk_create([
+            Notification(user=self.hod, notification_type='booking_confirmed', title='Confirmed', message='Confirmed')
+            for _ in range(count)
+        ])
+
+    def test_counts_from_the_database_without_a_shared_cache(self):
+        self.notify(2)
+        self.assertEqual(get_unread_count(self.hod), 2)
+        self.notify(1)
+        self.assertEqual(get_unread_count(self.hod), 3)
+
+    @mock.patch('utils.notification_utils.cache_is_shared', return_value=True)
+    def test_counter_created_concurrently_is_kept(self, _):
+        self.notify(2)
+        key = f'notifications:unread:{self.hod.pk}'
+        real_add = cache.add
+
+        def racing_add(*args, **kwargs):
+            # Another request stores and adjusts the counter first
+            real_add(key, 5)
+            return real_add(*args, **kwargs)
+
+        with mock.patch.object(cache, 'add', side_effect=racing_add):
+            self.assertEqual(get_unread_count(self.hod), 5)
+        self.assertEqual(cache.get(key), 5)
+
+    @mock.patch('utils.notification_utils.cache_is_shared', return_value=True)
+    def test_counter_follows_creates_reads_and_deletes(self, _):
+        key = f'notifications:unread:{self.hod.pk}'
+        self.assertEqual(get_unread_count(self.hod), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            notifications = [
+                Notification.objects.create(user=self.hod, notification_type='booking_confirmed', title=f'N{i}', message='N')
+                for i in range(3)
+            ]
+        self.assertEqual(cache.get(key), 3)
+        client = self.client_for(self.hod)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(f'/api/notifications/{notifications[0].id}/mark_read/')
+        self.assertEqual(cache.get(key), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.delete(f'/api/notifications/{notifications[1].id}/')
+        self.assertEqual(cache.get(key), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post('/api/notifications/mark_all_read/')
+        self.assertEqual(cache.get(key), 0)
+        self.assertEqual(client.get('/api/notifications/unread_count/').json(), {'unread_count': 0})
+
+    @mock.patch('utils.notification_utils.cache_is_shared', return_value=True)
+    def test_reconcile_drops_drifted_counters(self, _):
+        self.notify(2)
+        key = f'notifications:unread:{self.hod.pk}'
+        cache.set(key, 7)
+
+        self.assertEqual(reconcile_unread_counts(), User.objects.count())
+        self.assertIsNone(cache.get(key))
+        # An increment between the reconcile and the next read is not lost
+        self.notify(1)
+        self.assertEqual(get_unread_count(self.hod), 3)
+        self.assertEqual(cache.get(key), 3)
+
+    def test_reconcile_is_a_no_op_without_a_shared_cache(self):
+        self.assertEqual(reconcile_unread_counts(), 0)
+
+    def test_bulk_created_notifications_are_published_once_per_user(self):
+        notifications = [
+            Notification(user=user, notification_type='booking_confirmed', title='Confirmed', message='Confirmed')
+            for user in (self.hod, self.hod, self.hod, self.admin)
+        ]
+
+        with mock.patch('booking_system.realtime.publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                create_notifications(notifications)
+
+        messages = {call.args[0]: call.args[1] for call in publish.call_args_list}
+        self.assertEqual(publish.call_count, 2)
+        self.assertEqual(len(messages[f'user:{self.hod.pk}']['data']['notifications']), 3)
+        self.assertEqual(messages[f'user:{self.hod.pk}']['data']['unread_count'], 3)
+        self.assertEqual(messages[f'user:{self.admin.pk}']['event'], 'notifications')
+
+
+class NotificationFanOutTests(BookingTestCase):
+
+    @mock.patch('utils.notification_utils.cache_is_shared', return_value=True)
+    def test_notify_many_inserts_once_and_updates_counters(self, _):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        for user in (self.hod, self.admin):
+            get_unread_count(user)
+        receiver = mock.Mock()
+        notifications_bulk_created.connect(receiver)
+        self.addCleanup(notifications_bulk_created.disconnect, receiver)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(1):
+                created = notify_many(
+                    [self.hod, self.admin, self.hod], notification_type='system',
+                    title='Maintenance', message='Maintenance tonight'
+                )
+
+        self.assertEqual(len(created), 2)
+        receiver.assert_called_once()
+        self.assertEqual(len(receiver.call_args.kwargs['notifications']), 2)
+        self.assertEqual(cache.get(f'notifications:unread:{self.hod.pk}'), 1)
+        self.assertEqual(cache.get(f'notifications:unread:{self.admin.pk}'), 1)
+
+
+class OverlapTests(BookingTestCase):
+
+    def test_database_rejects_overlapping_confirmed_bookings(self):
+        self.make_booking(time(9), time(10))
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.make_booking(time(9, 30), time(10, 30))
+        # Touching slots, other venues and cancelled bookings are fine
+        self.make_booking(time(10), time(11))
+        self.make_booking(time(9), time(10), venue=self.other_venue)
+        self.make_booking(time(9), time(10), status='cancelled')
+
+    def test_race_past_validation_is_reported_as_400(self):
+        self.make_booking(time(11), time(12), event_name='Seminar')
+        client = self.client_for(self.hod)
+
+        # Validation sees a stale "free" slot; the insert hits the trigger
+        with mock.patch('booking_system.serializers.booking_index.has_conflict', return_value=False):
+            response = client.post('/api/bookings/', self.booking_payload('11:30', '12:30'), format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Seminar', response.json()['time_slot'][0])
+        self.assertEqual(Booking.objects.filter(venue=self.venue, date=self.day).count(), 1)
+
+    def test_guard_is_in_place_after_migrate(self):
+        self.assertEqual(missing_guards(connection), [])
+
+    def test_guard_dropped_by_a_table_rebuild_is_recreated_after_migrate(self):
+        self.make_booking(time(9), time(10))
+        # What a SQLite table rebuild does to the triggers
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER bookings_no_overlap_insert')
+        self.assertEqual(missing_guards(connection), ['bookings_no_overlap_insert'])
+
+        with self.assertLogs('booking_system.overlap_guard', 'WARNING'):
+            emit_post_migrate_signal(verbosity=0, interactive=False, db=connection.alias)
+
+        self.assertEqual(missing_guards(connection), [])
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.make_booking(time(9, 30), time(10, 30))
+
+
+@mock.patch('booking_system.interval_index.cache_is_shared', return_value=True)
+@mock.patch('booking_system.availability_cache.cache_is_shared', return_value=True)
+class AvailabilityCacheTests(BookingTestCase):
+    """Cached availability must follow writes when the cache is shared"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def check(self, client, start='09:00', end='10:00'):
+        response = client.post('/api/bookings/check_availability/', {
+            'venue': self.venue.id, 'date': str(self.day), 'start_time': start, 'end_time': end
+        }, format='json')
+        return response.json()['available']
+
+    def calendar_ids(self):
+        response = self.client.get('/api/bookings/public_calendar/', {
+            'start_date': str(self.day), 'end_date': str(self.day)
+        })
+        return [booking['id'] for booking in response.json()['bookings']]
+
+    def test_create_and_cancel_refresh_cached_days(self, *mocks):
+        client = self.client_for(self.hod)
+        self.assertTrue(self.check(client))
+        self.assertEqual(self.calendar_ids(), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post('/api/bookings/', self.booking_payload('09:00', '10:00'), format='json')
+        self.assertEqual(response.status_code, 201)
+        booking_id = Booking.objects.get(venue=self.venue, date=self.day).id
+        self.assertFalse(self.check(client))
+        self.assertEqual(self.calendar_ids(), [booking_id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(f'/api/bookings/{booking_id}/cancel/', {'cancellation_reason': 'Moved'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.check(client))
+        self.assertEqual(self.calendar_ids(), [])
+
+
+def slot_bitmap(slots_per_day, busy):
+    return ''.join('1' if slot in busy else '0' for slot in range(slots_per_day))
+
+
+class AvailabilityGridTests(BookingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.make_booking(time(9), time(10, 30))
+        self.make_booking(time(14), time(14, 20))
+        self.make_booking(time(16), time(17), status='cancelled')
+        self.make_booking(time(12), time(13), venue=self.other_venue, day=self.day + timedelta(days=1))
+
+    def grid(self, **params):
+        query = {
+            'venue_ids': f'{self.venue.id},{self.other_venue.id}',
+            'start_date': str(self.day),
+            'end_date': str(self.day + timedelta(days=1)),
+            **params
+        }
+        return self.client_for(self.hod).get('/api/bookings/availability_grid/', query)
+
+    def test_occupancy_masks_answer_whole_cell_slots(self):
+        response = self.grid(slot_minutes=30)
+
+        self.assertEqual(response.status_code, 200)
+        venues = {venue['id']: venue['days'] for venue in response.json()['venues']}
+        self.assertEqual(venues[self.venue.id], {
+            str(self.day): slot_bitmap(48, {18, 19, 20, 28}),
+            str(self.day + timedelta(days=1)): slot_bitmap(48, set()),
+        })
+        self.assertEqual(venues[self.other_venue.id][str(self.day + timedelta(days=1))], slot_bitmap(48, {24, 25}))
+
+    def test_other_slot_sizes_are_built_from_bookings(self):
+        response = self.grid(slot_minutes=20)
+
+        self.assertEqual(response.json()['slots_per_day'], 72)
+        days = response.json()['venues'][0]['days']
+        self.assertEqual(days[str(self.day)], slot_bitmap(72, {27, 28, 29, 30, 31, 42}))
+
+    def test_one_query_per_source_regardless_of_range(self):
+        with self.assertNumQueries(2):
+            self.grid(slot_minutes=30, end_date=str(self.day + timedelta(days=20)))
+
+    def test_rejects_unknown_venues_and_long_ranges(self):
+        response = self.grid(venue_ids=f'{self.venue.id},999999')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('999999', response.json()['venue_ids'][0])
+
+        response = self.grid(end_date=str(self.day + timedelta(days=31)))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('end_date', response.json())
+
+        response = self.grid(slot_minutes=7)
+        self.assertEqual(response.status_code, 400)
+
+
+class FindSlotsTests(BookingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.make_booking(time(8), time(9, 30))
+        self.make_booking(time(10), time(12))
+
+    def find(self, **params):
+        query = {'start_date': str(self.day), 'end_date': str(self.day), **params}
+        return self.client_for(self.hod).get('/api/bookings/find_slots/', query)
+
+    def slots(self, response):
+        return [
+            (result['venue']['name'], result['start_time'], result['end_time'], result['free_until'])
+            for result in response.json()['results']
+        ]
+
+    def test_first_gap_long_enough_is_returned(self):
+        response = self.find(duration_minutes=90, attendees=60)
+
+        self.assertEqual(response.json()['venues_searched'], 1)
+        # 09:30-10:00 is free but too short
+        self.assertEqual(self.slots(response), [('LRDC Hall', '12:00:00', '13:30:00', '20:00:00')])
+
+    def test_results_are_ordered_by_start_across_venues(self):
+        response = self.find(duration_minutes=30, day_start='09:00', day_end='18:00')
+
+        self.assertEqual(self.slots(response), [
+            ('Seminar Hall', '09:00:00', '09:30:00', '18:00:00'),
+            ('LRDC Hall', '09:30:00', '10:00:00', '10:00:00'),
+            ('LRDC Hall', '12:00:00', '12:30:00', '18:00:00'),
+        ])
+
+    def test_venues_need_every_requested_facility(self):
+        response = self.find(duration_minutes=60, facilities='AC')
+        self.assertEqual([slot[0] for slot in self.slots(response)], ['Seminar Hall'])
+
+        response = self.find(duration_minutes=60, facilities='AC,Projector')
+        self.assertEqual(response.json(), {'duration_minutes': 60, 'venues_searched': 0, 'results': []})
+
+    def test_later_days_are_searched_when_the_first_is_full(self):
+        self.make_booking(time(12), time(20))
+
+        response = self.find(duration_minutes=60, attendees=60, end_date=str(self.day + timedelta(days=1)), limit=1)
+
+        result = response.json()['results'][0]
+        self.assertEqual((result['date'], result['start_time']), (str(self.day + timedelta(days=1)), '08:00:00'))
+
+    def test_times_already_past_today_are_skipped(self):
+        today = timezone.localdate()
+        now = timezone.make_aware(datetime.combine(today, time(10, 7, 30)))
+
+        with mock.patch('django.utils.timezone.localtime', return_value=now):
+            response = self.find(duration_minutes=30, attendees=60, start_date=str(today), end_date=str(today))
+
+        self.assertEqual(self.slots(response)[0][1], '10:08:00')
+
+    def test_rejects_an_empty_day_window(self):
+        response = self.find(duration_minutes=30, day_start='18:00', day_end='09:00')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('day_end', response.json())
+
+
+class BookingSeriesTests(BookingTestCase):
+
+    def series_payload(self, **fields):
+        return {
+            'venue': self.venue.id,
+            'event_name': 'Weekly Seminar',
+            'start_date': str(self.day),
+            'start_time': '09:00',
+            'end_time': '10:00',
+            'recurrence': 'FREQ=WEEKLY;COUNT=4',
+            'expected_attendees': 20,
+            'contact_number': '9999999999',
+            **fields
+        }
+
+    def create(self, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client_for(self.hod).post('/api/booking-series/', self.series_payload(**fields), format='json')
+
+    def test_occurrences_are_created_and_synced(self):
+        response = self.create()
+
+        self.assertEqual(response.status_code, 201)
+        dates = [self.day + timedelta(weeks=week) for week in range(4)]
+        self.assertEqual(sorted(occurrence['date'] for occurrence in response.json()['occurrences']), [str(d) for d in dates])
+        # The bulk insert bypasses post_save; the bulk signal keeps derived state in step
+        masks = get_masks([self.venue.id], dates[0], dates[-1])
+        self.assertEqual(masks, {(self.venue.id, d): interval_mask(time(9), time(10)) for d in dates})
+        self.assertTrue(all(booking_index.has_conflict(self.venue.id, d, time(9, 30), time(9, 45)) for d in dates))
+
+    def test_every_conflicting_occurrence_is_reported_in_one_query(self):
+        self.make_booking(time(9, 30), time(11), day=self.day + timedelta(weeks=1), event_name='Exam')
+        self.make_booking(time(8), time(9, 15), day=self.day + timedelta(weeks=3), event_name='Talk')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.create()
+
+        self.assertEqual(response.status_code, 400)
+        conflicts = response.json()['conflicts']
+        self.assertEqual(len(conflicts), 2)
+        self.assertIn('Exam', conflicts[0])
+        self.assertIn('Talk', conflicts[1])
+        booking_queries = [query for query in queries.captured_queries if 'FROM "bookings"' in query['sql']]
+        self.assertEqual(len(booking_queries), 1)
+        self.assertFalse(BookingSeries.objects.exists())
+
+    def test_overlap_created_after_validation_rolls_back_the_series(self):
+        check_conflicts = BookingSeriesCreateSerializer._conflicts
+        calls = []
+
+        def stale_first_check(serializer, *args):
+            calls.append(args)
+            if len(calls) == 1:
+                # Another request books week 2 between validation and insert
+                self.make_booking(time(9), time(10), day=self.day + timedelta(weeks=2), event_name='Exam')
+                return []
+            return check_conflicts(serializer, *args)
+
+        with mock.patch.object(BookingSeriesCreateSerializer, '_conflicts', stale_first_check):
+            response = self.create()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Exam', response.json()['conflicts'][0])
+        self.assertFalse(BookingSeries.objects.exists())
+        self.assertEqual(Booking.objects.filter(venue=self.venue).count(), 1)
+
+    def test_unbounded_or_oversized_rules_are_rejected(self):
+        response = self.create(recurrence='FREQ=WEEKLY')
+        self.assertIn('recurrence', response.json())
+
+        response = self.create(recurrence='FREQ=DAILY;COUNT=60')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('52', response.json()['recurrence'][0])
+
+
+class OccupancyTests(BookingTestCase):
+
+    def masks(self, *days):
+        days = days or (self.day,)
+        return get_masks([self.venue.id, self.other_venue.id], min(days), max(days))
+
+    def test_new_bookings_are_ored_in_without_a_rebuild(self):
+        with mock.patch('booking_system.occupancy.refresh_day_occupancy') as refresh:
+            self.make_booking(time(9), time(9, 20))
+            self.make_booking(time(9, 20), time(10))
+
+        refresh.assert_not_called()
+        self.assertEqual(self.masks(), {(self.venue.id, self.day): interval_mask(time(9), time(10))})
+
+    def test_cancel_keeps_cells_shared_with_other_bookings(self):
+        lecture = self.make_booking(time(9), time(9, 20))
+        self.make_booking(time(9, 20), time(10))
+
+        response = self.client_for(self.hod).post(f'/api/bookings/{lecture.id}/cancel/', {'cancellation_reason': 'Moved online'})
+
+        self.assertEqual(response.status_code, 200)
+        # 09:15-09:30 is still half-booked by the second booking
+        self.assertEqual(self.masks(), {(self.venue.id, self.day): interval_mask(time(9, 15), time(10))})
+
+    def test_moving_a_booking_frees_the_old_slot(self):
+        booking = self.make_booking(time(9), time(10))
+        next_day = self.day + timedelta(days=1)
+
+        booking = Booking.objects.get(id=booking.id)
+        booking.venue = self.other_venue
+        booking.date = next_day
+        booking.start_time = time(14)
+        booking.end_time = time(15)
+        booking.save()
+
+        self.assertEqual(self.masks(self.day, next_day), {
+            (self.venue.id, self.day): 0,
+            (self.other_venue.id, next_day): interval_mask(time(14), time(15)),
+        })
+
+    def test_deleting_the_last_booking_clears_the_day(self):
+        booking = self.make_booking(time(9), time(10))
+
+        Booking.objects.get(id=booking.id).delete()
+
+        self.assertEqual(self.masks(), {(self.venue.id, self.day): 0})
+
+
+class CheckAvailabilityTests(BookingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.make_booking(time(10), time(11), event_name='Exam')
+        self.make_booking(time(9), time(10), event_name='Lecture')
+
+    def check(self, start, end, **params):
+        payload = {'venue': self.venue.id, 'date': str(self.day), 'start_time': start, 'end_time': end}
+        url = '/api/bookings/check_availability/'
+        if params:
+            url += '?' + urlencode(params)
+        return self.client_for(self.hod).post(url, payload, format='json')
+
+    def test_minimal_mode_returns_only_the_clashing_intervals(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.check('09:30', '10:30', detail='minimal')
+
+        self.assertFalse(response.json()['available'])
+        self.assertEqual(response.json()['conflicts'], [
+            {'start_time': '09:00:00', 'end_time': '10:00:00'},
+            {'start_time': '10:00:00', 'end_time': '11:00:00'},
+        ])
+        booking_queries = [query['sql'] for query in queries.captured_queries if 'FROM "bookings"' in query['sql']]
+        self.assertTrue(booking_queries[-1].startswith('SELECT "bookings"."start_time", "bookings"."end_time" FROM'))
+        self.assertNotIn('JOIN', booking_queries[-1])
+
+    def test_full_mode_describes_the_clashing_bookings(self):
+        response = self.check('09:30', '10:30')
+
+        conflicts = response.json()['conflicts']
+        self.assertEqual([conflict['event_name'] for conflict in conflicts], ['Lecture', 'Exam'])
+        self.assertEqual(conflicts[0]['venue_name'], 'LRDC Hall')
+
+    def test_free_slot_in_either_mode(self):
+        for params in ({}, {'detail': 'minimal'}):
+            response = self.check('11:00', '12:00', **params)
+            self.assertEqual(response.json(), {
+                'available': True,
+                'message': 'Venue is available for the selected time slot'
+            })
+
+
+class SparseFieldsetTests(BookingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.booking = self.make_booking(time(9), time(10), event_description='Long description')
+
+    def list_sql(self, fields):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_for(self.hod).get('/api/bookings/', {'fields': fields})
+        sql = [query['sql'] for query in queries.captured_queries if 'FROM "bookings"' in query['sql']]
+        self.assertEqual(len(sql), 1)
+        return response, sql[0]
+
+    def test_only_requested_fields_are_returned_and_loaded(self):
+        for fast in (True, False):
+            with self.subTest(fast=fast), self.settings(FAST_SERIALIZERS=fast):
+                response, sql = self.list_sql('id,event_name,venue_name')
+
+                self.assertEqual(response.json(), [{'id': self.booking.id, 'event_name': 'Guest Lecture', 'venue_name': 'LRDC Hall'}])
+                self.assertIn('"venues"."name"', sql)
+                self.assertNotIn('event_description', sql)
+                self.assertNotIn('"venues"."facilities"', sql)
+                self.assertNotIn('JOIN "users"', sql)
+
+    def test_computed_fields_load_their_declared_sources(self):
+        for fast in (True, False):
+            with self.subTest(fast=fast), self.settings(FAST_SERIALIZERS=fast):
+                response, sql = self.list_sql('user_name')
+
+                self.assertEqual(response.json(), [{'user_name': 'Head Dept'}])
+                self.assertIn('"users"."first_name"', sql)
+                self.assertNotIn('"users"."password"', sql)
+
+    def test_unknown_fields_are_rejected(self):
+        for fast in (True, False):
+            with self.subTest(fast=fast), self.settings(FAST_SERIALIZERS=fast):
+                response = self.client_for(self.hod).get('/api/bookings/', {'fields': 'id,secret'})
+
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'fields': ['Unknown field(s): secret']})
+
+
+class ExportTests(BookingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.late = self.make_booking(time(14), time(15), event_name='Workshop')
+        self.early = self.make_booking(time(9), time(10))
+        self.other = self.make_booking(time(9), time(10), venue=self.other_venue, status='cancelled')
+
+    def export(self, **params):
+        return self.client_for(self.admin).get('/api/bookings/export/', params)
+
+    def test_csv_is_streamed_in_booking_order(self):
+        with self.assertNumQueries(0):
+            response = self.export()
+        self.assertTrue(response.streaming)
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:4], ['id', 'venue_id', 'venue_name', 'event_name'])
+        rows = [line.split(',') for line in lines[1:]]
+        self.assertEqual([int(row[0]) for row in rows], [self.early.id, self.other.id, self.late.id])
+        self.assertEqual(rows[0][2:5], ['LRDC Hall', 'Guest Lecture', str(self.day)])
+        self.assertEqual(rows[0][8], 'Head Dept')
+        self.assertIn('filename="bookings_all_all.csv"', response['Content-Disposition'])
+
+    def test_ndjson_rows_match_the_filters(self):
+        response = self.export(export_format='ndjson', venue_ids=str(self.venue.id), status='confirmed')
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.early.id, self.late.id])
+        self.assertEqual(rows[0]['start_time'], '09:00:00')
+        self.assertEqual(rows[0]['requester_email'], 'hod@pccoe.edu')
+        self.assertIsNone(rows[0]['cancelled_at'])
+
+    def test_rows_are_read_in_chunks_with_related_rows_joined(self):
+        with self.assertNumQueries(1):
+            rows = list(stream_ndjson(Booking.objects.order_by('id'), chunk_size=2))
+        self.assertEqual(len(rows), 3)
+
+    def test_only_super_admins_can_export(self):
+        response = self.client_for(self.hod).get('/api/bookings/export/')
+        self.assertEqual(response.status_code, 403)
+
+
+class UtilizationRollupTests(BookingTestCase):
+
+    def rollups(self):
+        return {
+            (row.pop('venue_id'), row.pop('date')): row
+            for row in VenueDailyUtilization.objects.values('venue_id', 'date', *ROLLUP_FIELDS)
+        }
+
+    def write(self, function, *args, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return function(*args, **kwargs)
+
+    def test_deltas_match_a_rebuild_from_bookings(self):
+        next_day = self.day + timedelta(days=1)
+        with mock.patch('booking_system.utilization.refresh_day_utilization') as refresh:
+            lecture = self.write(self.make_booking, time(9), time(10, 30), expected_attendees=40)
+            seminar = self.write(self.make_booking, time(11), time(12))
+            self.write(self.make_booking, time(13), time(14), status='cancelled', auto_cancelled=True)
+
+            seminar = Booking.objects.get(id=seminar.id)
+            seminar.venue = self.other_venue
+            seminar.date = next_day
+            seminar.expected_attendees = 45
+            self.write(seminar.save)
+            lecture = Booking.objects.get(id=lecture.id)
+            lecture.status = 'cancelled'
+            self.write(lecture.save)
+            self.write(Booking.objects.get(id=seminar.id).delete)
+            self.write(self.make_booking, time(15), time(15, 45), venue=self.other_venue, day=next_day)
+
+        # Every write was applied as a delta, without re-reading the day
+        refresh.assert_not_called()
+        incremental = self.rollups()
+        self.assertEqual(incremental[(self.venue.id, self.day)], {
+            'booked_minutes': 0, 'booking_count': 0, 'cancelled_count': 2, 'auto_cancelled_count': 1, 'attendees': 0
+        })
+        self.assertEqual(incremental[(self.other_venue.id, next_day)]['booked_minutes'], 45)
+
+        rebuild_utilization()
+        rebuilt = self.rollups()
+        # A rebuild drops rows of days left without bookings
+        self.assertEqual(rebuilt, {key: row for key, row in incremental.items() if any(row.values())})
+
+    def test_days_missing_their_row_are_recomputed(self):
+        booking = self.write(self.make_booking, time(9), time(10))
+        VenueDailyUtilization.objects.all().delete()
+
+        booking = Booking.objects.get(id=booking.id)
+        booking.status = 'cancelled'
+        self.write(booking.save)
+
+        self.assertEqual(self.rollups()[(self.venue.id, self.day)], {
+            'booked_minutes': 0, 'booking_count': 0, 'cancelled_count': 1, 'auto_cancelled_count': 0, 'attendees': 0
+        })
+
+    def test_reconcile_repairs_drift_in_its_window(self):
+        self.write(self.make_booking, time(9), time(10))
+        VenueDailyUtilization.objects.update(booked_minutes=999)
+
+        result = reconcile_venue_utilization.apply().get()
+
+        self.assertEqual(result['written'], 1)
+        self.assertEqual(self.rollups()[(self.venue.id, self.day)]['booked_minutes'], 60)
+
+
+@override_settings(PUBSUB={'BACKEND': 'memory'})
+class UtilizationDriftTests(TransactionTestCase):
+    """
+    Deltas are applied in autocommit after the booking write commits, where
+    a counter CHECK violation does not break an enclosing transaction
+    """
+
+    def test_rows_that_would_go_negative_are_recomputed(self):
+        user = User.objects.create_user('hod@pccoe.edu', 'password', role='hod')
+        venue = Venue.objects.create(name='LRDC Hall', location='Main', building='A', floor='1', capacity=100)
+        booking = Booking.objects.create(
+            venue=venue, user=user, event_name='Guest Lecture', date=timezone.now().date() + timedelta(days=3),
+            start_time=time(9), end_time=time(10), contact_number='9999999999', expected_attendees=20
+        )
+        VenueDailyUtilization.objects.update(booking_count=0, booked_minutes=0)
+
+        booking = Booking.objects.get(id=booking.id)
+        booking.status = 'cancelled'
+        booking.save()
+
+        rollup = VenueDailyUtilization.objects.get(venue=venue, date=booking.date)
+        self.assertEqual((rollup.booking_count, rollup.booked_minutes, rollup.cancelled_count), (0, 0, 1))
+
+
+class HeatmapTests(BookingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.make_booking(time(9, 30), time(11, 15))
+        self.make_booking(time(14), time(15), status='cancelled')
+        # The same weekday a week later falls outside the range
+        self.make_booking(time(9), time(10), day=self.day + timedelta(days=7))
+        self.weekday = self.day.weekday()
+
+    def heatmap(self, **params):
+        query = {'start_date': str(self.day), 'end_date': str(self.day + timedelta(days=6)), **params}
+        return self.client_for(self.admin).get('/api/bookings/heatmap/', query)
+
+    def hours(self, cells, *hours):
+        return [cells[self.weekday][hour] for hour in hours]
+
+    def test_booked_minutes_are_spread_over_the_hours_they_overlap(self):
+        venue, other = self.heatmap().json()['results']
+
+        self.assertEqual(venue['name'], 'LRDC Hall')
+        self.assertEqual(self.hours(venue['minutes'], 8, 9, 10, 11, 12, 14), [0, 30, 60, 15, 0, 0])
+        self.assertEqual(self.hours(venue['occupancy'], 9, 10, 11), [0.5, 1.0, 0.25])
+        self.assertEqual(sum(map(sum, venue['minutes'])), 105)
+        self.assertEqual(sum(map(sum, other['minutes'])), 0)
+
+    def test_buildings_share_their_available_hours(self):
+        Venue.objects.create(name='Annex', location='Main', building='A', floor='0', capacity=30)
+
+        building_a, building_b = self.heatmap(group_by='building').json()['results']
+
+        self.assertEqual((building_a['building'], building_a['venue_count']), ('A', 2))
+        self.assertEqual(self.hours(building_a['occupancy'], 9, 10, 11), [0.25, 0.5, 0.125])
+        self.assertEqual(building_b['building'], 'B')
+
+    def test_longer_ranges_count_every_weekday_occurrence(self):
+        venue = self.heatmap(end_date=str(self.day + timedelta(days=13)), venue_ids=str(self.venue.id)).json()['results']
+
+        self.assertEqual(len(venue), 1)
+        self.assertEqual(self.hours(venue[0]['minutes'], 9, 10), [90, 60])
+        self.assertEqual(self.hours(venue[0]['occupancy'], 9, 10), [0.75, 0.5])
+
+    def test_only_super_admins_can_see_the_heatmap(self):
+        response = self.client_for(self.hod).get('/api/bookings/heatmap/', {'start_date': str(self.day), 'end_date': str(self.day)})
+        self.assertEqual(response.status_code, 403)
+
+
+class SearchTests(BookingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.workshop = self.make_booking(time(9), time(10), event_name='Robotics Workshop')
+        self.lecture = self.make_booking(time(11), time(12), event_description='Robotics demo for first years')
+        self.other = self.make_booking(
+            time(9), time(10), venue=self.other_venue, user=self.admin, event_name='Robotics Club'
+        )
+
+    def search(self, q, user=None, **params):
+        response = self.client_for(user or self.hod).get('/api/bookings/search/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [result['id'] for result in response.json()['results']]
+
+    def test_event_name_hits_rank_above_description_hits(self):
+        response = self.client_for(self.hod).get('/api/bookings/search/', {'q': 'robot'})
+
+        results = response.json()['results']
+        self.assertEqual([result['id'] for result in results], [self.workshop.id, self.lecture.id])
+        self.assertGreater(results[0]['rank'], results[1]['rank'])
+
+    def test_every_term_must_match_as_a_prefix(self):
+        self.assertEqual(self.search('robot dem'), [self.lecture.id])
+        self.assertEqual(self.search('robotics chess'), [])
+
+    def test_results_are_scoped_to_visible_bookings(self):
+        self.assertEqual(self.search('robotics club'), [])
+        self.assertEqual(self.search('robotics club', user=self.admin), [self.other.id])
+        self.assertEqual(set(self.search('robotics', user=self.hall_admin)), {self.workshop.id, self.lecture.id})
+
+    def test_index_follows_booking_and_requester_changes(self):
+        self.workshop.event_name = 'Drone Workshop'
+        self.workshop.save()
+        self.lecture.delete()
+        self.assertEqual(self.search('robotics'), [])
+        self.assertEqual(self.search('drone'), [self.workshop.id])
+
+        self.hod.last_name = 'Kulkarni'
+        self.hod.save()
+        self.assertEqual(self.search('kulkarni workshop'), [self.workshop.id])
+
+    def test_query_operators_are_treated_as_words(self):
+        self.assertEqual(self.search('"robotics* (workshop)'), [self.workshop.id])
+        # OR/NEAR are ordinary terms that nothing matches, not FTS syntax
+        self.assertEqual(self.search('robotics OR NEAR(workshop'), [])
+
+    def test_rebuild_restores_the_index(self):
+        remove_bookings([self.workshop.id, self.lecture.id, self.other.id])
+        self.assertEqual(self.search('robotics'), [])
+
+        self.assertEqual(rebuild_search_index(), 3)
+        self.assertEqual(self.search('workshop'), [self.workshop.id])
+
+
+class FastSerializerParityTests(BookingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.make_booking(time(9), time(10), event_description='Line one\nline "two"', special_requirements='Mic')
+        self.make_booking(
+            time(11), time(12, 30), venue=self.other_venue, status='cancelled',
+            cancellation_reason='Clash', cancelled_at=timezone.now() - timedelta(hours=5, microseconds=123)
+        )
+        notifications = create_notifications(
+            Notification(user=self.hod, notification_type='booking_confirmed', title=f'N{i}', message='Booked',
+                         related_booking_id=i or None)
+            for i in range(4)
+        )
+        for notification, age in zip(notifications, (timedelta(minutes=5), timedelta(hours=3), timedelta(days=12))):
+            Notification.objects.filter(id=notification.id).update(created_at=timezone.now() - age)
+        Notification.objects.filter(id=notifications[0].id).update(is_read=True, read_at=timezone.now())
+
+    def both(self, url, **params):
+        responses = []
+        for fast in (True, False):
+            with self.settings(FAST_SERIALIZERS=fast):
+                response = self.client_for(self.hod).get(url, params)
+                self.assertEqual(response.status_code, 200)
+                responses.append(response.json())
+        return responses
+
+    def test_list_endpoints_match_drf_output(self):
+        for url in ('/api/bookings/', '/api/bookings/my_bookings/', '/api/notifications/'):
+            with self.subTest(url=url):
+                fast, drf = self.both(url)
+                self.assertTrue(fast)
+                self.assertEqual(fast, drf)
+
+    def test_sparse_and_keyset_pages_match_drf_output(self):
+        for url, params in (
+            ('/api/bookings/', {'fields': 'cancelled_at,user_name,venue'}),
+            ('/api/notifications/', {'fields': 'time_ago,read_at'}),
+            ('/api/bookings/', {'paginate': 'cursor', 'page_size': 1}),
+        ):
+            with self.subTest(url=url, params=params):
+                fast, drf = self.both(url, **params)
+                self.assertEqual(fast, drf)
+
+    def test_serializers_agree_on_the_same_rows(self):
+        bookings = Booking.objects.select_related('venue', 'user').order_by('id')
+
+        self.assertEqual(
+            BookingListFastSerializer().serialize(bookings),
+            [dict(row) for row in BookingListSerializer(bookings, many=True).data]
+        )
+
+    def test_method_fields_need_a_computed_entry(self):
+        class IncompleteSerializer(FastSerializer):
+            serializer_class = NotificationSerializer
+
+        with self.assertRaises(ImproperlyConfigured):
+            IncompleteSerializer()
+
+
+class KeysetPaginationTests(BookingTestCase):
+
+    def page_through(self, vendor=None):
+        created = [
+            self.make_booking(time(8 + hour), time(9 + hour), day=self.day + timedelta(days=offset)).id
+            for offset in range(3) for hour in range(3)
+        ]
+        client = self.client_for(self.hod)
+
+        seen = []
+        response = client.get('/api/bookings/', {'paginate': 'cursor', 'page_size': 4}).json()
+        seen += [booking['id'] for booking in response['results']]
+        # A booking added while paging must not shift the following pages
+        self.make_booking(time(20), time(21), day=self.day + timedelta(days=5))
+        with mock.patch.object(connection, 'vendor', vendor or connection.vendor), \
+                CaptureQueriesContext(connection) as queries:
+            while response['next_cursor']:
+                response = client.get('/api/bookings/', {'cursor': response['next_cursor'], 'page_size': 4}).json()
+                seen += [booking['id'] for booking in response['results']]
+
+        self.assertEqual(seen, list(reversed(created)))
+        return [query['sql'] for query in queries.captured_queries if 'FROM "bookings"' in query['sql']]
+
+    def test_pages_cover_every_booking_once(self):
+        sql = self.page_through()
+
+        # The expanded seek is led by a range on the first sort column
+        self.assertTrue(any('"bookings"."date" <= ' in query for query in sql))
+
+    def test_row_value_seek_on_postgresql(self):
+        # SQLite understands row values too, so the PostgreSQL form can run here
+        sql = self.page_through(vendor='postgresql')
+
+        self.assertTrue(any(
+            '("bookings"."date", "bookings"."start_time", "bookings"."id") < (' in query
+            for query in sql
+        ))
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client_for(self.hod).get('/api/bookings/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cursor', response.json())
+
+
+class RetentionTests(BookingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        notifications = create_notifications(
+            Notification(user=self.hod, notification_type='booking_confirmed', title=f'N{i}', message='Old')
+            for i in range(7)
+        )
+        self.old_ids = [notification.id for notification in notifications[:5]]
+        Notification.objects.filter(id__in=self.old_ids).update(created_at=timezone.now() - timedelta(days=100))
+
+    def test_archive_moves_old_notifications_in_batches(self):
+        result = expire_notifications(days=90, mode='archive', batch_size=2)
+
+        self.assertEqual(result, {'expired': 5, 'batches': 3, 'mode': 'archive'})
+        self.assertEqual(Notification.objects.count(), 2)
+        self.assertEqual(sorted(NotificationArchive.objects.values_list('id', flat=True)), self.old_ids)
+
+    def test_max_batches_leaves_the_rest_for_the_next_run(self):
+        self.assertEqual(expire_notifications(days=90, mode='delete', batch_size=2, max_batches=1)['expired'], 2)
+        self.assertEqual(expire_notifications(days=90, mode='delete', batch_size=2)['expired'], 3)
+        self.assertEqual(NotificationArchive.objects.count(), 0)
+        self.assertEqual(get_unread_count(self.hod), 2)
+
+
+class NotificationSyncTests(BookingTestCase):
+
+    def notify(self, user, count):
+        return create_notifications(
+            Notification(user=user, notification_type='booking_confirmed', title=f'N{i}', message='Confirmed')
+            for i in range(count)
+        )
+
+    def test_since_id_returns_only_newer_notifications(self):
+        client = self.client_for(self.hod)
+        first = self.notify(self.hod, 3)
+        self.notify(self.admin, 2)
+
+        response = client.get('/api/notifications/', {'since_id': first[0].id, 'limit': 1}).json()
+        self.assertEqual([row['id'] for row in response['results']], [first[1].id])
+        self.assertTrue(response['has_more'])
+
+        response = client.get('/api/notifications/', {'since_id': response['last_id']}).json()
+        self.assertEqual([row['id'] for row in response['results']], [first[2].id])
+        self.assertFalse(response['has_more'])
+        self.assertEqual(response['unread_count'], 3)
+
+        response = client.get('/api/notifications/', {'since_id': response['last_id']}).json()
+        self.assertEqual(response['results'], [])
+        self.assertEqual(response['last_id'], first[2].id)
+
+    def test_since_and_since_id_are_exclusive(self):
+        response = self.client_for(self.hod).get('/api/notifications/', {
+            'since_id': 0, 'since': timezone.now().isoformat()
+        })
+        self.assertEqual(response.status_code, 400)
+
+
+class DayIntervalsTests(SimpleTestCase):
+
+    def test_overlaps_use_half_open_intervals(self):
+        day = DayIntervals([(1, time(9), time(10)), (2, time(13), time(14))], loaded_at=0)
+
+        self.assertTrue(day.overlaps(time(9, 30), time(9, 45)))
+        self.assertTrue(day.overlaps(time(8), time(13, 1)))
+        self.assertFalse(day.overlaps(time(10), time(13)))
+        self.assertFalse(day.overlaps(time(14), time(15)))
+        self.assertEqual(day.conflicting_ids(time(9, 30), time(13, 30)), [1, 2])
+
+    def test_long_interval_is_found_behind_later_starts(self):
+        # The running maximum of end times carries 8:00-18:00 past 12:00-12:30
+        day = DayIntervals([(1, time(8), time(18)), (2, time(12), time(12, 30))], loaded_at=0)
+
+        self.assertTrue(day.overlaps(time(15), time(16)))
+        self.assertEqual(day.conflicting_ids(time(15), time(16)), [1])
+
+    def test_add_replaces_and_remove_rebuilds(self):
+        day = DayIntervals([(1, time(8), time(18)), (2, time(12), time(12, 30))], loaded_at=0)
+
+        day.add(1, time(8), time(9))
+        self.assertEqual(len(day), 2)
+        self.assertFalse(day.overlaps(time(15), time(16)))
+        self.assertTrue(day.remove(2))
+        self.assertFalse(day.remove(2))
+        self.assertFalse(day.overlaps(time(12), time(12, 15)))
+        self.assertEqual(day.max_ends, [time(9)])
+
+
+@mock.patch('booking_system.interval_index.cache_is_shared', return_value=True)
+@mock.patch('booking_system.availability_cache.cache_is_shared', return_value=True)
+class BookingIntervalIndexTests(BookingTestCase):
+    """The index as used with a shared cache (versions visible to every process)"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        booking_index.clear()
+        self.addCleanup(booking_index.clear)
+        self.addCleanup(cache.clear)
+
+    def write(self, function, *args, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return function(*args, **kwargs)
+
+    def test_own_writes_are_applied_without_reloading(self, *mocks):
+        self.assertFalse(booking_index.has_conflict(self.venue.id, self.day, time(9), time(10)))
+
+        booking = self.write(self.make_booking, time(9), time(10))
+        with self.assertNumQueries(0):
+            self.assertTrue(booking_index.has_conflict(self.venue.id, self.day, time(9, 30), time(11)))
+            self.assertEqual(booking_index.conflicting_ids(self.venue.id, self.day, time(8), time(12)), [booking.id])
+
+        booking.start_time, booking.end_time = time(14), time(15)
+        self.write(booking.save)
+        with self.assertNumQueries(0):
+            self.assertFalse(booking_index.has_conflict(self.venue.id, self.day, time(9), time(10)))
+            self.assertTrue(booking_index.has_conflict(self.venue.id, self.day, time(14), time(15)))
+
+        booking.status = 'cancelled'
+        self.write(booking.save)
+        with self.assertNumQueries(0):
+            self.assertFalse(booking_index.has_conflict(self.venue.id, self.day, time(14), time(15)))
+
+    def test_other_days_and_venues_are_independent(self, *mocks):
+        self.write(self.make_booking, time(9), time(10))
+
+        self.assertFalse(booking_index.has_conflict(self.other_venue.id, self.day, time(9), time(10)))
+        self.assertFalse(booking_index.has_conflict(self.venue.id, self.day + timedelta(days=1), time(9), time(10)))
+
+    def test_write_of_another_process_is_seen_once_the_version_moves(self, *mocks):
+        booking = self.write(self.make_booking, time(9), time(10))
+        self.assertTrue(booking_index.has_conflict(self.venue.id, self.day, time(9), time(10)))
+
+        # Another process cancels the booking: its signals bump the shared
+        # version but cannot touch this process's index
+        Booking.objects.filter(pk=booking.pk).update(status='cancelled')
+        availability_cache.bump_venue_version(self.venue.id)
+
+        self.assertFalse(booking_index.has_conflict(self.venue.id, self.day, time(9), time(10)))
+
+    @override_settings(BOOKING_INTERVAL_INDEX_TTL=-1)
+    def test_expired_days_are_reloaded(self, *mocks):
+        self.assertFalse(booking_index.has_conflict(self.venue.id, self.day, time(9), time(10)))
+        # A write that bumped nothing (e.g. a raw SQL import)
+        Booking.objects.bulk_create([Booking(
+            venue=self.venue, user=self.hod, event_name='Import', date=self.day, start_time=time(9),
+            end_time=time(10), contact_number='9999999999', expected_attendees=10, status='confirmed'
+        )])
+        availability_cache.invalidate_day(self.venue.id, self.day)
+
+        self.assertTrue(booking_index.has_conflict(self.venue.id, self.day, time(9), time(10)))
+
+    def test_least_recently_used_days_are_evicted(self, *mocks):
+        index = BookingIntervalIndex(max_days=2)
+        for offset in range(3):
+            index.has_conflict(self.venue.id, self.day + timedelta(days=offset), time(9), time(10))
+
+        self.assertEqual(list(index._days), [
+            (self.venue.id, self.day + timedelta(days=1)), (self.venue.id, self.day + timedelta(days=2))
+        ])
+
+
+class IntervalIndexWithoutSharedCacheTests(BookingTestCase):
+
+    def test_days_are_read_from_the_database_every_time(self):
+        index = BookingIntervalIndex()
+        self.assertFalse(index.has_conflict(self.venue.id, self.day, time(9), time(10)))
+
+        Booking.objects.bulk_create([Booking(
+            venue=self.venue, user=self.hod, event_name='Import', date=self.day, start_time=time(9),
+            end_time=time(10), contact_number='9999999999', expected_attendees=10, status='confirmed'
+        )])
+        self.assertTrue(index.has_conflict(self.venue.id, self.day, time(9), time(10)))
+        self.assertEqual(len(index._days), 0)
+
+
+class PublicCalendarTests(BookingTestCase):
+
+    def calendar(self, start, end, **headers):
+        return self.client.get('/api/bookings/public_calendar/', {
+            'start_date': str(start), 'end_date': str(end)
+        }, **headers)
+
+    def test_long_and_reversed_ranges_are_rejected(self):
+        limit = BookingViewSet.PUBLIC_CALENDAR_MAX_DAYS
+        self.assertEqual(self.calendar(self.day, self.day + timedelta(days=limit - 1)).status_code, 200)
+        self.assertEqual(self.calendar(self.day, self.day + timedelta(days=limit)).status_code, 400)
+        self.assertEqual(self.calendar(self.day, self.day + timedelta(days=40000)).status_code, 400)
+        self.assertEqual(self.calendar(self.day, self.day - timedelta(days=1)).status_code, 400)
+
+    def assert_etag_follows_writes(self):
+        first = self.calendar(self.day, self.day)
+        etag = first['ETag']
+        self.assertEqual(self.calendar(self.day, self.day, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        booking = self.make_booking(time(9), time(10))
+        response = self.calendar(self.day, self.day, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['bookings']), 1)
+        etag = response['ETag']
+
+        for change in (
+            lambda: Booking.objects.filter(pk=booking.pk).update(status='cancelled', updated_at=timezone.now()),
+            lambda: Booking.objects.filter(pk=booking.pk).delete(),
+            lambda: Venue.objects.filter(pk=self.venue.pk).update(name='Renamed Hall'),
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            response = self.calendar(self.day, self.day, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            etag = response['ETag']
+        self.assertNotEqual(self.calendar(self.day, self.day + timedelta(days=1))['ETag'], etag)
+
+    def test_etag_without_shared_cache(self):
+        self.assert_etag_follows_writes()
+        # 304s only read the venues and one aggregate
+        etag = self.calendar(self.day, self.day)['ETag']
+        with self.assertNumQueries(2):
+            self.assertEqual(self.calendar(self.day, self.day, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_etag_with_shared_cache(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        with mock.patch('booking_system.views.cache_is_shared', return_value=True), \
+                mock.patch('booking_system.availability_cache.cache_is_shared', return_value=True):
+            first = self.calendar(self.day, self.day)
+            self.assertEqual(self.calendar(self.day, self.day, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+            with self.captureOnCommitCallbacks(execute=True):
+                booking = self.make_booking(time(9), time(10))
+            second = self.calendar(self.day, self.day, HTTP_IF_NONE_MATCH=first['ETag'])
+            self.assertEqual(second.status_code, 200)
+            with self.captureOnCommitCallbacks(execute=True):
+                booking.delete()
+            third = self.calendar(self.day, self.day, HTTP_IF_NONE_MATCH=second['ETag'])
+            self.assertEqual(third.status_code, 200)
+            self.assertEqual(third.json()['bookings'], [])
+            with self.assertNumQueries(1):
+                self.assertEqual(self.calendar(self.day, self.day, HTTP_IF_NONE_MATCH=third['ETag']).status_code, 304)
+
+
+class RealtimeTestCase(BookingTestCase):
+    """Drive the ASGI realtime apps in-process"""
+
+    def scope(self, path, user=None, query=None, headers=(), scope_type='http'):
+        query = dict(query or {})
+        if user is not None:
+            query['token'] = str(RefreshToken.for_user(user).access_token)
+        return {
+            'type': scope_type,
+            'method': 'GET',
+            'path': path,
+            'query_string': urlencode(query).encode(),
+            'headers': [(name.encode(), value.encode()) for name, value in headers],
+        }
+
+    def run_app(self, app, scope, script):
+        """
+        Run an ASGI app while script(inbox, sent, wait_for) talks to it.
+
+        Returns:
+            list: Messages the app sent
+        """
+        async def main():
+            inbox = asyncio.Queue()
+            sent = []
+
+            async def send(message):
+                sent.append(message)
+
+            task = asyncio.ensure_future(app(scope, inbox.get, send))
+
+            async def wait_for(predicate):
+                for _ in range(300):
+                    if predicate(sent):
+                        return
+                    if task.done():
+                        task.result()
+                        break
+                    await asyncio.sleep(0.01)
+                self.fail(f'Timed out waiting; sent so far: {sent}')
+
+            await script(inbox, sent, wait_for)
+            await asyncio.wait_for(task, 3)
+            return sent
+
+        return async_to_sync(main)()
+
+    def notification(self, user=None, title='Confirmed'):
+        return Notification.objects.create(
+            user=user or self.hod, notification_type='booking_confirmed', title=title, message=title
+        )
+
+    def assert_no_subscriptions(self):
+        self.assertEqual(dict(get_broker()._subscriptions), {})
+
+
+def stream_text(sent):
+    return b''.join(message.get('body', b'') for message in sent if message['type'] == 'http.response.body').decode()
+
+
+@override_settings(SSE_HEARTBEAT_SECONDS=0.05)
+class EventStreamTests(RealtimeTestCase):
+
+    def stream(self, scope, script=None):
+        async def default(inbox, sent, wait_for):
+            pass
+        return self.run_app(EventStream(), scope, script or default)
+
+    def test_requires_a_valid_token(self):
+        for scope in (
+            self.scope(EVENT_STREAM_PATH),
+            self.scope(EVENT_STREAM_PATH, query={'token': 'not-a-jwt'}),
+        ):
+            sent = self.stream(scope)
+            self.assertEqual(sent[0]['status'], 401)
+        scope = self.scope(EVENT_STREAM_PATH, self.hod)
+        scope['method'] = 'POST'
+        self.assertEqual(self.stream(scope)[0]['status'], 405)
+        self.assert_no_subscriptions()
+
+    def test_live_events_keepalives_and_disconnect(self):
+        self.notification()
+
+        async def script(inbox, sent, wait_for):
+            await wait_for(lambda sent: 'event: ready' in stream_text(sent))
+            self.assertIn('"unread_count": 1', stream_text(sent))
+            notification = await sync_to_async(self.notification)(title='Live')
+            await sync_to_async(publish_notification)(notification)
+            await wait_for(lambda sent: 'event: notification\n' in stream_text(sent))
+            await wait_for(lambda sent: ': keepalive' in stream_text(sent))
+            self.assertIn(f'id: {notification.id}\nevent: notification', stream_text(sent))
+            await inbox.put({'type': 'http.disconnect'})
+
+        sent = self.stream(self.scope(EVENT_STREAM_PATH, self.hod), script)
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn((b'content-type', b'text/event-stream; charset=utf-8'), sent[0]['headers'])
+        self.assert_no_subscriptions()
+
+    def test_last_event_id_replays_missed_notifications(self):
+        seen, first, second = (self.notification(title=f'N{i}') for i in range(3))
+        self.notification(user=self.admin)
+
+        async def script(inbox, sent, wait_for):
+            await wait_for(lambda sent: 'event: notifications' in stream_text(sent))
+            # Already replayed: not sent twice
+            await sync_to_async(publish_notification)(second)
+            newer = await sync_to_async(self.notification)(title='Newer')
+            await sync_to_async(publish_notification)(newer)
+            await wait_for(lambda sent: f'id: {newer.id}' in stream_text(sent))
+            await inbox.put({'type': 'http.disconnect'})
+
+        text = stream_text(self.stream(
+            self.scope(EVENT_STREAM_PATH, self.hod, headers=[('last-event-id', str(seen.id))]), script
+        ))
+        frame = next(frame for frame in text.split('\n\n') if 'event: notifications' in frame)
+        self.assertIn(f'id: {second.id}', frame)
+        data = json.loads(frame.split('data: ', 1)[1])
+        self.assertEqual([row['id'] for row in data['notifications']], [first.id, second.id])
+        self.assertFalse(data['has_more'])
+        self.assertEqual(text.count('event: notification\n'), 1)
+
+    @override_settings(SSE_REPLAY_LIMIT=1)
+    def test_since_id_replay_is_limited(self):
+        first, _ = self.notification(title='N1'), self.notification(title='N2')
+
+        async def script(inbox, sent, wait_for):
+            await wait_for(lambda sent: 'event: notifications' in stream_text(sent))
+            await inbox.put({'type': 'http.disconnect'})
+
+        text = stream_text(self.stream(self.scope(EVENT_STREAM_PATH, self.hod, query={'since_id': 0}), script))
+        data = json.loads(text.split('event: notifications\ndata: ', 1)[1].split('\n\n')[0])
+        self.assertEqual([row['id'] for row in data['notifications']], [first.id])
+        self.assertTrue(data['has_more'])
+
+
+class VenueSocketTests(RealtimeTestCase):
+
+    def socket(self, user, script):
+        async def run(inbox, sent, wait_for):
+            await inbox.put({'type': 'websocket.connect'})
+            await script(inbox, sent, wait_for)
+        return self.run_app(VenueSocket(), self.scope(VENUE_SOCKET_PATH, user, scope_type='websocket'), run)
+
+    @staticmethod
+    def received(sent):
+        return [json.loads(message['text']) for message in sent if message['type'] == 'websocket.send']
+
+    @staticmethod
+    async def command(inbox, action, venue_ids):
+        await inbox.put({'type': 'websocket.receive', 'text': json.dumps({'action': action, 'venue_ids': venue_ids})})
+
+    def write(self, function, *args, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return function(*args, **kwargs)
+
+    def test_rejects_connections_without_a_token(self):
+        sent = self.run_app(VenueSocket(), self.scope(VENUE_SOCKET_PATH, scope_type='websocket'),
+                            lambda inbox, sent, wait_for: inbox.put({'type': 'websocket.connect'}))
+        self.assertEqual(sent, [{'type': 'websocket.close', 'code': 4401}])
+
+    def test_subscribe_receive_and_unsubscribe(self):
+        received = self.received
+
+        async def script(inbox, sent, wait_for):
+            await self.command(inbox, 'subscribe', [self.venue.id, self.other_venue.id])
+            await wait_for(lambda sent: any(event['event'] == 'subscribed' for event in received(sent)))
+            # Another venue's booking is not relayed, the followed venue's is
+            await sync_to_async(self.write)(self.make_booking, time(9), time(10), venue=self.other_venue)
+            booking = await sync_to_async(self.write)(self.make_booking, time(11), time(12))
+            await wait_for(lambda sent: any(event['event'] == 'booking' for event in received(sent)))
+
+            await self.command(inbox, 'unsubscribe', [self.venue.id])
+            await wait_for(lambda sent: received(sent)[-1] == {'event': 'subscribed', 'venue_ids': []})
+            booking.status = 'cancelled'
+            await sync_to_async(self.write)(booking.save)
+            await inbox.put({'type': 'websocket.receive', 'text': 'not json'})
+            await wait_for(lambda sent: received(sent)[-1]['event'] == 'error')
+            await inbox.put({'type': 'websocket.disconnect'})
+
+        events = self.received(self.socket(self.hall_admin, script))
+        self.assertEqual(events[0], {
+            'event': 'error', 'detail': 'You do not have permission to follow these venues',
+            'venue_ids': [self.other_venue.id]
+        })
+        self.assertEqual(events[1], {'event': 'subscribed', 'venue_ids': [self.venue.id]})
+        bookings = [event['data'] for event in events if event['event'] == 'booking']
+        self.assertEqual(len(bookings), 1)
+        self.assertEqual(bookings[0]['change'], 'created')
+        self.assertEqual(bookings[0]['booking']['venue_id'], self.venue.id)
+        self.assert_no_subscriptions()
+
+    def test_auto_cancellations_from_tasks_reach_subscribers(self):
+        booking = self.make_booking(time(12), time(13), reminder_sent=True)
+        now = timezone.make_aware(datetime.combine(self.day, time(10)))
+        received = self.received
+
+        def run_task():
+            with mock.patch('django.utils.timezone.now', return_value=now), \
+                    mock.patch('booking_system.tasks.notify_waitlist_users'):
+                self.write(auto_cancel_unconfirmed_bookings)
+
+        async def script(inbox, sent, wait_for):
+            await self.command(inbox, 'subscribe', [self.venue.id])
+            await wait_for(lambda sent: any(event['event'] == 'subscribed' for event in received(sent)))
+            await sync_to_async(run_task)()
+            await wait_for(lambda sent: any(event['event'] == 'booking' for event in received(sent)))
+            await inbox.put({'type': 'websocket.disconnect'})
+
+        events = [event['data'] for event in self.received(self.socket(self.admin, script)) if event['event'] == 'booking']
+        self.assertEqual(events[0]['change'], 'auto_cancelled')
+        self.assertEqual(events[0]['booking']['id'], booking.id)
+        self.assert_no_subscriptions()
+
+
+class PubSubSettingsTests(SimpleTestCase):
+
+    def test_broker_follows_the_pubsub_setting(self):
+        with override_settings(PUBSUB={'BACKEND': 'memory'}):
+            self.assertIsInstance(get_broker(), MemoryBroker)
+        with override_settings(PUBSUB={'BACKEND': 'redis', 'URL': 'redis://localhost:6379/0'}):
+            self.assertIsInstance(get_broker(), RedisBroker)
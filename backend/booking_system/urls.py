@@ -1,13 +1,20 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BookingViewSet, VenueAdminViewSet, NotificationViewSet, WaitlistViewSet
+from .views import BookingViewSet, BookingSeriesViewSet, VenueAdminViewSet, NotificationViewSet, WaitlistViewSet
 
 router = DefaultRouter()
 router.register(r'bookings', BookingViewSet, basename='booking')
+router.register(r'booking-series', BookingSeriesViewSet, basename='booking-series')
 router.register(r'venue-admins', VenueAdminViewSet, basename='venue-admin')
 router.register(r'notifications', NotificationViewSet, basename='notification')
 router.register(r'waitlist', WaitlistViewSet, basename='waitlist')
 
+# Calendar apps request feeds without a trailing slash
+my_bookings_ics = BookingViewSet.as_view(
+    {'get': 'my_bookings_ics'}, basename='booking', detail=False, **BookingViewSet.my_bookings_ics.kwargs
+)
+
 urlpatterns = [
+    path('bookings/my_bookings.ics', my_bookings_ics, name='booking-my-bookings-feed'),
     path('', include(router.urls)),
 ]
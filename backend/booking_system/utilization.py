@@ -0,0 +1,180 @@
+"""
+Daily venue utilization rollups.
+
+Each venue/day with bookings has a VenueDailyUtilization row. After every
+booking write commits, the difference between the booking's old and new
+contribution is added to the affected rows with one UPDATE per day (rows
+for new days are inserted), without reading the day's bookings. The
+nightly reconcile_venue_utilization task and the backfill_utilization
+command rebuild rows from the bookings table to repair any drift.
+Dashboards then read a few rows per venue instead of aggregating the
+bookings table.
+"""
+from itertools import groupby
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Booking, VenueDailyUtilization
+from .availability import time_to_seconds
+
+ACTIVE_STATUSES = ('confirmed', 'completed')
+
+ROLLUP_FIELDS = ('booked_minutes', 'booking_count', 'cancelled_count', 'auto_cancelled_count', 'attendees')
+
+
+def summarize(rows):
+    """
+    Roll up the bookings of one venue/day.
+
+    Args:
+        rows: Iterable of (status, auto_cancelled, start_time, end_time,
+              expected_attendees) tuples
+
+    Returns:
+        dict: Values for the ROLLUP_FIELDS
+    """
+    totals = dict.fromkeys(ROLLUP_FIELDS, 0)
+    for status, auto_cancelled, start_time, end_time, attendees in rows:
+        if status in ACTIVE_STATUSES:
+            totals['booking_count'] += 1
+            totals['booked_minutes'] += max(0, time_to_seconds(end_time) - time_to_seconds(start_time)) // 60
+            totals['attendees'] += attendees or 0
+        elif status == 'cancelled':
+            totals['cancelled_count'] += 1
+            if auto_cancelled:
+                totals['auto_cancelled_count'] += 1
+    return totals
+
+
+def utilization_deltas(previous, current, deltas=None):
+    """
+    Rollup changes caused by a booking write.
+
+    Args:
+        previous (tuple): Booking.LOADED_FIELDS values before the write
+                          (None for a new booking)
+        current (tuple): Values after the write (None for a deleted booking)
+        deltas (dict, optional): Deltas to merge into (e.g. for bulk writes)
+
+    Returns:
+        dict: {(venue_id, date): {field: delta}}
+    """
+    deltas = {} if deltas is None else deltas
+    for values, sign in ((previous, -1), (current, 1)):
+        if values is None:
+            continue
+        venue_id, booking_date, start_time, end_time, status, auto_cancelled, attendees = values
+        day = deltas.setdefault((venue_id, booking_date), dict.fromkeys(ROLLUP_FIELDS, 0))
+        for field, value in summarize([(status, auto_cancelled, start_time, end_time, attendees)]).items():
+            day[field] += sign * value
+    return deltas
+
+
+def apply_utilization_deltas(deltas):
+    """
+    Add the result of utilization_deltas() to the rollup rows.
+
+    Runs after the booking write commits (autocommit, so a failed statement
+    needs no savepoint). Days without a row get one from their delta in a
+    single insert; days whose counters would drop below zero because the
+    row had drifted, or that lose an insert race, are recomputed.
+    """
+    missing = []
+    recompute = []
+    now = timezone.now()
+    for (venue_id, booking_date), delta in deltas.items():
+        changes = {field: F(field) + value for field, value in delta.items() if value}
+        if not changes:
+            continue
+        try:
+            updated = VenueDailyUtilization.objects.filter(
+                venue_id=venue_id,
+                date=booking_date
+            ).update(updated_at=now, **changes)
+        except IntegrityError:
+            recompute.append((venue_id, booking_date))
+            continue
+        if updated:
+            continue
+        if all(value >= 0 for value in delta.values()):
+            # Days without a row had no bookings before this write
+            missing.append(VenueDailyUtilization(venue_id=venue_id, date=booking_date, **delta))
+        else:
+            recompute.append((venue_id, booking_date))
+
+    if missing:
+        try:
+            VenueDailyUtilization.objects.bulk_create(missing)
+        except IntegrityError:
+            recompute.extend((row.venue_id, row.date) for row in missing)
+    for venue_id, booking_date in recompute:
+        refresh_day_utilization(venue_id, booking_date)
+
+
+def _day_rows(venue_id, booking_date):
+    return Booking.objects.filter(venue_id=venue_id, date=booking_date).values_list(
+        'status', 'auto_cancelled', 'start_time', 'end_time', 'expected_attendees'
+    )
+
+
+def refresh_day_utilization(venue_id, booking_date):
+    """Recompute the utilization rollup of one venue/day from its bookings"""
+    with transaction.atomic():
+        rollup, _ = VenueDailyUtilization.objects.select_for_update().get_or_create(
+            venue_id=venue_id,
+            date=booking_date
+        )
+        totals = summarize(_day_rows(venue_id, booking_date))
+        if any(getattr(rollup, field) != value for field, value in totals.items()):
+            for field, value in totals.items():
+                setattr(rollup, field, value)
+            rollup.save(update_fields=[*ROLLUP_FIELDS, 'updated_at'])
+    return totals
+
+
+def rebuild_utilization(start_date=None, end_date=None, venue_ids=None, batch_size=1000):
+    """
+    Rebuild rollups from the bookings table (used for backfills).
+
+    Rows are replaced per range in one pass over the bookings, ordered by
+    venue and date so that memory stays bounded.
+
+    Returns:
+        int: Number of venue/days written
+    """
+    bookings = Booking.objects.all()
+    rollups = VenueDailyUtilization.objects.all()
+    if start_date:
+        bookings = bookings.filter(date__gte=start_date)
+        rollups = rollups.filter(date__gte=start_date)
+    if end_date:
+        bookings = bookings.filter(date__lte=end_date)
+        rollups = rollups.filter(date__lte=end_date)
+    if venue_ids:
+        bookings = bookings.filter(venue_id__in=venue_ids)
+        rollups = rollups.filter(venue_id__in=venue_ids)
+
+    rows = bookings.order_by('venue_id', 'date').values_list(
+        'venue_id', 'date', 'status', 'auto_cancelled', 'start_time', 'end_time', 'expected_attendees'
+    )
+
+    written = 0
+    with transaction.atomic():
+        rollups.delete()
+        batch = []
+        days = groupby(rows.iterator(chunk_size=batch_size), key=lambda row: (row[0], row[1]))
+        for (venue_id, booking_date), day_rows in days:
+            batch.append(VenueDailyUtilization(
+                venue_id=venue_id,
+                date=booking_date,
+                **summarize(row[2:] for row in day_rows)
+            ))
+            if len(batch) >= batch_size:
+                VenueDailyUtilization.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        VenueDailyUtilization.objects.bulk_create(batch)
+        written += len(batch)
+    return written
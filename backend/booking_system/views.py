@@ -2,32 +2,75 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from django.db import IntegrityError
+from django.db.models import Count, Max, Sum
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_time
 from datetime import datetime
-from .models import Booking, VenueAdmin, Notification
+import hashlib
+import json
+from .models import Booking, BookingSeries, VenueAdmin, VenueDayOccupancy, VenueDailyUtilization, Notification
+from .interval_index import booking_index
+from .assignments import get_assigned_venue_ids, is_assigned
+from . import availability_cache
+from .availability import (
+    confirmed_intervals,
+    busy_bitmap,
+    date_range,
+    find_free_slots,
+    seconds_to_time
+)
+from .occupancy import get_masks, mask_to_bitmap
+from .pagination import KeysetPagination
+from .export import stream_csv, stream_ndjson
+from .ics import ICalendarRenderer, calendar_response, feed_window, make_feed_token, read_feed_token
+from .search import search_bookings
+from .fast_serializers import BookingListFastSerializer, NotificationFastSerializer
 from .serializers import (
     BookingSerializer,
     BookingCreateSerializer,
     BookingUpdateSerializer,
     BookingCancelSerializer,
     BookingListSerializer,
+    BookingExportSerializer,
+    UtilizationQuerySerializer,
+    HeatmapQuerySerializer,
+    BookingSearchSerializer,
+    BookingSeriesSerializer,
+    BookingSeriesCreateSerializer,
     CheckAvailabilitySerializer,
+    AvailabilityGridSerializer,
+    FreeSlotSearchSerializer,
     VenueAdminSerializer,
     NotificationSerializer,
-    NotificationCreateSerializer
+    NotificationCreateSerializer,
+    NotificationSyncSerializer
 )
 from accounts.permissions import CanBookVenue, IsSuperAdmin
 from venue_management.models import Venue
+from utils.cache_utils import cache_is_shared
+from utils.fieldset_utils import SparseFieldsetListMixin, apply_sparse_fieldset
+from utils.fast_serializers import FastSerializerMixin
 from utils.email_utils import (
     send_booking_confirmation_smart,
     send_booking_cancellation_smart,
-    send_hall_admin_notification_smart
+    send_hall_admin_notification_smart,
+    send_booking_series_confirmation_smart,
+    send_hall_admin_series_notification_smart
 )
 from utils.notification_utils import (
     notify_booking_confirmed,
     notify_booking_cancelled,
-    notify_hall_admin_new_booking,
+    notify_hall_admins_new_booking,
+    notify_series_confirmed,
+    notify_hall_admins_new_series,
     get_unread_count,
+    adjust_unread_count,
     mark_all_as_read
 )
 import logging
@@ -35,12 +78,17 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-class BookingViewSet(viewsets.ModelViewSet):
+class BookingViewSet(FastSerializerMixin, SparseFieldsetListMixin, viewsets.ModelViewSet):
     """
     ViewSet for Booking CRUD operations
+    List endpoints support ?fields= (comma-separated) to return only some fields
+    List endpoints serialize with BookingListFastSerializer (see utils.fast_serializers)
     """
     queryset = Booking.objects.all()
-    pagination_class = None  # Disable pagination
+    fast_serializer_class = BookingListFastSerializer
+    pagination_class = None  # Disable pagination (opt-in keyset pagination, see _keyset_page)
+    # Longest date range of one public_calendar request (six calendar weeks)
+    PUBLIC_CALENDAR_MAX_DAYS = 42
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -58,9 +106,9 @@ class BookingViewSet(viewsets.ModelViewSet):
     def get_permissions(self):
         if self.action == 'create':
             return [CanBookVenue()]
-        elif self.action in ['update', 'partial_update', 'destroy']:
+        elif self.action in ['update', 'partial_update', 'destroy', 'export', 'utilization', 'heatmap']:
             return [IsSuperAdmin()]
-        elif self.action in ['check_availability', 'public_calendar']:
+        elif self.action in ['check_availability', 'availability_grid', 'find_slots', 'public_calendar', 'my_bookings_ics']:
             return [AllowAny()]
         return [IsAuthenticated()]
     
@@ -71,17 +119,21 @@ class BookingViewSet(viewsets.ModelViewSet):
         - Hall Admin: Bookings for their assigned venues
         - HOD/Dean: Their own bookings
         """
-        user = self.request.user
+        return self._bookings_visible_to(self.request.user)
+    
+    def _bookings_visible_to(self, user):
+        """Role-based booking queryset (see get_queryset)"""
+        # Booking serializers read venue.name and user name/department
+        bookings = Booking.objects.select_related('venue', 'user')
         
         if user.is_admin():
-            return Booking.objects.all()
+            return bookings.all()
         elif user.is_venue_admin():
             # Get venues assigned to this hall admin
-            assigned_venues = VenueAdmin.objects.filter(user=user).values_list('venue_id', flat=True)
-            return Booking.objects.filter(venue_id__in=assigned_venues)
+            return bookings.filter(venue_id__in=get_assigned_venue_ids(user))
         else:
             # HOD/Dean see only their bookings
-            return Booking.objects.filter(user=user)
+            return bookings.filter(user=user)
     
     def perform_create(self, serializer):
         """Set the user to the current authenticated user and send notification emails"""
@@ -98,10 +150,13 @@ class BookingViewSet(viewsets.ModelViewSet):
         
         # Send notification to Hall Admin if venue has assigned admin
         try:
-            venue_admins = VenueAdmin.objects.filter(venue=booking.venue)
-            for venue_admin in venue_admins:
-                send_hall_admin_notification_smart(booking, venue_admin.user)
-                notify_hall_admin_new_booking(booking, venue_admin.user)
+            hall_admins = [
+                venue_admin.user
+                for venue_admin in VenueAdmin.objects.filter(venue=booking.venue).select_related('user')
+            ]
+            for hall_admin in hall_admins:
+                send_hall_admin_notification_smart(booking, hall_admin)
+            notify_hall_admins_new_booking(booking, hall_admins)
         except Exception as e:
             logger.error(f"Failed to send hall admin notification: {str(e)}")
     
@@ -112,37 +167,108 @@ class BookingViewSet(viewsets.ModelViewSet):
         - Hall Admin: Bookings for assigned venues
         - HOD/Dean/Others: Their own bookings
         """
-        bookings = self.get_queryset().order_by('-created_at')
-        logger.info(f"User: {request.user.email}, Role: {request.user.role}, Bookings count: {bookings.count()}")
-        serializer = BookingListSerializer(bookings, many=True)
-        return Response(serializer.data)
+        bookings = self.get_queryset()
+        if KeysetPagination.requested(request):
+            return self._keyset_page(bookings, ('-created_at', '-id'))
+        
+        data = self.serialize_list(bookings.order_by('-created_at'), BookingListSerializer)
+        logger.info(f"User: {request.user.email}, Role: {request.user.role}, Bookings count: {len(data)}")
+        return Response(data)
+    
+    def list(self, request, *args, **kwargs):
+        """List bookings; cursor-paginated on request (?paginate=cursor)"""
+        if KeysetPagination.requested(request):
+            return self._keyset_page(self.get_queryset(), ('-date', '-start_time', '-id'))
+        return super().list(request, *args, **kwargs)
+    
+    def _keyset_page(self, bookings, ordering):
+        """
+        Serialize one keyset page of bookings.
+        Query params: cursor (from the previous page's next_cursor), page_size
+        """
+        paginator = KeysetPagination(ordering)
+        # Cursors are built from the ordering fields, so keep them loaded
+        key_columns = [field.lstrip('-') for field in ordering]
+        fast = self.get_fast_serializer(BookingListSerializer)
+        if fast is not None:
+            page = paginator.paginate_queryset(fast.values(bookings, key_columns), self.request, view=self)
+            return paginator.get_paginated_response(fast.to_representation_rows(page))
+        
+        bookings, sparse = apply_sparse_fieldset(
+            self.request, bookings, BookingListSerializer, extra_columns=key_columns
+        )
+        page = paginator.paginate_queryset(bookings, self.request, view=self)
+        serializer = BookingListSerializer(page, many=True, **sparse)
+        return paginator.get_paginated_response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def calendar_feed(self, request):
+        """Get the private iCalendar feed URL of the current user's bookings"""
+        url = reverse('booking-my-bookings-feed')
+        return Response({
+            'url': request.build_absolute_uri(f"{url}?token={make_feed_token(request.user)}")
+        })
+    
+    @action(detail=False, methods=['get'], url_path='my_bookings.ics', renderer_classes=[ICalendarRenderer])
+    def my_bookings_ics(self, request):
+        """
+        iCalendar feed of the bookings my_bookings would return
+        Calendar apps cannot send a JWT, so the user is identified by the
+        signed ?token= from calendar_feed (it expires after
+        ICS_FEED_TOKEN_MAX_AGE and is revoked by a password change)
+        """
+        user = read_feed_token(request.query_params.get('token', ''))
+        if user is None:
+            return Response({'detail': 'Invalid feed token'}, status=status.HTTP_404_NOT_FOUND)
+        
+        start_date, end_date = feed_window()
+        bookings = self._bookings_visible_to(user).filter(date__gte=start_date, date__lte=end_date)
+        return calendar_response(request, f'BookIT - {user.get_full_name() or user.email}', bookings, private=True)
     
     @action(detail=False, methods=['post'])
     def check_availability(self, request):
-        """Check if a venue is available for given date and time slot"""
+        """
+        Check if a venue is available for given date and time slot
+        Query params: detail=minimal returns conflicts as start/end pairs only
+        """
         serializer = CheckAvailabilitySerializer(data=request.data)
         if serializer.is_valid():
             venue = serializer.validated_data['venue']
             booking_date = serializer.validated_data['date']
             start_time = serializer.validated_data['start_time']
             end_time = serializer.validated_data['end_time']
+            minimal = request.query_params.get('detail') == 'minimal'
             
-            # Check for conflicts
-            conflicts = Booking.objects.filter(
-                venue=venue,
-                date=booking_date,
-                status='confirmed'
-            ).filter(
-                start_time__lt=end_time,
-                end_time__gt=start_time
-            )
+            # Check for conflicts (in-memory index first, database only
+            # when the index reports a clash and we need the details)
+            conflicts = []
+            if booking_index.has_conflict(venue.id, booking_date, start_time, end_time):
+                overlapping = Booking.objects.filter(
+                    venue=venue,
+                    date=booking_date,
+                    status='confirmed'
+                ).filter(
+                    start_time__lt=end_time,
+                    end_time__gt=start_time
+                ).order_by('start_time')
+                if minimal:
+                    conflicts = [
+                        {'start_time': conflict_start.isoformat(), 'end_time': conflict_end.isoformat()}
+                        for conflict_start, conflict_end in overlapping.values_list('start_time', 'end_time')
+                    ]
+                else:
+                    conflicts = BookingListSerializer(
+                        overlapping.select_related('venue', 'user'), many=True
+                    ).data
+                if not conflicts:
+                    # Stale index entry (slot freed by another process)
+                    booking_index.invalidate(venue.id, booking_date)
             
-            if conflicts.exists():
-                conflicting_bookings = BookingListSerializer(conflicts, many=True).data
+            if conflicts:
                 return Response({
                     'available': False,
                     'message': 'Venue is not available for the selected time slot',
-                    'conflicts': conflicting_bookings
+                    'conflicts': conflicts
                 })
             
             return Response({
@@ -152,6 +278,110 @@ class BookingViewSet(viewsets.ModelViewSet):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['get'])
+    def availability_grid(self, request):
+        """
+        Free/busy bitmap for several venues over a date range
+        Query params: venue_ids (comma-separated), start_date, end_date, slot_minutes
+        Each day is a string with one character per slot ('1' = busy, '0' = free)
+        """
+        serializer = AvailabilityGridSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        venues = serializer.validated_data['venue_ids']
+        start_date = serializer.validated_data['start_date']
+        end_date = serializer.validated_data['end_date']
+        slot_minutes = serializer.validated_data['slot_minutes']
+        
+        venue_ids = [venue.id for venue in venues]
+        days = list(date_range(start_date, end_date))
+        
+        if slot_minutes % VenueDayOccupancy.CELL_MINUTES == 0:
+            # Whole 15-minute cells: read the precomputed occupancy masks
+            masks = get_masks(venue_ids, start_date, end_date)
+            day_bitmap = lambda venue_id, day: mask_to_bitmap(masks.get((venue_id, day), 0), slot_minutes)
+        else:
+            intervals = confirmed_intervals(venue_ids, start_date, end_date)
+            day_bitmap = lambda venue_id, day: busy_bitmap(intervals.get((venue_id, day), []), slot_minutes)
+        
+        grid = []
+        for venue in venues:
+            grid.append({
+                'id': venue.id,
+                'name': venue.name,
+                'days': {
+                    str(day): day_bitmap(venue.id, day)
+                    for day in days
+                }
+            })
+        
+        return Response({
+            'start_date': start_date,
+            'end_date': end_date,
+            'slot_minutes': slot_minutes,
+            'slots_per_day': (24 * 60) // slot_minutes,
+            'venues': grid
+        })
+    
+    @action(detail=False, methods=['get'])
+    def find_slots(self, request):
+        """
+        Find the earliest free intervals of a given duration across venues
+        Query params: duration_minutes, attendees, facilities (comma-separated),
+        start_date, end_date, day_start, day_end, limit
+        Only active venues with enough capacity and all requested facilities are searched
+        """
+        serializer = FreeSlotSearchSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        params = serializer.validated_data
+        candidates = Venue.objects.filter(
+            is_active=True,
+            capacity__gte=params['attendees']
+        ).only('id', 'name', 'building', 'capacity', 'facilities')
+        # JSON containment lookups are not available on SQLite, so facilities
+        # are matched in Python on the (already capacity-filtered) venues
+        venues = [
+            venue for venue in candidates
+            if all(venue.has_facility(facility) for facility in params['facilities'])
+        ]
+        
+        slots = find_free_slots(
+            venues,
+            params['start_date'],
+            params['end_date'],
+            params['duration_minutes'],
+            params['day_start'],
+            params['day_end'],
+            params['limit'],
+            now=timezone.localtime()
+        )
+        
+        duration = params['duration_minutes'] * 60
+        results = []
+        for slot_date, free_from, free_until, venue in slots:
+            results.append({
+                'venue': {
+                    'id': venue.id,
+                    'name': venue.name,
+                    'building': venue.building,
+                    'capacity': venue.capacity
+                },
+                'date': str(slot_date),
+                'start_time': str(seconds_to_time(free_from)),
+                'end_time': str(seconds_to_time(free_from + duration)),
+                'free_from': str(seconds_to_time(free_from)),
+                'free_until': str(seconds_to_time(free_until))
+            })
+        
+        return Response({
+            'duration_minutes': params['duration_minutes'],
+            'venues_searched': len(venues),
+            'results': results
+        })
+    
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
         """Cancel a booking"""
@@ -159,21 +389,16 @@ class BookingViewSet(viewsets.ModelViewSet):
             booking = self.get_object()
             user = request.user
             
-            print(f"Cancel booking attempt - User: {user.email}, Booking ID: {booking.id}")
-            print(f"Booking venue: {booking.venue.name}, Booking user: {booking.user.email}")
-            
             # Check if user can cancel this booking
             # Allowed: Booking owner, Super Admin, or Hall Admin for assigned venue
             is_owner = user == booking.user
             is_admin = user.is_admin()
-            is_venue_admin = user.is_venue_admin() and VenueAdmin.objects.filter(user=user, venue=booking.venue).exists()
-            
-            print(f"is_owner: {is_owner}, is_admin: {is_admin}, is_venue_admin: {is_venue_admin}")
+            is_venue_admin = user.is_venue_admin() and is_assigned(user, booking.venue_id)
             
             can_cancel = is_owner or is_admin or is_venue_admin
             
             if not can_cancel:
-                print(f"Permission denied for user {user.email}")
+                logger.warning(f"User {user.email} is not allowed to cancel booking {booking.id}")
                 return Response(
                     {'error': 'You do not have permission to cancel this booking'},
                     status=status.HTTP_403_FORBIDDEN
@@ -182,7 +407,7 @@ class BookingViewSet(viewsets.ModelViewSet):
             serializer = BookingCancelSerializer(booking, data=request.data)
             if serializer.is_valid():
                 serializer.save()
-                print(f"Booking {booking.id} cancelled successfully")
+                logger.info(f"Booking {booking.id} cancelled by {user.email}")
                 
                 # Send cancellation email to booking owner (async if Celery available, sync otherwise)
                 cancelled_by = user if user != booking.user else None
@@ -199,12 +424,9 @@ class BookingViewSet(viewsets.ModelViewSet):
                     'booking': BookingSerializer(booking).data
                 })
             
-            print(f"Serializer errors: {serializer.errors}")
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            print(f"Error in cancel: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"Error in cancel: {str(e)}")
             return Response(
                 {'error': f'Failed to cancel booking: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -217,10 +439,11 @@ class BookingViewSet(viewsets.ModelViewSet):
         bookings = self.get_queryset().filter(
             date__gte=today,
             status='confirmed'
-        ).order_by('date', 'start_time')
+        )
+        if KeysetPagination.requested(request):
+            return self._keyset_page(bookings, ('date', 'start_time', 'id'))
         
-        serializer = BookingListSerializer(bookings, many=True)
-        return Response(serializer.data)
+        return Response(self.serialize_list(bookings.order_by('date', 'start_time'), BookingListSerializer))
     
     @action(detail=False, methods=['get'])
     def past(self, request):
@@ -228,10 +451,174 @@ class BookingViewSet(viewsets.ModelViewSet):
         today = timezone.now().date()
         bookings = self.get_queryset().filter(
             date__lt=today
-        ).order_by('-date', '-start_time')
+        )
+        if KeysetPagination.requested(request):
+            return self._keyset_page(bookings, ('-date', '-start_time', '-id'))
         
-        serializer = BookingListSerializer(bookings, many=True)
-        return Response(serializer.data)
+        return Response(self.serialize_list(bookings.order_by('-date', '-start_time'), BookingListSerializer))
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Full-text search over the bookings visible to the user, best match first
+        Matches event name, description, requester name/email and department;
+        every word must match (as a prefix)
+        Query params: q (required), limit (1-100, default 20), status, fields
+        """
+        serializer = BookingSearchSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        params = serializer.validated_data
+        user = request.user
+        # Same scoping as get_queryset, applied inside the ranked query
+        scope = {}
+        if user.is_admin():
+            pass
+        elif user.is_venue_admin():
+            scope['venue_ids'] = get_assigned_venue_ids(user)
+        else:
+            scope['user_id'] = user.id
+        
+        ranks = dict(search_bookings(params['q'], limit=params['limit'], status=params.get('status'), **scope))
+        position = {booking_id: index for index, booking_id in enumerate(ranks)}
+        bookings = self.get_queryset().filter(id__in=list(ranks))
+        fast = self.get_fast_serializer(BookingListSerializer)
+        if fast is not None:
+            rows = sorted(fast.values(bookings, ['id']), key=lambda row: position[row['id']])
+            results = fast.to_representation_rows(rows)
+            booking_ids = [row['id'] for row in rows]
+        else:
+            bookings, sparse = apply_sparse_fieldset(request, bookings, BookingListSerializer)
+            bookings = sorted(bookings, key=lambda booking: position[booking.id])
+            results = BookingListSerializer(bookings, many=True, **sparse).data
+            booking_ids = [booking.id for booking in bookings]
+        for booking_id, row in zip(booking_ids, results):
+            row['rank'] = ranks[booking_id]
+        
+        return Response({
+            'query': params['q'],
+            'count': len(results),
+            'results': results
+        })
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream bookings as CSV or NDJSON (Super Admin only)
+        Query params: export_format (csv|ndjson, default csv), start_date,
+        end_date, venue_ids (comma-separated), status - all optional
+        """
+        serializer = BookingExportSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        filters = serializer.validated_data
+        bookings = Booking.objects.all()
+        if filters.get('start_date'):
+            bookings = bookings.filter(date__gte=filters['start_date'])
+        if filters.get('end_date'):
+            bookings = bookings.filter(date__lte=filters['end_date'])
+        if filters.get('venue_ids'):
+            bookings = bookings.filter(venue_id__in=filters['venue_ids'])
+        if filters.get('status'):
+            bookings = bookings.filter(status=filters['status'])
+        bookings = bookings.order_by('date', 'start_time', 'id')
+        
+        export_format = filters['export_format']
+        if export_format == 'ndjson':
+            response = StreamingHttpResponse(stream_ndjson(bookings), content_type='application/x-ndjson')
+        else:
+            response = StreamingHttpResponse(stream_csv(bookings), content_type='text/csv')
+        
+        filename = f"bookings_{filters.get('start_date') or 'all'}_{filters.get('end_date') or 'all'}.{export_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
+    @action(detail=False, methods=['get'])
+    def utilization(self, request):
+        """
+        Venue utilization dashboard (Super Admin only), read from the daily rollups
+        Query params: start_date, end_date (default: last 30 days), venue_ids (comma-separated)
+        """
+        from django.conf import settings
+        
+        serializer = UtilizationQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        start_date = serializer.validated_data['start_date']
+        end_date = serializer.validated_data['end_date']
+        venue_ids = serializer.validated_data.get('venue_ids')
+        
+        venues = Venue.objects.order_by('name')
+        if venue_ids:
+            venues = venues.filter(id__in=venue_ids)
+        venues = list(venues.values('id', 'name'))
+        
+        rollups = VenueDailyUtilization.objects.filter(
+            venue_id__in=[venue['id'] for venue in venues],
+            date__gte=start_date,
+            date__lte=end_date
+        ).order_by('date')
+        metrics = ['booked_minutes', 'booking_count', 'cancelled_count', 'auto_cancelled_count', 'attendees']
+        
+        days_by_venue = {}
+        for row in rollups.values('venue_id', 'date', *metrics):
+            days_by_venue.setdefault(row.pop('venue_id'), []).append(row)
+        totals = {
+            row.pop('venue_id'): row
+            for row in rollups.order_by().values('venue_id').annotate(
+                **{metric: Sum(metric) for metric in metrics}
+            )
+        }
+        
+        # Bookable minutes in the range, for the utilization percentage
+        day_minutes = getattr(settings, 'UTILIZATION_DAY_MINUTES', 12 * 60)
+        available_minutes = day_minutes * ((end_date - start_date).days + 1)
+        
+        results = []
+        for venue in venues:
+            venue_totals = totals.get(venue['id'], dict.fromkeys(metrics, 0))
+            results.append({
+                **venue,
+                **venue_totals,
+                'utilization': round(100 * venue_totals['booked_minutes'] / available_minutes, 1),
+                'days': days_by_venue.get(venue['id'], [])
+            })
+        
+        return Response({
+            'start_date': start_date,
+            'end_date': end_date,
+            'day_minutes': day_minutes,
+            'venues': results
+        })
+    
+    @action(detail=False, methods=['get'])
+    def heatmap(self, request):
+        """
+        Weekday x hour occupancy heatmap per venue or building (Super Admin only)
+        Query params: start_date, end_date, group_by (venue|building), venue_ids (comma-separated)
+        Rows are Monday..Sunday, columns hours 0..23
+        """
+        from .analytics import occupancy_heatmap
+        
+        serializer = HeatmapQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = serializer.validated_data
+        return Response({
+            'start_date': data['start_date'],
+            'end_date': data['end_date'],
+            'group_by': data['group_by'],
+            'results': occupancy_heatmap(
+                data['start_date'],
+                data['end_date'],
+                group_by=data['group_by'],
+                venue_ids=data.get('venue_ids')
+            )
+        })
     
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
     def public_calendar(self, request):
@@ -239,6 +626,10 @@ class BookingViewSet(viewsets.ModelViewSet):
         Public endpoint for calendar view - no authentication required
         Returns approved bookings with limited information (time, event name, department)
         Filters out sensitive data like contact numbers and special requirements
+        Query params: start_date, end_date, venue_ids (comma-separated, optional)
+        The range may span at most PUBLIC_CALENDAR_MAX_DAYS days
+        Responses carry an ETag (see _public_calendar_etag); a matching
+        If-None-Match gets 304 Not Modified without loading any booking
         """
         from datetime import timedelta
         
@@ -261,36 +652,92 @@ class BookingViewSet(viewsets.ModelViewSet):
             start_date = today - timedelta(days=today.weekday())
             end_date = start_date + timedelta(days=6)
         
+        if end_date < start_date:
+            return Response(
+                {'error': 'end_date must be on or after start_date'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if (end_date - start_date).days >= self.PUBLIC_CALENDAR_MAX_DAYS:
+            return Response(
+                {'error': f'Date range cannot exceed {self.PUBLIC_CALENDAR_MAX_DAYS} days'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        active_venues = Venue.objects.filter(is_active=True)
+        venue_ids_str = request.query_params.get('venue_ids')
+        if venue_ids_str:
+            try:
+                venue_ids = {int(value) for value in venue_ids_str.split(',') if value.strip()}
+            except ValueError:
+                return Response(
+                    {'error': 'venue_ids must be a comma-separated list of integers'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            active_venues = active_venues.filter(id__in=venue_ids)
+        
+        venues = dict(active_venues.order_by('id').values_list('id', 'name'))
+        
+        # The validator is computed before any booking is loaded, so a
+        # matching If-None-Match costs no serialization at all
+        etag = self._public_calendar_etag(start_date, end_date, venues)
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+        if etag in if_none_match or '*' in if_none_match:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            response['ETag'] = etag
+            patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+            return response
+        
         # Get only confirmed bookings within date range for active venues
-        bookings = Booking.objects.filter(
-            date__gte=start_date,
-            date__lte=end_date,
-            status='confirmed',
-            venue__is_active=True
-        ).select_related('venue', 'user').order_by('date', 'start_time')
+        # (served per venue/day from the availability cache)
+        days = availability_cache.get_days(venues.keys(), date_range(start_date, end_date))
         
         # Format data for calendar view with limited information
         calendar_data = []
-        for booking in bookings:
-            calendar_data.append({
-                'id': booking.id,
-                'venue': {
-                    'id': booking.venue.id,
-                    'name': booking.venue.name
-                },
-                'date': str(booking.date),  # Convert to string for JSON serialization
-                'start_time': str(booking.start_time),
-                'end_time': str(booking.end_time),
-                'event_name': booking.event_name or 'Event',
-                'department': booking.user.department or 'N/A',
-                # Exclude sensitive data: contact_number, special_requirements, user details
-            })
+        for (venue_id, booking_date), day_bookings in days.items():
+            for booking_id, booking_start, booking_end, event_name, department in day_bookings:
+                calendar_data.append({
+                    'id': booking_id,
+                    'venue': {
+                        'id': venue_id,
+                        'name': venues[venue_id]
+                    },
+                    'date': str(booking_date),  # Convert to string for JSON serialization
+                    'start_time': str(booking_start),
+                    'end_time': str(booking_end),
+                    'event_name': event_name or 'Event',
+                    'department': department or 'N/A',
+                    # Exclude sensitive data: contact_number, special_requirements, user details
+                })
+        calendar_data.sort(key=lambda item: (item['date'], item['start_time'], item['id']))
         
-        return Response({
+        response = Response({
             'start_date': start_date,
             'end_date': end_date,
             'bookings': calendar_data
         })
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+        return response
+    
+    def _public_calendar_etag(self, start_date, end_date, venues):
+        """
+        Strong ETag for the public calendar of a range and venues ({id: name}).
+        With a shared cache it hashes the venues' availability versions, which
+        every booking or venue write bumps. Otherwise it hashes the latest
+        updated_at and the count of the range's bookings of any status (a
+        cancellation or edit moves the former, a deletion the latter).
+        """
+        if cache_is_shared():
+            state = availability_cache.get_venue_versions(venues.keys())
+        else:
+            state = Booking.objects.filter(
+                venue_id__in=venues.keys(), date__gte=start_date, date__lte=end_date
+            ).aggregate(latest=Max('updated_at'), count=Count('id'))
+        validator = json.dumps(
+            [start_date, end_date, sorted(venues.items()), state],
+            cls=DjangoJSONEncoder, sort_keys=True
+        )
+        return quote_etag(hashlib.md5(validator.encode()).hexdigest())
     
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def confirm(self, request, pk=None):
@@ -350,10 +797,7 @@ class BookingViewSet(viewsets.ModelViewSet):
         # Check if user is admin for this venue or super admin
         user = request.user
         is_super_admin = user.is_staff and user.role == 'super_admin'
-        is_hall_admin = VenueAdmin.objects.filter(
-            user=user,
-            venue=booking.venue
-        ).exists()
+        is_hall_admin = is_assigned(user, booking.venue_id)
         
         if not (is_super_admin or is_hall_admin):
             return Response(
@@ -375,12 +819,79 @@ class BookingViewSet(viewsets.ModelViewSet):
         })
 
 
+class BookingSeriesViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet for recurring booking series
+    Creating a series books every occurrence in one request
+    """
+    queryset = BookingSeries.objects.all()
+    pagination_class = None
+    http_method_names = ['get', 'post', 'head', 'options']
+    
+    def get_serializer_class(self):
+        if self.action == 'create':
+            return BookingSeriesCreateSerializer
+        return BookingSeriesSerializer
+    
+    def get_permissions(self):
+        if self.action == 'create':
+            return [CanBookVenue()]
+        return [IsAuthenticated()]
+    
+    def get_queryset(self):
+        """
+        Filter series based on user role
+        - Super Admin: All series
+        - Hall Admin: Series for their assigned venues
+        - HOD/Dean: Their own series
+        """
+        user = self.request.user
+        queryset = BookingSeries.objects.select_related('venue', 'user').prefetch_related('bookings')
+        
+        if user.is_admin():
+            return queryset
+        elif user.is_venue_admin():
+            return queryset.filter(venue_id__in=get_assigned_venue_ids(user))
+        return queryset.filter(user=user)
+    
+    def create(self, request, *args, **kwargs):
+        """Create the series and return it with its occurrences"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        series = serializer.save(user=request.user)
+        occurrence_count = series.bookings.count()
+        
+        # One summary email and notification per recipient for the whole series
+        send_booking_series_confirmation_smart(series)
+        
+        try:
+            notify_series_confirmed(series, occurrence_count)
+        except Exception as e:
+            logger.error(f"Failed to create series confirmation notification: {str(e)}")
+        
+        try:
+            hall_admins = [
+                venue_admin.user
+                for venue_admin in VenueAdmin.objects.filter(venue=series.venue).select_related('user')
+            ]
+            for hall_admin in hall_admins:
+                send_hall_admin_series_notification_smart(series, hall_admin)
+            notify_hall_admins_new_series(series, hall_admins, occurrence_count)
+        except Exception as e:
+            logger.error(f"Failed to send hall admin series notification: {str(e)}")
+        
+        return Response(
+            BookingSeriesSerializer(series).data,
+            status=status.HTTP_201_CREATED
+        )
+
+
 class VenueAdminViewSet(viewsets.ModelViewSet):
     """
     ViewSet for VenueAdmin (Hall Admin assignment) operations
     Only Super Admin can manage venue admin assignments
     """
-    queryset = VenueAdmin.objects.all()
+    queryset = VenueAdmin.objects.select_related('user', 'venue')
     serializer_class = VenueAdminSerializer
     permission_classes = [IsSuperAdmin]
     
@@ -394,7 +905,7 @@ class VenueAdminViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        assignments = VenueAdmin.objects.filter(venue_id=venue_id)
+        assignments = self.get_queryset().filter(venue_id=venue_id)
         serializer = VenueAdminSerializer(assignments, many=True)
         return Response(serializer.data)
     
@@ -408,7 +919,7 @@ class VenueAdminViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        assignments = VenueAdmin.objects.filter(admin_id=admin_id)
+        assignments = self.get_queryset().filter(user_id=admin_id)
         serializer = VenueAdminSerializer(assignments, many=True)
         return Response(serializer.data)
     
@@ -425,34 +936,93 @@ class VenueAdminViewSet(viewsets.ModelViewSet):
         
         from venue_management.serializers import VenueSerializer
         # Get venue IDs assigned to this admin
-        venue_ids = VenueAdmin.objects.filter(user=user).values_list('venue_id', flat=True)
-        venues = Venue.objects.filter(id__in=venue_ids)
+        venues = Venue.objects.filter(id__in=get_assigned_venue_ids(user))
         
         serializer = VenueSerializer(venues, many=True)
         return Response(serializer.data)
 
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(FastSerializerMixin, SparseFieldsetListMixin, viewsets.ModelViewSet):
     """
     ViewSet for Notification CRUD operations
     Users can only see their own notifications
+    List supports ?fields= (comma-separated) to return only some fields
+    List and recent support delta sync with ?since_id= (or ?since=<ISO datetime>)
     """
     serializer_class = NotificationSerializer
+    fast_serializer_class = NotificationFastSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = None  # Disable pagination for notifications
     
     def get_queryset(self):
         """Return only the current user's notifications, ordered by newest first"""
-        return Notification.objects.filter(user=self.request.user).order_by('-created_at')
+        return Notification.objects.filter(user=self.request.user).select_related('user').order_by('-created_at')
+    
+    @staticmethod
+    def _delta_requested(request):
+        return 'since_id' in request.query_params or 'since' in request.query_params
+    
+    def _delta(self, request):
+        """
+        Notifications newer than since_id (or the since timestamp), oldest
+        first, with the current unread count
+        Returns {results, unread_count, last_id, has_more}; poll again with
+        since_id=last_id (immediately while has_more is true)
+        """
+        from django.conf import settings
+        
+        serializer = NotificationSyncSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        params = serializer.validated_data
+        notifications = Notification.objects.filter(user=request.user).select_related('user')
+        if 'since_id' in params:
+            # (user, id) index: an empty poll is a single index probe
+            notifications = notifications.filter(id__gt=params['since_id']).order_by('id')
+        else:
+            notifications = notifications.filter(created_at__gt=params['since']).order_by('created_at', 'id')
+        
+        fast = self.get_fast_serializer(NotificationSerializer)
+        if fast is not None:
+            rows = list(fast.values(notifications, ['id'])[:params['limit'] + 1])
+            ids = [row['id'] for row in rows]
+        else:
+            notifications, sparse = apply_sparse_fieldset(request, notifications, NotificationSerializer)
+            rows = list(notifications[:params['limit'] + 1])
+            ids = [row.id for row in rows]
+        has_more = len(rows) > params['limit']
+        rows = rows[:params['limit']]
+        ids = ids[:params['limit']]
+        
+        response = Response({
+            'results': fast.to_representation_rows(rows) if fast else NotificationSerializer(rows, many=True, **sparse).data,
+            'unread_count': get_unread_count(request.user),
+            'last_id': max(ids, default=params.get('since_id')),
+            'has_more': has_more
+        })
+        # Each poll has a new since_id; let clients reuse a response briefly
+        patch_cache_control(response, private=True, max_age=getattr(settings, 'NOTIFICATION_SYNC_MAX_AGE', 5))
+        return response
+    
+    def list(self, request, *args, **kwargs):
+        if self._delta_requested(request):
+            return self._delta(request)
+        return super().list(request, *args, **kwargs)
     
     def get_serializer_class(self):
         if self.action == 'create':
             return NotificationCreateSerializer
         return NotificationSerializer
     
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        if not instance.is_read:
+            adjust_unread_count(instance.user_id, -1)
+    
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
-        """Get count of unread notifications"""
+        """Get count of unread notifications (a single cache read)"""
         count = get_unread_count(request.user)
         return Response({'unread_count': count})
     
@@ -477,14 +1047,14 @@ class NotificationViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def recent(self, request):
-        """Get recent notifications (last 10)"""
-        notifications = self.get_queryset()[:10]
-        serializer = NotificationSerializer(notifications, many=True)
-        return Response(serializer.data)
+        """Get recent notifications (last 10), or only newer ones with ?since_id="""
+        if self._delta_requested(request):
+            return self._delta(request)
+        return Response(self.serialize_list(self.get_queryset()[:10], NotificationSerializer))
     
     @action(detail=False, methods=['delete'])
     def clear_all(self, request):
-        """Delete all read notifications"""
+        """Delete all read notifications (the unread count is unaffected)"""
         deleted_count = self.get_queryset().filter(is_read=True).delete()[0]
         return Response({
             'message': f'{deleted_count} notification(s) deleted',
@@ -506,7 +1076,7 @@ class WaitlistViewSet(viewsets.ModelViewSet):
         user = self.request.user
         if user.is_staff:
             return Waitlist.objects.select_related('venue', 'user').all()
-        return Waitlist.objects.filter(user=user).select_related('venue')
+        return Waitlist.objects.filter(user=user).select_related('venue', 'user')
     
     def get_serializer_class(self):
         from .serializers import WaitlistSerializer
@@ -526,7 +1096,7 @@ class WaitlistViewSet(viewsets.ModelViewSet):
             user=request.user,
             claimed=False,
             expired=False
-        ).select_related('venue').order_by('date', 'start_time')
+        ).select_related('venue', 'user').order_by('date', 'start_time')
         
         serializer = WaitlistSerializer(entries, many=True, context={'request': request})
         return Response(serializer.data)
@@ -623,7 +1193,13 @@ class WaitlistViewSet(viewsets.ModelViewSet):
                     'booking_id': booking.id,
                     'waitlist_entry_id': waitlist_entry.id
                 }, status=status.HTTP_201_CREATED)
-                
+        
+        except IntegrityError:
+            # Database rejected an overlapping booking created in the meantime
+            return Response(
+                {'error': 'Sorry, this slot has already been booked by someone else'},
+                status=status.HTTP_409_CONFLICT
+            )
         except Exception as e:
             logger.error(f"Error claiming waitlist slot: {e}")
             return Response(
@@ -679,14 +1255,24 @@ class WaitlistViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Check if slot is available
-        conflicting_booking = Booking.objects.filter(
-            venue_id=venue_id,
-            date=date,
-            start_time=start_time,
-            end_time=end_time,
-            status='confirmed'
-        ).exists()
+        try:
+            slot_venue_id = int(venue_id)
+            slot_date = parse_date(str(date))
+            slot_start = parse_time(str(start_time))
+            slot_end = parse_time(str(end_time))
+        except (TypeError, ValueError):
+            slot_date = slot_start = slot_end = None
+        if not all([slot_date, slot_start, slot_end]):
+            return Response(
+                {'error': 'Invalid venue, date or time format'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Check if slot is available (from the cached day of the venue)
+        conflicting_booking = any(
+            booking_start == slot_start and booking_end == slot_end
+            for _, booking_start, booking_end, *_ in availability_cache.get_day(slot_venue_id, slot_date)
+        )
         
         if not conflicting_booking:
             return Response({
@@ -2,6 +2,11 @@
 ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Besides the Django app it serves the realtime Server-Sent Events stream and
+the per-venue WebSocket (booking_system.realtime), which need an ASGI server
+such as uvicorn or daphne:
+
+    uvicorn config.asgi:application
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -13,4 +18,31 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once the app registry is ready
+from booking_system.realtime import (  # noqa: E402
+    EVENT_STREAM_PATH, VENUE_SOCKET_PATH, EventStream, VenueSocket
+)
+
+event_stream = EventStream()
+venue_socket = VenueSocket()
+
+
+def _matches(scope, path):
+    return scope['path'].rstrip('/') == path.rstrip('/')
+
+
+async def application(scope, receive, send):
+    """Route the realtime endpoints to their apps and everything else to Django"""
+    if scope['type'] == 'http' and _matches(scope, EVENT_STREAM_PATH):
+        await event_stream(scope, receive, send)
+    elif scope['type'] == 'websocket':
+        if _matches(scope, VENUE_SOCKET_PATH):
+            await venue_socket(scope, receive, send)
+        else:
+            # Django does not serve WebSockets: reject the handshake
+            await receive()
+            await send({'type': 'websocket.close'})
+    else:
+        await django_application(scope, receive, send)
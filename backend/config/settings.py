@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 from pathlib import Path
+from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -55,6 +56,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # Add CORS middleware first
+    'utils.query_budget.QueryBudgetMiddleware',  # SQL query counts / N+1 detection
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -276,7 +278,185 @@ CELERY_BEAT_SCHEDULE = {
             'expires': 300,  # Task expires after 5 minutes
         }
     },
+    
+    # Repair drift in the cached unread notification counters
+    'reconcile-unread-notification-counts': {
+        'task': 'booking_system.tasks.reconcile_unread_notification_counts',
+        'schedule': crontab(minute='*/15'),  # Every 15 minutes
+        'options': {
+            'expires': 900,  # Task expires after 15 minutes
+        }
+    },
+    
+    # Archive/delete notifications past the retention age
+    'archive-old-notifications': {
+        'task': 'booking_system.tasks.archive_old_notifications',
+        'schedule': crontab(hour=3, minute=30),  # Daily at 03:30
+        'options': {
+            'expires': 3600,  # Task expires after 1 hour
+        }
+    },
+    
+    # Rebuild recent utilization rollups from the bookings table (repairs drift)
+    'reconcile-venue-utilization': {
+        'task': 'booking_system.tasks.reconcile_venue_utilization',
+        'schedule': crontab(hour=2, minute=45),  # Daily at 02:45
+        'options': {
+            'expires': 3600,  # Task expires after 1 hour
+        }
+    },
 }
 
 # Celery Beat will create this file to track schedules
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Availability, hall admin assignments and unread counters are invalidated by
+# writes in any process (web workers, Celery), so they are only cached when
+# the backend is shared. With the default process-local LocMemCache they are
+# read from the database instead (see utils.cache_utils.cache_is_shared).
+# Deployments with several processes point the cache at the Redis server
+# Celery already uses, e.g. in .env:
+#   CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+#   CACHE_LOCATION=redis://localhost:6379/1
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='bookit'),
+    }
+}
+
+
+# ============================
+# BOOKING AVAILABILITY
+# ============================
+
+# Seconds a venue/day availability entry is kept in the cache. Entries are
+# keyed by a per-venue version, so writes invalidate them immediately.
+AVAILABILITY_CACHE_TIMEOUT = 60 * 60
+
+# Seconds an in-memory venue/day interval index entry is trusted before it
+# is reloaded. Entries are also reloaded as soon as a write in any process
+# bumps the venue's version in the shared cache; without a shared cache the
+# index is not used.
+BOOKING_INTERVAL_INDEX_TTL = 30
+
+# Maximum number of venue/day entries kept in the interval index per process
+BOOKING_INTERVAL_INDEX_MAX_DAYS = 2048
+
+# Bookable minutes per venue per day, the denominator of utilization
+# percentages on the dashboard (08:00-20:00)
+UTILIZATION_DAY_MINUTES = 12 * 60
+
+# Days back (from today, plus every future day) rebuilt by the nightly
+# utilization reconciliation; rollups are otherwise updated incrementally
+UTILIZATION_RECONCILE_DAYS = 30
+
+# Seconds hall admin venue assignments are cached per user (invalidated
+# whenever an assignment is saved or deleted). Kept short because it gates
+# authorization: it bounds how long a revoked assignment bulk-deleted
+# outside the signals still grants access. Not cached at all when the
+# cache backend is per process.
+VENUE_ADMIN_CACHE_TIMEOUT = 60
+
+# Seconds a user's unread notification counter is cached. Counters are
+# adjusted on every write and dropped (to be recounted) by a periodic
+# reconciliation task.
+UNREAD_COUNT_CACHE_TIMEOUT = 60 * 60
+
+# Notifications older than this many days are moved to the archive table
+# ('archive') or deleted ('delete') by a nightly task, in batches of
+# NOTIFICATION_RETENTION_BATCH_SIZE rows with an optional pause between
+# batches for other writers
+NOTIFICATION_RETENTION_DAYS = 90
+NOTIFICATION_RETENTION_MODE = 'archive'
+NOTIFICATION_RETENTION_BATCH_SIZE = 1000
+NOTIFICATION_RETENTION_PAUSE_SECONDS = 0
+
+# Seconds clients may reuse a notification delta-sync (?since_id=) response
+NOTIFICATION_SYNC_MAX_AGE = 5
+
+# List endpoints of views with a fast_serializer_class build responses from
+# values() rows instead of DRF serializers (same output; see
+# utils.fast_serializers). Set to False to use the DRF serializers everywhere.
+FAST_SERIALIZERS = True
+
+
+# ============================
+# QUERY BUDGETS
+# ============================
+
+# Maximum SQL queries per endpoint (DRF url name and HTTP method), checked
+# by utils.query_budget.QueryBudgetMiddleware. Requests over budget, or
+# repeating one query shape QUERY_BUDGET_REPEAT_THRESHOLD times or more
+# (N+1), are logged; with DEBUG on every response also gets X-Query-*
+# headers. Set QUERY_BUDGET_RAISE = True in tests to fail instead
+# (booking_system.tests pins the list, check_availability and create budgets).
+QUERY_BUDGETS = {
+    ('booking-list', 'GET'): 6,
+    # Insert, occupancy, search index, notifications and utilization
+    ('booking-list', 'POST'): 20,
+    ('booking-my-bookings', 'GET'): 6,
+    ('booking-upcoming', 'GET'): 6,
+    ('booking-past', 'GET'): 6,
+    ('booking-check-availability', 'POST'): 6,
+    ('booking-public-calendar', 'GET'): 6,
+    ('venue-admin-list', 'GET'): 4,
+    ('waitlist-list', 'GET'): 4,
+    ('waitlist-my-waitlist', 'GET'): 4,
+}
+QUERY_BUDGET_DEFAULT = None
+QUERY_BUDGET_REPEAT_THRESHOLD = 5
+QUERY_BUDGET_RAISE = False
+
+
+# ============================
+# CALENDAR (ICS) FEEDS
+# ============================
+
+# Days before / after today included in venue and personal iCalendar feeds
+ICS_FEED_PAST_DAYS = 30
+ICS_FEED_FUTURE_DAYS = 180
+
+# Seconds a rendered VEVENT block is cached (keys change with the booking)
+ICS_EVENT_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+
+# Domain part of event UIDs
+ICS_UID_DOMAIN = 'bookit'
+
+# Seconds a personal feed URL stays valid; users fetch a new one from
+# calendar_feed after that (a password change revokes it earlier)
+ICS_FEED_TOKEN_MAX_AGE = 365 * 24 * 60 * 60
+
+
+# ============================
+# REALTIME (SERVER-SENT EVENTS, WEBSOCKETS)
+# ============================
+
+# Pub/sub used to fan events out to /api/events/stream/ and /ws/venues/
+# connections (served by config.asgi). Celery workers publish too (e.g.
+# auto-cancellations), so events go through Redis whenever the Celery broker
+# does. 'memory' only reaches connections of the publishing process and is
+# meant for tests (booking_system.tests selects it with override_settings).
+PUBSUB = {
+    'BACKEND': config('PUBSUB_BACKEND', default='redis' if CELERY_BROKER_URL.startswith('redis://') else 'memory'),
+    'URL': config('PUBSUB_URL', default=CELERY_BROKER_URL),
+}
+
+# Seconds between keepalive comments on idle streams
+SSE_HEARTBEAT_SECONDS = 15
+
+# Reconnection delay suggested to EventSource clients (milliseconds)
+SSE_RETRY_MS = 3000
+
+# Streams are closed after this many seconds; clients reconnect with a fresh token
+SSE_MAX_SECONDS = 60 * 60
+
+# Most notifications replayed to a reconnecting stream (Last-Event-ID / ?since_id=)
+SSE_REPLAY_LIMIT = 100
+
+# Venue WebSockets are closed after this many seconds; clients reconnect with a fresh token
+WEBSOCKET_MAX_SECONDS = 60 * 60
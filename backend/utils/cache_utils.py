@@ -0,0 +1,26 @@
+"""
+Cache utilities for BookIT
+"""
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+# Backends whose entries are only visible to the process that wrote them
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def cache_is_shared(alias='default'):
+    """
+    Check whether a cache is shared by every process (web workers, Celery).
+
+    Derived data (availability, assignments, unread counters) is only cached
+    in a shared cache: in a process-local one, writes made by other processes
+    would never invalidate it.
+
+    Args:
+        alias (str): Cache alias (default: 'default')
+
+    Returns:
+        bool: False for local-memory and dummy caches
+    """
+    return not isinstance(caches[alias], PROCESS_LOCAL_BACKENDS)
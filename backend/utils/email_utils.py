@@ -575,3 +575,152 @@ def send_waitlist_notification_email(waitlist_entry):
     except Exception as e:
         logger.error(f"Failed to send waitlist notification for entry {waitlist_entry.id}: {e}")
         return False
+
+
+# ============================
+# BOOKING SERIES EMAILS
+# One summary email per recipient instead of one per occurrence
+# ============================
+
+def send_booking_series_confirmation_email(series):
+    """
+    Send a single confirmation email covering every occurrence of a series.
+    
+    Args:
+        series: BookingSeries object
+        
+    Returns:
+        int: Number of successfully sent emails
+    """
+    subject = f"Recurring Booking Confirmed - {series.venue.name}"
+    context = {
+        'series': series,
+        'user': series.user,
+        'occurrences': series.bookings.order_by('date'),
+    }
+    
+    return send_html_email(
+        subject=subject,
+        template_name='booking_series_confirmed',
+        context=context,
+        recipient_list=[series.user.email]
+    )
+
+
+def send_hall_admin_series_notification(series, hall_admin):
+    """
+    Send a single new-series notification email to Hall Admin.
+    
+    Args:
+        series: BookingSeries object
+        hall_admin: Hall Admin User object
+        
+    Returns:
+        int: Number of successfully sent emails
+    """
+    subject = f"New Recurring Booking - {series.venue.name}"
+    context = {
+        'series': series,
+        'hall_admin': hall_admin,
+        'occurrences': series.bookings.order_by('date'),
+    }
+    
+    return send_html_email(
+        subject=subject,
+        template_name='hall_admin_new_series',
+        context=context,
+        recipient_list=[hall_admin.email]
+    )
+
+
+@shared_task(name='send_booking_series_confirmation_async', bind=True, max_retries=3)
+def send_booking_series_confirmation_async(self, series_id):
+    """
+    Async task to send booking series confirmation email.
+    
+    Args:
+        series_id: BookingSeries ID
+    """
+    try:
+        from booking_system.models import BookingSeries
+        series = BookingSeries.objects.select_related('user', 'venue').get(id=series_id)
+        result = send_booking_series_confirmation_email(series)
+        logger.info(f"Booking series confirmation email sent asynchronously for series {series_id}")
+        return result
+        
+    except Exception as e:
+        logger.error(f"Failed to send booking series confirmation async: {str(e)}")
+        raise self.retry(exc=e, countdown=60 * (2 ** self.request.retries))
+
+
+@shared_task(name='send_hall_admin_series_notification_async', bind=True, max_retries=3)
+def send_hall_admin_series_notification_async(self, series_id, hall_admin_id):
+    """
+    Async task to send new series notification to Hall Admin.
+    
+    Args:
+        series_id: BookingSeries ID
+        hall_admin_id: Hall Admin user ID
+    """
+    try:
+        from booking_system.models import BookingSeries
+        from django.contrib.auth import get_user_model
+        
+        User = get_user_model()
+        series = BookingSeries.objects.select_related('user', 'venue').get(id=series_id)
+        hall_admin = User.objects.get(id=hall_admin_id)
+        result = send_hall_admin_series_notification(series, hall_admin)
+        logger.info(f"Hall admin series notification sent asynchronously for series {series_id}")
+        return result
+        
+    except Exception as e:
+        logger.error(f"Failed to send hall admin series notification async: {str(e)}")
+        raise self.retry(exc=e, countdown=60 * (2 ** self.request.retries))
+
+
+def send_booking_series_confirmation_smart(series):
+    """
+    Smart wrapper: Try async, fall back to sync if Celery unavailable.
+    
+    Args:
+        series: BookingSeries object
+    """
+    try:
+        if is_celery_available():
+            send_booking_series_confirmation_async.delay(series_id=series.id)
+            logger.info(f"Booking series confirmation queued asynchronously for series {series.id}")
+        else:
+            logger.info(f"Celery unavailable, sending booking series confirmation synchronously")
+            send_booking_series_confirmation_email(series)
+    except Exception as e:
+        logger.error(f"Failed to queue/send booking series confirmation: {str(e)}")
+        try:
+            send_booking_series_confirmation_email(series)
+        except Exception as sync_e:
+            logger.error(f"Fallback sync email also failed: {str(sync_e)}")
+
+
+def send_hall_admin_series_notification_smart(series, hall_admin):
+    """
+    Smart wrapper: Try async, fall back to sync if Celery unavailable.
+    
+    Args:
+        series: BookingSeries object
+        hall_admin: Hall Admin user object
+    """
+    try:
+        if is_celery_available():
+            send_hall_admin_series_notification_async.delay(
+                series_id=series.id,
+                hall_admin_id=hall_admin.id
+            )
+            logger.info(f"Hall admin series notification queued asynchronously for series {series.id}")
+        else:
+            logger.info(f"Celery unavailable, sending hall admin series notification synchronously")
+            send_hall_admin_series_notification(series, hall_admin)
+    except Exception as e:
+        logger.error(f"Failed to queue/send hall admin series notification: {str(e)}")
+        try:
+            send_hall_admin_series_notification(series, hall_admin)
+        except Exception as sync_e:
+            logger.error(f"Fallback sync email also failed: {str(sync_e)}")
@@ -0,0 +1,200 @@
+"""
+Fast read-only serializers for BookIT list endpoints
+
+A FastSerializer mirrors a DRF serializer (same field names, order and
+values) but reads plain values() rows instead of model instances. Field
+accessors and converters are compiled once per serializer instance, so
+serializing a row is a handful of dict lookups instead of DRF's per-field
+get_attribute()/to_representation() machinery.
+
+Views opt in with FastSerializerMixin and a fast_serializer_class; the
+FAST_SERIALIZERS setting switches every view back to DRF serializers.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .fieldset_utils import FIELDS_PARAM, apply_sparse_fieldset, parse_fields_param
+
+
+def full_name(first_name, last_name):
+    """Same as User.get_full_name() for values() rows"""
+    return f"{first_name} {last_name}".strip()
+
+
+def _iso(value):
+    return value.isoformat()
+
+
+def _converter(field):
+    """
+    Compile a DRF field's to_representation for raw column values.
+
+    Common field types get a direct conversion that produces the same
+    output as DRF; anything else falls back to the field itself.
+    """
+    if isinstance(field, serializers.DateTimeField):
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if output_format and output_format.lower() == 'iso-8601' and field_timezone is not None:
+            def datetime_value(value):
+                value = value.astimezone(field_timezone).isoformat()
+                if value.endswith('+00:00'):
+                    value = value[:-6] + 'Z'
+                return value
+            return datetime_value
+    elif isinstance(field, (serializers.DateField, serializers.TimeField)):
+        default = api_settings.DATE_FORMAT if isinstance(field, serializers.DateField) else api_settings.TIME_FORMAT
+        output_format = getattr(field, 'format', default)
+        if output_format and output_format.lower() == 'iso-8601':
+            return _iso
+    elif isinstance(field, (serializers.CharField, serializers.EmailField)):
+        return str
+    elif isinstance(field, serializers.IntegerField):
+        return int
+    elif isinstance(field, serializers.BooleanField):
+        return bool
+    elif isinstance(field, (serializers.PrimaryKeyRelatedField, serializers.ReadOnlyField)):
+        return None
+    return field.to_representation
+
+
+class FastSerializer:
+    """
+    Read-only serializer building output dicts from values() rows.
+
+    Subclasses set serializer_class (the DRF serializer to mirror) and
+    declare fields that are not a plain column path in computed:
+
+        computed = {'user_name': (('user__first_name', 'user__last_name'), full_name)}
+
+    Computed functions take the column values in order; a string names a
+    method of the fast serializer instead (for values that depend on the
+    call, such as the current time).
+
+    Usage:
+        fast = BookingListFastSerializer(fields=['id', 'event_name'])
+        data = fast.serialize(queryset)
+    """
+
+    serializer_class = None
+    computed = {}
+
+    def __init__(self, fields=None):
+        declared = self.serializer_class().fields
+        if fields is not None:
+            unknown = set(fields) - set(declared)
+            if unknown:
+                raise serializers.ValidationError({
+                    FIELDS_PARAM: [f"Unknown field(s): {', '.join(sorted(unknown))}"]
+                })
+
+        self.accessors = []
+        self.paths = []
+        for name, field in declared.items():
+            if fields is not None and name not in fields:
+                continue
+            if name in self.computed:
+                paths, function = self.computed[name]
+                if isinstance(function, str):
+                    function = getattr(self, function)
+                self._add_paths(paths)
+                self.accessors.append((name, tuple(paths), function))
+            else:
+                if field.source == '*' or isinstance(field, serializers.SerializerMethodField):
+                    raise ImproperlyConfigured(
+                        f"{type(self).__name__}: field '{name}' needs an entry in computed"
+                    )
+                path = '__'.join(field.source.split('.'))
+                self._add_paths([path])
+                self.accessors.append((name, path, _converter(field)))
+
+    def _add_paths(self, paths):
+        for path in paths:
+            if path not in self.paths:
+                self.paths.append(path)
+
+    def values(self, queryset, extra_columns=()):
+        """values() queryset with the columns of the output (plus extra_columns)"""
+        paths = list(self.paths)
+        paths.extend(column for column in extra_columns if column not in paths)
+        return queryset.values(*paths)
+
+    def to_representation_rows(self, rows):
+        """
+        Build output dicts from values() rows.
+
+        Returns:
+            list: One dict per row, equal to the DRF serializer's output
+        """
+        data = []
+        for row in rows:
+            item = {}
+            for name, source, function in self.accessors:
+                if type(source) is tuple:
+                    item[name] = function(*[row[path] for path in source])
+                else:
+                    value = row[source]
+                    item[name] = value if value is None or function is None else function(value)
+            data.append(item)
+        return data
+
+    def serialize(self, queryset, extra_columns=()):
+        """Serialize a queryset (ordering and slicing are kept)"""
+        return self.to_representation_rows(self.values(queryset, extra_columns))
+
+
+def fast_serializers_enabled():
+    return getattr(settings, 'FAST_SERIALIZERS', True)
+
+
+class FastSerializerMixin:
+    """
+    ViewSet mixin serializing list responses with a FastSerializer.
+
+    Set fast_serializer_class to a FastSerializer whose serializer_class is
+    the view's list serializer; list() and serialize_list() then bypass DRF
+    serializers (honouring ?fields=) unless FAST_SERIALIZERS is off.
+    """
+
+    fast_serializer_class = None
+
+    def get_fast_serializer(self, serializer_class=None):
+        """
+        The fast serializer for serializer_class (default: this action's
+        serializer), or None if the view or settings do not use one.
+        """
+        fast_class = self.fast_serializer_class
+        if fast_class is None or not fast_serializers_enabled():
+            return None
+        if fast_class.serializer_class is not (serializer_class or self.get_serializer_class()):
+            return None
+        return fast_class(fields=parse_fields_param(self.request))
+
+    def serialize_list(self, queryset, serializer_class=None):
+        """
+        Serialize a list with the fast serializer if possible, else with
+        serializer_class and ?fields= support.
+
+        Returns:
+            list: Serialized rows
+        """
+        serializer_class = serializer_class or self.get_serializer_class()
+        fast = self.get_fast_serializer(serializer_class)
+        if fast is not None:
+            return fast.serialize(queryset)
+        queryset, sparse = apply_sparse_fieldset(self.request, queryset, serializer_class)
+        return serializer_class(queryset, many=True, context=self.get_serializer_context(), **sparse).data
+
+    def list(self, request, *args, **kwargs):
+        fast = self.get_fast_serializer()
+        if fast is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = fast.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(fast.to_representation_rows(page))
+        return Response(fast.to_representation_rows(rows))
@@ -0,0 +1,150 @@
+"""
+Sparse fieldset utilities for BookIT
+Let list endpoints return (and load) only the fields a client asks for with ?fields=
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.response import Response
+
+FIELDS_PARAM = 'fields'
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin accepting a `fields` keyword to limit the output.
+
+    Fields whose model columns cannot be derived from their source (method
+    fields, model properties) can declare them in
+    Meta.sparse_field_sources = {'field': ['model__path', ...]}; without it
+    the queryset is left unrestricted when such a field is requested.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            unknown = set(fields) - set(self.fields)
+            if unknown:
+                raise serializers.ValidationError({
+                    FIELDS_PARAM: [f"Unknown field(s): {', '.join(sorted(unknown))}"]
+                })
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+def parse_fields_param(request):
+    """
+    Read the requested field names from the query string.
+
+    Returns:
+        list: Field names, or None if the parameter is absent or empty
+    """
+    value = request.query_params.get(FIELDS_PARAM, '')
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    return fields or None
+
+
+def _model_path(model, path):
+    """
+    Resolve a '__' separated path to (column path, select_related path).
+
+    Returns:
+        tuple: (path for only(), related path or None), or None if the path
+               is not made of forward relations ending in a concrete field
+    """
+    parts = path.split('__')
+    for position, part in enumerate(parts):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        is_last = position == len(parts) - 1
+        if field.many_to_one or field.one_to_one:
+            if field.auto_created and not field.concrete:
+                return None
+            if is_last:
+                return path, '__'.join(parts[:position]) or None
+            model = field.related_model
+        elif field.concrete and not field.is_relation and is_last:
+            return path, '__'.join(parts[:position]) or None
+        else:
+            return None
+    return None
+
+
+def sparse_queryset(queryset, serializer_class, fields, extra_columns=()):
+    """
+    Restrict a queryset to the columns needed for the requested fields.
+
+    Args:
+        queryset: Queryset to restrict
+        serializer_class: Serializer used for the output
+        fields (list): Requested field names
+        extra_columns (iterable): Model fields needed besides the output (e.g. for ordering)
+
+    Returns:
+        QuerySet: Queryset with only()/select_related() applied, or the
+                  original queryset if a field's columns cannot be derived
+    """
+    declared = serializer_class().fields
+    sources = getattr(serializer_class.Meta, 'sparse_field_sources', {})
+
+    columns = set(extra_columns)
+    related = set()
+    for name in fields:
+        if name not in declared:
+            continue  # Reported by the serializer
+        if name in sources:
+            paths = sources[name]
+        elif declared[name].source == '*':
+            return queryset
+        else:
+            paths = ['__'.join(declared[name].source.split('.'))]
+
+        for path in paths:
+            resolved = _model_path(queryset.model, path)
+            if resolved is None:
+                return queryset
+            column, relation = resolved
+            columns.add(column)
+            if relation:
+                related.add(relation)
+
+    queryset = queryset.select_related(None)
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.only(*columns)
+
+
+def apply_sparse_fieldset(request, queryset, serializer_class, extra_columns=()):
+    """
+    Apply ?fields= to a queryset and its serializer.
+
+    Usage:
+        queryset, sparse = apply_sparse_fieldset(request, queryset, BookingListSerializer)
+        BookingListSerializer(queryset, many=True, **sparse)
+
+    Returns:
+        tuple: (queryset, serializer kwargs)
+    """
+    fields = parse_fields_param(request)
+    if fields is None or not issubclass(serializer_class, SparseFieldsetMixin):
+        return queryset, {}
+    return sparse_queryset(queryset, serializer_class, fields, extra_columns), {'fields': fields}
+
+
+class SparseFieldsetListMixin:
+    """ViewSet mixin adding ?fields= support to the list action"""
+
+    def list(self, request, *args, **kwargs):
+        queryset, sparse = apply_sparse_fieldset(
+            request, self.filter_queryset(self.get_queryset()), self.get_serializer_class()
+        )
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True, **sparse)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer(queryset, many=True, **sparse)
+        return Response(serializer.data)
@@ -1,12 +1,35 @@
 """
 Notification utilities for creating in-app notifications
+
+Unread counts are kept per user in the cache and adjusted after every
+commit that creates, reads or deletes an unread notification, so polling
+the count is a single cache read. A missing key is recomputed from the
+database; reconcile_unread_counts() periodically drops every counter so it
+is recounted, repairing drift (e.g. after a failed write).
+
+Counters only make sense in a cache shared by every process (the web
+workers adjust them, the Celery worker reconciles them). With a
+per-process backend the count is read from the database and the
+adjustment and reconcile helpers do nothing.
 """
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from booking_system.models import Notification
+from utils.cache_utils import cache_is_shared
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def _unread_timeout():
+    return getattr(settings, 'UNREAD_COUNT_CACHE_TIMEOUT', 60 * 60)
+
+
 def create_notification(user, notification_type, title, message, link=None, 
                        related_booking_id=None, related_venue_id=None):
     """
@@ -41,6 +64,67 @@ def create_notification(user, notification_type, title, message, link=None,
         return None
 
 
+def create_notifications(notifications, batch_size=500):
+    """
+    Save many notifications with one bulk_create.
+    
+    bulk_create skips post_save, so unread counters and event streams are
+    updated through the notifications_bulk_created signal instead.
+    
+    Args:
+        notifications (list): Unsaved Notification objects
+        batch_size (int): Rows per INSERT statement
+        
+    Returns:
+        list: Created notifications (empty on failure)
+    """
+    from booking_system.signals import notifications_bulk_created
+    
+    notifications = list(notifications)
+    if not notifications:
+        return []
+    try:
+        created = Notification.objects.bulk_create(notifications, batch_size=batch_size)
+        notifications_bulk_created.send(sender=Notification, notifications=created)
+        logger.info(f"Created {len(created)} notification(s)")
+        return created
+    except Exception as e:
+        logger.error(f"Failed to create {len(notifications)} notification(s): {str(e)}")
+        return []
+
+
+def notify_many(recipients, notification_type, title, message, link=None,
+                related_booking_id=None, related_venue_id=None):
+    """
+    Send the same notification to several users with one INSERT.
+    
+    Args:
+        recipients (iterable): User objects (duplicates are notified once)
+        notification_type (str): Type of notification
+        title (str): Notification title
+        message (str): Notification message
+        link (str, optional): Link to related page
+        related_booking_id (int, optional): Related booking ID
+        related_venue_id (int, optional): Related venue ID
+        
+    Returns:
+        list: Created notifications
+    """
+    unique = {user.pk: user for user in recipients}
+    return create_notifications(
+        Notification(
+            user=user,
+            notification_type=notification_type,
+            title=title,
+            message=message,
+            link=link,
+            related_booking_id=related_booking_id,
+            related_venue_id=related_venue_id
+        )
+        for user in unique.values()
+    )
+
+
 def notify_booking_confirmed(booking):
     """
     Notify user that their booking is confirmed.
@@ -94,14 +178,99 @@ def notify_hall_admin_new_booking(booking, hall_admin):
         booking: Booking object
         hall_admin: Hall Admin User object
     """
-    return create_notification(
-        user=hall_admin,
+    notifications = notify_hall_admins_new_booking(booking, [hall_admin])
+    return notifications[0] if notifications else None
+
+
+def notify_hall_admins_new_booking(booking, hall_admins):
+    """
+    Notify every Hall Admin of a venue about a new booking (one INSERT).
+    
+    Args:
+        booking: Booking object
+        hall_admins (iterable): Hall Admin User objects
+    """
+    return notify_many(
+        hall_admins,
         notification_type='new_booking',
         title=f'New Booking - {booking.venue.name}',
         message=f'{booking.user.get_full_name()} booked {booking.venue.name} for "{booking.event_name}" on {booking.date.strftime("%B %d, %Y")}.',
         link='/hall-admin/bookings',
         related_booking_id=booking.id,
-        related_venue_id=booking.venue.id
+        related_venue_id=booking.venue_id
+    )
+
+
+def notify_series_confirmed(series, occurrence_count):
+    """
+    Notify user that all occurrences of their recurring booking are confirmed.
+    
+    Args:
+        series: BookingSeries object
+        occurrence_count (int): Number of bookings created
+    """
+    return create_notification(
+        user=series.user,
+        notification_type='booking_confirmed',
+        title=f'Recurring Booking Confirmed - {series.venue.name}',
+        message=f'Your recurring booking for "{series.event_name}" ({occurrence_count} occurrences from {series.start_date.strftime("%B %d, %Y")}) has been confirmed.',
+        link='/my-bookings',
+        related_venue_id=series.venue.id
+    )
+
+
+def notify_hall_admin_new_series(series, hall_admin, occurrence_count):
+    """
+    Notify Hall Admin about a new recurring booking for their venue.
+    
+    Args:
+        series: BookingSeries object
+        hall_admin: Hall Admin User object
+        occurrence_count (int): Number of bookings created
+    """
+    notifications = notify_hall_admins_new_series(series, [hall_admin], occurrence_count)
+    return notifications[0] if notifications else None
+
+
+def notify_hall_admins_new_series(series, hall_admins, occurrence_count):
+    """
+    Notify every Hall Admin of a venue about a new recurring booking (one INSERT).
+    
+    Args:
+        series: BookingSeries object
+        hall_admins (iterable): Hall Admin User objects
+        occurrence_count (int): Number of bookings created
+    """
+    return notify_many(
+        hall_admins,
+        notification_type='new_booking',
+        title=f'New Recurring Booking - {series.venue.name}',
+        message=f'{series.user.get_full_name()} booked {series.venue.name} for "{series.event_name}" ({occurrence_count} occurrences from {series.start_date.strftime("%B %d, %Y")}).',
+        link='/hall-admin/bookings',
+        related_venue_id=series.venue_id
+    )
+
+
+def build_booking_cancelled(booking, reason=None):
+    """
+    Unsaved cancellation notification for a booking owner (for create_notifications).
+    
+    Args:
+        booking: Booking object
+        reason (str, optional): Cancellation reason (default: booking.cancellation_reason)
+    """
+    message = f'Your booking for "{booking.event_name}" on {booking.date.strftime("%B %d, %Y")} has been cancelled.'
+    reason = reason or booking.cancellation_reason
+    if reason:
+        message += f' Reason: {reason}'
+    return Notification(
+        user=booking.user,
+        notification_type='booking_cancelled',
+        title=f'Booking Cancelled - {booking.venue.name}',
+        message=message,
+        link='/my-bookings',
+        related_booking_id=booking.id,
+        related_venue_id=booking.venue_id
     )
 
 
@@ -150,12 +319,78 @@ def get_unread_count(user):
         int: Count of unread notifications
     """
     try:
-        return Notification.objects.filter(user=user, is_read=False).count()
+        if not cache_is_shared():
+            return Notification.objects.filter(user=user, is_read=False).count()
+        key = _unread_key(user.pk)
+        count = cache.get(key)
+        if count is None or count < 0:
+            count = Notification.objects.filter(user=user, is_read=False).count()
+            # add() keeps a counter another request created (and maybe
+            # already adjusted) in the meantime; that one wins
+            if not cache.add(key, count, _unread_timeout()):
+                cached = cache.get(key)
+                if cached is not None and cached >= 0:
+                    count = cached
+        return count
     except Exception as e:
         logger.error(f"Failed to get unread count for {user.email}: {str(e)}")
         return 0
 
 
+def adjust_unread_count(user_id, delta):
+    """
+    Add delta to a user's cached unread count once the transaction commits.
+    
+    Args:
+        user_id (int): User ID
+        delta (int): Change in unread notifications (negative when read)
+    """
+    def apply():
+        try:
+            if delta > 0:
+                cache.incr(_unread_key(user_id), delta)
+            elif delta < 0:
+                cache.decr(_unread_key(user_id), -delta)
+        except ValueError:
+            # Not cached: the next read recomputes it
+            pass
+    if delta and cache_is_shared():
+        transaction.on_commit(apply)
+
+
+def invalidate_unread_counts(user_ids):
+    """Drop cached unread counts (recomputed on next read) once the transaction commits"""
+    keys = [_unread_key(user_id) for user_id in set(user_ids)]
+    if keys and cache_is_shared():
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def reconcile_unread_counts(batch_size=1000):
+    """
+    Drop the cached unread count of every user, so the next read recounts
+    it from the database and seeds it again with add().
+    
+    Counters are not rewritten from a count taken here: an increment or
+    decrement landing between that count and the write would be lost.
+    
+    Args:
+        batch_size (int): Keys deleted per cache round trip
+        
+    Returns:
+        int: Number of users reconciled (0 when the cache is not shared,
+        as nothing reads counters from it then)
+    """
+    from accounts.models import User
+    
+    if not cache_is_shared():
+        return 0
+    
+    user_ids = list(User.objects.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(user_ids), batch_size):
+        cache.delete_many([_unread_key(user_id) for user_id in user_ids[start:start + batch_size]])
+    return len(user_ids)
+
+
 def mark_all_as_read(user):
     """
     Mark all notifications as read for a user.
@@ -175,6 +410,7 @@ def mark_all_as_read(user):
             is_read=True, 
             read_at=timezone.now()
         )
+        adjust_unread_count(user.pk, -updated)
         logger.info(f"Marked {updated} notifications as read for {user.email}")
         return updated
     except Exception as e:
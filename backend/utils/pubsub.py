@@ -0,0 +1,221 @@
+"""
+Publish/subscribe fan-out for BookIT realtime streams
+
+Django code publishes JSON messages to named channels (e.g. "user:42") from
+synchronous code; ASGI endpoints subscribe to channels and await messages.
+The backend is chosen with settings.PUBSUB:
+
+    PUBSUB = {'BACKEND': 'redis', 'URL': 'redis://localhost:6379/0'} # shared by all workers
+    PUBSUB = {'BACKEND': 'memory'}                                   # one process (tests)
+
+The memory broker only reaches subscribers in the publishing process, so it
+cannot carry events published by Celery workers; settings use Redis whenever
+the Celery broker does. The broker is rebuilt when PUBSUB is overridden
+(override_settings in tests).
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+# Messages queued per subscriber before new ones are dropped (slow clients)
+DEFAULT_QUEUE_SIZE = 256
+
+
+def encode(message):
+    """Serialize a message (dates, decimals and UUIDs are allowed)"""
+    return json.dumps(message, cls=DjangoJSONEncoder)
+
+
+class MemorySubscription:
+    """Subscription to channels of a MemoryBroker, bound to the subscriber's event loop"""
+
+    def __init__(self, broker, channels, queue_size=DEFAULT_QUEUE_SIZE):
+        self.broker = broker
+        self.channels = frozenset(channels)
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=queue_size)
+
+    def deliver(self, channel, data):
+        """Queue a message (called from any thread)"""
+        self._loop.call_soon_threadsafe(self._put, channel, data)
+
+    def _put(self, channel, data):
+        try:
+            self._queue.put_nowait((channel, json.loads(data)))
+        except asyncio.QueueFull:
+            logger.warning(f"Dropped pub/sub message on {channel}: subscriber queue full")
+
+    async def get(self, timeout=None):
+        """
+        Wait for the next message.
+
+        Returns:
+            tuple: (channel, message), or None if the timeout expired
+        """
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.broker._unsubscribe(self)
+
+
+class MemoryBroker:
+    """In-process broker: messages reach subscribers of this process only"""
+
+    def __init__(self, queue_size=DEFAULT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        data = encode(message)
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.deliver(channel, data)
+            except RuntimeError:
+                # The subscriber's event loop is closed
+                self._unsubscribe(subscription)
+        return len(subscriptions)
+
+    async def subscribe(self, channels):
+        subscription = MemorySubscription(self, channels, self.queue_size)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscriptions.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[channel]
+
+
+class RedisSubscription:
+    """Subscription to channels of a RedisBroker"""
+
+    def __init__(self, broker, pubsub, channels):
+        self.broker = broker
+        self.channels = frozenset(channels)
+        self._pubsub = pubsub
+
+    async def get(self, timeout=None):
+        """
+        Wait for the next message.
+
+        Returns:
+            tuple: (channel, message), or None if the timeout expired
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - loop.time())
+            message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+            if message is not None:
+                channel = message['channel'].decode()[len(self.broker.prefix):]
+                return channel, json.loads(message['data'])
+            if deadline is not None and loop.time() >= deadline:
+                return None
+
+    async def close(self):
+        await self._pubsub.unsubscribe()
+        await self._pubsub.close()
+
+
+class RedisBroker:
+    """Redis PUBLISH/SUBSCRIBE broker shared by every process"""
+
+    def __init__(self, url, prefix='bookit:'):
+        import redis
+
+        self.url = url
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._async_client = None
+
+    def publish(self, channel, message):
+        return self._client.publish(self.prefix + channel, encode(message))
+
+    async def subscribe(self, channels):
+        import redis.asyncio
+
+        if self._async_client is None:
+            self._async_client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = self._async_client.pubsub()
+        await pubsub.subscribe(*[self.prefix + channel for channel in channels])
+        return RedisSubscription(self, pubsub, channels)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """The process-wide broker configured by settings.PUBSUB"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                config = getattr(settings, 'PUBSUB', {})
+                backend = config.get('BACKEND', 'memory')
+                if backend == 'redis':
+                    _broker = RedisBroker(config.get('URL', 'redis://localhost:6379/0'), config.get('PREFIX', 'bookit:'))
+                elif backend == 'memory':
+                    _broker = MemoryBroker(config.get('QUEUE_SIZE', DEFAULT_QUEUE_SIZE))
+                else:
+                    raise ValueError(f"Unknown PUBSUB backend: {backend}")
+    return _broker
+
+
+@receiver(setting_changed)
+def reset_broker(setting, **kwargs):
+    """Build the broker again from overridden PUBSUB settings"""
+    global _broker
+    if setting == 'PUBSUB':
+        with _broker_lock:
+            _broker = None
+
+
+def publish(channel, message):
+    """
+    Publish a message to a channel. Realtime delivery is best effort:
+    failures are logged and never break the caller.
+
+    Args:
+        channel (str): Channel name, e.g. "user:42"
+        message (dict): JSON-serializable message
+
+    Returns:
+        int: Number of subscribers reached (0 on failure)
+    """
+    try:
+        return get_broker().publish(channel, message)
+    except Exception as e:
+        logger.error(f"Failed to publish to {channel}: {str(e)}")
+        return 0
+
+
+def user_channel(user_id):
+    """Channel carrying one user's notifications and booking changes"""
+    return f'user:{user_id}'
+
+
+def venue_channel(venue_id):
+    """Channel carrying booking changes at one venue"""
+    return f'venue:{venue_id}'
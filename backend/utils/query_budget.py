@@ -0,0 +1,168 @@
+"""
+Query budget utilities for BookIT
+Count SQL queries per request, spot N+1 patterns and enforce per-endpoint budgets
+"""
+from contextlib import ExitStack, contextmanager
+from django.conf import settings
+from django.db import connections
+import logging
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+# Collapses the placeholder lists of IN (...) clauses and bulk VALUES so
+# that queries differing only in the number of parameters share a shape
+_PLACEHOLDER_LIST = re.compile(r'%s(?:\s*,\s*%s)+')
+_VALUES_LIST = re.compile(r'(\(%s\))(?:\s*,\s*\(%s\))+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a request or block runs more queries than its budget"""
+
+
+def query_shape(sql):
+    """
+    Normalize SQL so that repeated queries with different parameters match.
+
+    Args:
+        sql (str): SQL as passed to the database cursor (with %s placeholders)
+
+    Returns:
+        str: Query shape
+    """
+    shape = _PLACEHOLDER_LIST.sub('%s', sql)
+    return _VALUES_LIST.sub(r'\1', shape)
+
+
+class QueryRecorder:
+    """
+    Execute wrapper that records every query run through a connection.
+    Install with connection.execute_wrapper(recorder) or use recording().
+    """
+
+    def __init__(self):
+        self.queries = []  # (sql, seconds) tuples
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def total_time(self):
+        """Total database time in seconds"""
+        return sum(duration for _, duration in self.queries)
+
+    def repeated_shapes(self, threshold=None):
+        """
+        Find query shapes run at least `threshold` times (likely N+1 patterns).
+
+        Returns:
+            list: (shape, count) tuples, most repeated first
+        """
+        if threshold is None:
+            threshold = getattr(settings, 'QUERY_BUDGET_REPEAT_THRESHOLD', 5)
+        counts = {}
+        for sql, _ in self.queries:
+            shape = query_shape(sql)
+            counts[shape] = counts.get(shape, 0) + 1
+        repeated = [(shape, count) for shape, count in counts.items() if count >= threshold]
+        return sorted(repeated, key=lambda item: -item[1])
+
+
+@contextmanager
+def recording():
+    """Record the queries of every database connection inside the block"""
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+@contextmanager
+def assert_query_budget(max_queries, allow_repeats=False, repeat_threshold=None):
+    """
+    Test helper: fail if the block runs more than max_queries queries or,
+    unless allow_repeats is set, repeats a query shape (N+1).
+
+    Usage:
+        with assert_query_budget(5):
+            client.get('/api/bookings/')
+
+    Raises:
+        QueryBudgetExceeded: If the budget is exceeded
+    """
+    with recording() as recorder:
+        yield recorder
+    repeated = [] if allow_repeats else recorder.repeated_shapes(repeat_threshold)
+    problems = _budget_problems(recorder, max_queries, repeated)
+    if problems:
+        raise QueryBudgetExceeded('; '.join(problems))
+
+
+def _budget_problems(recorder, max_queries, repeated):
+    """Describe how a recording breaks its budget (empty list if it doesn't)"""
+    problems = []
+    if max_queries is not None and recorder.count > max_queries:
+        problems.append(f"{recorder.count} queries (budget {max_queries})")
+    for shape, count in repeated:
+        problems.append(f"N+1: {count}x {shape[:200]}")
+    return problems
+
+
+class QueryBudgetMiddleware:
+    """
+    Count the queries of each request and compare them with its budget.
+
+    Settings:
+        QUERY_BUDGETS: {(url name, HTTP method): max queries},
+                       e.g. {('booking-list', 'GET'): 6}
+        QUERY_BUDGET_DEFAULT: Budget for endpoints not listed (None = no limit)
+        QUERY_BUDGET_REPEAT_THRESHOLD: Repeats of one query shape reported as N+1
+        QUERY_BUDGET_RAISE: Raise QueryBudgetExceeded instead of logging (tests)
+
+    With DEBUG on, every response carries X-Query-Count, X-Query-Time-Ms and
+    X-Query-Repeated headers; otherwise only requests over budget or with
+    N+1 patterns produce a warning log line.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with recording() as recorder:
+            response = self.get_response(request)
+
+        url_name = getattr(request.resolver_match, 'url_name', None)
+        budgets = getattr(settings, 'QUERY_BUDGETS', {})
+        # Reads and writes of one URL (list GET vs create POST) differ widely
+        budget = budgets.get((url_name, request.method), getattr(settings, 'QUERY_BUDGET_DEFAULT', None))
+        repeated = recorder.repeated_shapes()
+
+        if settings.DEBUG:
+            response['X-Query-Count'] = str(recorder.count)
+            response['X-Query-Time-Ms'] = f"{recorder.total_time * 1000:.1f}"
+            response['X-Query-Repeated'] = str(len(repeated))
+            if budget is not None:
+                response['X-Query-Budget'] = str(budget)
+
+        problems = _budget_problems(recorder, budget, repeated)
+        if problems:
+            message = (
+                f"Query budget: {request.method} {request.path} ({url_name}) "
+                f"ran {recorder.count} queries in {recorder.total_time * 1000:.1f}ms: "
+                + '; '.join(problems)
+            )
+            if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
@@ -0,0 +1,11 @@
+"""
+Fast read-only serializers for venue list endpoints (see utils.fast_serializers).
+"""
+from utils.fast_serializers import FastSerializer
+from .serializers import VenueListSerializer
+
+
+class VenueListFastSerializer(FastSerializer):
+    """Fast equivalent of VenueListSerializer"""
+
+    serializer_class = VenueListSerializer
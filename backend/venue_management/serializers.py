@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Venue
+from utils.fieldset_utils import SparseFieldsetMixin
 
 
 class VenueSerializer(serializers.ModelSerializer):
@@ -19,7 +20,7 @@ class VenueSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at', 'full_location', 'facility_list']
 
 
-class VenueListSerializer(serializers.ModelSerializer):
+class VenueListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Lightweight serializer for venue list"""
     
     class Meta:
@@ -5,6 +5,12 @@ from .views import VenueViewSet
 router = DefaultRouter()
 router.register(r'venues', VenueViewSet, basename='venue')
 
+# Calendar apps request feeds without a trailing slash
+venue_calendar_ics = VenueViewSet.as_view(
+    {'get': 'calendar_ics'}, basename='venue', detail=True, **VenueViewSet.calendar_ics.kwargs
+)
+
 urlpatterns = [
+    path('venues/<int:pk>/calendar.ics', venue_calendar_ics, name='venue-calendar-feed'),
     path('', include(router.urls)),
 ]
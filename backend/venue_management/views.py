@@ -11,15 +11,24 @@ from .serializers import (
     VenueUpdateSerializer
 )
 from accounts.permissions import IsSuperAdmin
+from utils.fieldset_utils import SparseFieldsetListMixin
+from utils.fast_serializers import FastSerializerMixin
+from .fast_serializers import VenueListFastSerializer
+from booking_system.ics import ICalendarRenderer
+import logging
 
+logger = logging.getLogger(__name__)
 
-class VenueViewSet(viewsets.ModelViewSet):
+
+class VenueViewSet(FastSerializerMixin, SparseFieldsetListMixin, viewsets.ModelViewSet):
     """
     ViewSet for Venue CRUD operations
     Public can view venues (read-only)
     Only Super Admin can create/update/delete venues
+    List supports ?fields= (comma-separated) to return only some fields
     """
     queryset = Venue.objects.all()
+    fast_serializer_class = VenueListFastSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'location', 'description']
     ordering_fields = ['name', 'capacity', 'created_at']
@@ -41,9 +50,8 @@ class VenueViewSet(viewsets.ModelViewSet):
         
         # Hall Admin sees all their assigned venues (including inactive)
         if user and user.is_authenticated and user.is_venue_admin():
-            from booking_system.models import VenueAdmin
-            managed_venue_ids = VenueAdmin.objects.filter(user=user).values_list('venue_id', flat=True)
-            return queryset.filter(id__in=managed_venue_ids)
+            from booking_system.assignments import get_assigned_venue_ids
+            return queryset.filter(id__in=get_assigned_venue_ids(user))
         
         # Others see only active venues
         return queryset.filter(is_active=True)
@@ -85,7 +93,7 @@ class VenueViewSet(viewsets.ModelViewSet):
             
             return super().update(request, *args, **kwargs)
         except Exception as e:
-            print(f"Error in update: {str(e)}")
+            logger.exception(f"Error in update: {str(e)}")
             return Response(
                 {'error': f'Failed to update venue: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -106,7 +114,7 @@ class VenueViewSet(viewsets.ModelViewSet):
             
             return super().partial_update(request, *args, **kwargs)
         except Exception as e:
-            print(f"Error in partial_update: {str(e)}")
+            logger.exception(f"Error in partial_update: {str(e)}")
             return Response(
                 {'error': f'Failed to update venue: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -124,12 +132,9 @@ class VenueViewSet(viewsets.ModelViewSet):
             venue = self.get_object()
             user = request.user
             
-            print(f"Toggle attempt - User: {user.email}, Venue: {venue.name}")
-            print(f"User is_admin: {user.is_admin()}, is_venue_admin: {user.is_venue_admin()}")
-            
             # Check permissions
             if not (user.is_admin() or self._is_venue_admin_for_venue(user, venue)):
-                print(f"Permission denied for user {user.email}")
+                logger.warning(f"User {user.email} is not allowed to toggle venue {venue.id}")
                 return Response(
                     {'error': 'You do not have permission to manage this venue'},
                     status=status.HTTP_403_FORBIDDEN
@@ -138,7 +143,7 @@ class VenueViewSet(viewsets.ModelViewSet):
             # Toggle the status
             venue.is_active = not venue.is_active
             venue.save()
-            print(f"Venue {venue.name} toggled to is_active={venue.is_active}")
+            logger.info(f"Venue {venue.name} toggled to is_active={venue.is_active} by {user.email}")
             
             serializer = VenueSerializer(venue)
             return Response({
@@ -146,17 +151,30 @@ class VenueViewSet(viewsets.ModelViewSet):
                 'venue': serializer.data
             })
         except Exception as e:
-            print(f"Error in toggle_availability: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(f"Error in toggle_availability: {str(e)}")
             return Response(
                 {'error': f'Failed to toggle venue availability: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @action(detail=True, methods=['get'], url_path='calendar.ics',
+            renderer_classes=[ICalendarRenderer])
+    def calendar_ics(self, request, pk=None):
+        """
+        Public iCalendar feed of a venue's bookings
+        Same information as the public calendar (event name, department)
+        """
+        from booking_system.models import Booking
+        from booking_system.ics import calendar_response, feed_window
+        
+        venue = self.get_object()
+        start_date, end_date = feed_window()
+        bookings = Booking.objects.filter(venue=venue, date__gte=start_date, date__lte=end_date)
+        return calendar_response(request, f'BookIT - {venue.name}', bookings, venue.updated_at)
+    
     def _is_venue_admin_for_venue(self, user, venue):
         """Check if user is hall admin for this venue"""
         if not user.is_venue_admin():
             return False
-        from booking_system.models import VenueAdmin
-        return VenueAdmin.objects.filter(user=user, venue=venue).exists()
+        from booking_system.assignments import is_assigned
+        return is_assigned(user, venue)